@@ -17,15 +17,24 @@ from .enums import ToggleViewActionMode
 from .enums import InsertionOrder
 
 from . import util
+from . import state_codec
 
+from .drag_instrumentation import DragInstrumentation
+from .drop_target_index import DropTargetIndex
 from .eliding_label import ElidingLabel
 from .floating_dock_container import FloatingDockContainer
+from .floating_drag_preview import FloatingDragPreview
+from .layout_snapshot import LayoutSnapshot
+from .perspective_archive import PerspectiveArchive
+from .position_index import PositionIndex
+from .state_codec import StateCodec, NullCodec, ZlibCodec, LzmaCodec
+from .tabs_menu import TabsMenu
 from .dock_area_layout import DockAreaLayout
 from .dock_area_tab_bar import DockAreaTabBar
 from .dock_area_title_bar import DockAreaTitleBar
 from .dock_area_widget import DockAreaWidget
 from .dock_container_widget import DockContainerWidget
-from .dock_manager import DockManager
+from .dock_manager import DockManager, PerspectiveCacheInfo
 from .dock_overlay import DockOverlay, DockOverlayCross
 from .dock_splitter import DockSplitter
 from .dock_widget import DockWidget
@@ -50,9 +59,21 @@ __all__ = [
     'DockWidgetArea',
     'DockWidgetFeature',
     'DockWidgetTab',
+    'DragInstrumentation',
+    'DropTargetIndex',
     'ElidingLabel',
     'FloatingDockContainer',
+    'FloatingDragPreview',
+    'LayoutSnapshot',
+    'LzmaCodec',
+    'NullCodec',
+    'PerspectiveArchive',
+    'PerspectiveCacheInfo',
+    'PositionIndex',
+    'StateCodec',
+    'TabsMenu',
     'TitleBarButton',
+    'ZlibCodec',
     'DockFlags',
     'DragState',
     'IconColor',
@@ -62,5 +83,6 @@ __all__ = [
     'ToggleViewActionMode',
     'InsertionOrder',
     'examples',
+    'state_codec',
     'util',
 ]
@@ -0,0 +1,4 @@
+'''
+Benchmarks of the docking system, run them with ``python -m``, e.g.
+``python -m qtpydocking.benchmarks.state_codecs``
+'''
@@ -0,0 +1,117 @@
+'''
+Benchmark of the state codecs with the layouts of the examples.
+
+Reports the encode and decode time and the size of the XML and the binary
+state of each example layout for each codec::
+
+    python -m qtpydocking.benchmarks.state_codecs
+'''
+import argparse
+import timeit
+from collections import namedtuple
+
+from qtpy import QtWidgets
+
+from ..enums import DockFlags
+from ..examples import demo, simple
+from ..state_codec import (LzmaCodec, NullCodec, StateCodec, ZlibCodec,
+                           decode, encode)
+
+
+CODECS = (NullCodec(), ZlibCodec(1), ZlibCodec(6), ZlibCodec(9),
+          LzmaCodec(0), LzmaCodec(6))
+
+
+class Result(namedtuple('Result', ('layout', 'codec', 'size', 'encode_us',
+                                   'decode_us'))):
+    '''
+    Benchmark result of one codec for one layout state
+    '''
+
+
+def layout_states() -> dict:
+    '''
+    Returns the XML and the binary state of the example layouts
+
+    Returns
+    -------
+    value : dict
+        Layout name to state
+    '''
+    states = {}
+    for example in (simple, demo):
+        window = example.MainWindow()
+        manager = window.dock_manager
+        flags = manager.config_flags() & ~DockFlags.xml_compression
+        name = example.__name__.rsplit('.', 1)[-1]
+        manager.set_config_flags(flags)
+        states[f'{name}-xml'] = manager.save_state()
+        manager.set_config_flags(flags | DockFlags.binary_state)
+        states[f'{name}-binary'] = manager.save_state()
+        window.deleteLater()
+
+    return states
+
+
+def benchmark(state, codec: StateCodec, number: int) -> Result:
+    '''
+    Measures the average encode and decode time of the codec
+
+    Parameters
+    ----------
+    state : QByteArray
+    codec : StateCodec
+    number : int
+        Number of repetitions
+
+    Returns
+    -------
+    value : Result
+    '''
+    encoded = encode(state, codec)
+    assert decode(encoded) == state
+    encode_time = timeit.timeit(lambda: encode(state, codec), number=number)
+    decode_time = timeit.timeit(lambda: decode(encoded), number=number)
+    return Result('', repr(codec), encoded.size(),
+                  encode_time / number * 1e6, decode_time / number * 1e6)
+
+
+def run(number: int = 200) -> list:
+    '''
+    Benchmarks all codecs with all example layouts
+
+    Parameters
+    ----------
+    number : int, optional
+        Number of repetitions
+
+    Returns
+    -------
+    value : list of Result
+    '''
+    results = []
+    for layout, state in layout_states().items():
+        results.append(Result(layout, 'uncompressed', state.size(), 0., 0.))
+        for codec in CODECS:
+            results.append(benchmark(state, codec, number)._replace(
+                layout=layout))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--number', type=int, default=200,
+                        help='Number of repetitions')
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])  # noqa
+    print(f'{"layout":<16} {"codec":<28} {"size":>8} {"encode us":>10} '
+          f'{"decode us":>10}')
+    for result in run(args.number):
+        print(f'{result.layout:<16} {result.codec:<28} {result.size:>8} '
+              f'{result.encode_us:>10.1f} {result.decode_us:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+'''
+Benchmark of switching the current tab of a dock area with many tabs.
+
+Reports the average time of a tab switch with the default stylesheet, and of
+the same switch followed by polishing the outgoing and the incoming tab and
+their labels again, which was required while the active tab was styled by a
+stylesheet property selector::
+
+    python -m qtpydocking.benchmarks.tab_switching
+'''
+import argparse
+import timeit
+from collections import namedtuple
+
+from qtpy import QtWidgets
+
+from ..dock_area_widget import DockAreaWidget
+from ..dock_manager import DockManager
+from ..dock_widget import DockWidget
+from ..enums import DockWidgetArea
+
+
+class Result(namedtuple('Result', ('mode', 'tabs', 'switch_us'))):
+    '''
+    Benchmark result of one switching mode
+    '''
+
+
+def add_tabs(manager: DockManager, tabs: int) -> DockAreaWidget:
+    '''
+    Adds the given number of dock widgets, titled 'Tab 0', 'Tab 1' and so
+    on, as the tabs of a new dock area in the center of the dock manager
+
+    Parameters
+    ----------
+    manager : DockManager
+    tabs : int
+
+    Returns
+    -------
+    value : DockAreaWidget
+    '''
+    dock_area = None
+    for i in range(tabs):
+        dock_widget = DockWidget(f'Tab {i}')
+        dock_widget.set_widget(QtWidgets.QLabel(f'Tab {i}'))
+        dock_area = manager.add_dock_widget(DockWidgetArea.center,
+                                            dock_widget, dock_area)
+    return dock_area
+
+
+def create_tab_bar(window: QtWidgets.QMainWindow, tabs: int):
+    '''
+    Creates a dock manager in the window with one dock area with the given
+    number of tabs
+
+    Parameters
+    ----------
+    window : QMainWindow
+    tabs : int
+
+    Returns
+    -------
+    value : DockAreaTabBar
+    '''
+    dock_area = add_tabs(DockManager(window), tabs)
+    window.show()
+    return dock_area.d.tab_bar()
+
+
+def repolish(widget: QtWidgets.QWidget):
+    '''
+    Resolves the stylesheet of the widget again
+
+    Parameters
+    ----------
+    widget : QWidget
+    '''
+    widget.style().unpolish(widget)
+    widget.style().polish(widget)
+
+
+def benchmark(tab_bar, number: int, polish: bool) -> float:
+    '''
+    Measures the average time of a tab switch in microseconds
+
+    Parameters
+    ----------
+    tab_bar : DockAreaTabBar
+    number : int
+        Number of switches
+    polish : bool
+        Polish the outgoing and incoming tab and their labels after each
+        switch
+
+    Returns
+    -------
+    value : float
+    '''
+    count = tab_bar.count()
+    index = iter(range(number))
+
+    def switch():
+        previous = tab_bar.current_tab()
+        tab_bar.set_current_index((next(index) * 7 + 1) % count)
+        if polish:
+            for tab in (previous, tab_bar.current_tab()):
+                repolish(tab)
+                repolish(tab.d.title_label)
+
+    return timeit.timeit(switch, number=number) / number * 1e6
+
+
+def run(number: int = 500, tabs: int = 150) -> list:
+    '''
+    Benchmarks tab switching with and without polishing the tabs
+
+    Parameters
+    ----------
+    number : int, optional
+        Number of switches
+    tabs : int, optional
+        Number of tabs of the dock area
+
+    Returns
+    -------
+    value : list of Result
+    '''
+    window = QtWidgets.QMainWindow()
+    try:
+        tab_bar = create_tab_bar(window, tabs)
+        return [Result(mode, tabs, benchmark(tab_bar, number, polish))
+                for mode, polish in (('repolish', True),
+                                     ('style state', False))]
+    finally:
+        window.deleteLater()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--number', type=int, default=500,
+                        help='Number of tab switches')
+    parser.add_argument('-t', '--tabs', type=int, default=150,
+                        help='Number of tabs')
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])  # noqa
+    print(f'{"mode":<12} {"tabs":>6} {"switch us":>10}')
+    for result in run(args.number, args.tabs):
+        print(f'{result.mode:<12} {result.tabs:>6} {result.switch_us:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
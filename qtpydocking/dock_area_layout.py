@@ -1,16 +1,16 @@
 import logging
-from typing import List
-
 from qtpy.QtCore import QRect
 from qtpy.QtWidgets import QBoxLayout, QWidget
 
+from .position_index import PositionIndex
+
 
 logger = logging.getLogger(__name__)
 
 
 class DockAreaLayout:
     _parent_layout: QBoxLayout
-    _widgets: List[QWidget]
+    _widgets: PositionIndex
     _current_widget: QWidget
     _current_index: int
 
@@ -23,7 +23,7 @@ class DockAreaLayout:
         parent_layout : QBoxLayout
         '''
         self._parent_layout = parent_layout
-        self._widgets = []
+        self._widgets = PositionIndex()
         self._current_index = -1
         self._current_widget = None
 
@@ -49,10 +49,7 @@ class DockAreaLayout:
         '''
         logger.debug('%s setParent None', widget)
         widget.setParent(None)
-        if index < 0:
-            index = len(self._widgets)
-
-        self._widgets.insert(index, widget)
+        index = self._widgets.insert(index, widget)
         if self._current_index < 0:
             self.set_current_index(index)
         elif index <= self._current_index:
@@ -77,6 +74,24 @@ class DockAreaLayout:
             self._current_index = -1
 
         self._widgets.remove(widget)
+        if self._current_widget is not None:
+            self._current_index = self._widgets.index_of(
+                self._current_widget)
+
+    def move_widget(self, from_index: int, to_index: int):
+        '''
+        Moves the widget at from_index to to_index. Unlike removing and
+        re-inserting the widget, this keeps the current widget.
+
+        Parameters
+        ----------
+        from_index : int
+        to_index : int
+        '''
+        self._widgets.move(from_index, to_index)
+        if self._current_widget is not None:
+            self._current_index = self._widgets.index_of(
+                self._current_widget)
 
     def current_widget(self) -> QWidget:
         '''
@@ -144,7 +159,8 @@ class DockAreaLayout:
 
     def index_of(self, widget: QWidget) -> int:
         '''
-        Returns the index of the given widget
+        Returns the index of the given widget, or -1 if it is not in the
+        layout
 
         Parameters
         ----------
@@ -154,7 +170,19 @@ class DockAreaLayout:
         -------
         value : int
         '''
-        return self._widgets.index(widget)
+        return self._widgets.index_of(widget)
+
+    def check_consistency(self):
+        '''
+        Checks that the widget index is consistent, see
+        PositionIndex.check_consistency(). Meant for tests.
+        '''
+        self._widgets.check_consistency()
+        if (self._current_widget is not None and
+                self._widgets[self._current_index] is not self._current_widget):
+            raise RuntimeError(
+                f'Current index {self._current_index} does not match '
+                f'{self._current_widget!r}')
 
     def widget(self, index: int) -> QWidget:
         '''
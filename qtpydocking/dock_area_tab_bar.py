@@ -1,14 +1,16 @@
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, List, Optional, Union
 import logging
 
-from qtpy.QtCore import QEvent, QObject, QPoint, Qt, Signal
-from qtpy.QtGui import QMouseEvent, QWheelEvent
+from qtpy.QtCore import QEvent, QObject, QPoint, QSize, QTimer, Qt, Signal
+from qtpy.QtGui import QMouseEvent, QResizeEvent, QWheelEvent
 from qtpy.QtWidgets import QBoxLayout, QFrame, QScrollArea, QSizePolicy, QWidget
 
 from .util import start_drag_distance, event_filter_decorator
-from .enums import DragState, DockWidgetArea
-from .dock_widget_tab import DockWidgetTab
+from .enums import DockFlags, DragState, DockWidgetArea
+from .dock_widget_tab import DockWidgetTab, TabContent, create_tab_content
+from .position_index import PositionIndex
 from .floating_dock_container import FloatingDockContainer
+from .floating_drag_preview import FloatingDragPreview
 
 
 if TYPE_CHECKING:
@@ -17,15 +19,27 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# Virtual tabs within this distance in pixels of the visible part of the tab
+# bar keep their content
+VIRTUAL_TAB_MARGIN = 200
+# The maximum number of released tab contents kept for reuse per tab bar
+VIRTUAL_TAB_POOL_SIZE = 16
+
 
 class DockAreaTabBarPrivate:
     public: 'DockAreaWidget'
     drag_start_mouse_pos: QPoint
     dock_area: 'DockAreaWidget'
-    floating_widget: Optional['FloatingDockContainer']
+    floating_widget: Optional[Union[FloatingDockContainer,
+                                    FloatingDragPreview]]
     tabs_container_widget: QWidget
     tabs_layout: QBoxLayout
+    tab_index: PositionIndex
     current_index: int
+    active_tab: Optional['DockWidgetTab']
+    content_pool: List[TabContent]
+    virtual_tabs_timer: Optional[QTimer]
+    close_button_size: Optional[QSize]
 
     def __init__(self, public: 'DockAreaTabBar'):
         '''
@@ -41,25 +55,136 @@ class DockAreaTabBarPrivate:
         self.floating_widget = None
         self.tabs_container_widget = None
         self.tabs_layout = None
+        self.tab_index = PositionIndex()
         self.current_index = -1
+        self.active_tab = None
+        self.content_pool = []
+        self.virtual_tabs_timer = None
+        self.close_button_size = None
 
-    def update_tabs(self):
+    def is_virtual(self) -> bool:
+        '''
+        Returns true if the virtual_tabs configuration flag is set
+
+        Returns
+        -------
+        value : bool
+        '''
+        dock_manager = self.dock_area.dock_manager()
+        return (dock_manager is not None and
+                DockFlags.virtual_tabs in dock_manager.config_flags())
+
+    def create_content(self) -> TabContent:
+        '''
+        Creates the title label and the close button for a virtual tab. The
+        size hint of the first close button is kept for the tabs that have
+        no content yet.
+
+        Returns
+        -------
+        value : TabContent
+        '''
+        content = create_tab_content(self.public.style())
+        if self.close_button_size is None:
+            content.close_button.setParent(self.tabs_container_widget)
+            content.close_button.hide()
+            content.close_button.ensurePolished()
+            self.close_button_size = content.close_button.sizeHint()
+        return content
+
+    def virtual_close_button_size(self) -> QSize:
+        '''
+        Returns the size hint of the close button of the virtual tabs. The
+        content created to measure it is kept in the pool.
+
+        Returns
+        -------
+        value : QSize
         '''
-        Update tabs after current index changed or when tabs are removed. The
-        function reassigns the stylesheet to update the tabs
+        if self.close_button_size is None:
+            content = self.create_content()
+            content.title_label.setParent(self.tabs_container_widget)
+            content.title_label.hide()
+            self.content_pool.append(content)
+        return self.close_button_size
+
+    def request_virtual_tabs_update(self, *args):
+        '''
+        Updates the content of the virtual tabs once the pending layout
+        changes are processed. Multiple requests are coalesced.
+
+        Parameters
+        ----------
+        *args
+            Ignored, so that signals with arguments can be connected
+        '''
+        if not self.is_virtual():
+            return
+
+        if self.virtual_tabs_timer is None:
+            self.virtual_tabs_timer = QTimer(self.public)
+            self.virtual_tabs_timer.setSingleShot(True)
+            self.virtual_tabs_timer.timeout.connect(self.update_virtual_tabs)
+
+        if not self.virtual_tabs_timer.isActive():
+            self.virtual_tabs_timer.start(0)
+
+    def update_virtual_tabs(self):
         '''
-        # Set active TAB and update all other tabs to be inactive
+        Releases the content of the tabs outside of the visible part of the
+        tab bar and the margin, and gives content to the tabs inside. The
+        current tab always keeps its content.
+        '''
+        if not self.is_virtual():
+            return
+
+        left = self.public.horizontalScrollBar().value() - VIRTUAL_TAB_MARGIN
+        right = left + self.public.viewport().width() + 2*VIRTUAL_TAB_MARGIN
+        current_tab = self.public.current_tab()
+        attach = []
         for i in range(self.public.count()):
-            tab_widget = self.public.tab(i)
-            if not tab_widget:
+            tab = self.public.tab(i)
+            geometry = tab.geometry()
+            near = tab is current_tab or (
+                not tab.isHidden() and geometry.right() >= left and
+                geometry.left() <= right)
+            if near:
+                if not tab.has_content():
+                    attach.append(tab)
                 continue
 
-            if i == self.current_index:
-                tab_widget.show()
-                tab_widget.set_active_tab(True)
-                self.public.ensureWidgetVisible(tab_widget)
+            content = tab.release_content()
+            if content is None:
+                continue
+            if len(self.content_pool) < VIRTUAL_TAB_POOL_SIZE:
+                # Pooled widgets must not be deleted with the released tab
+                for widget in content:
+                    widget.setParent(self.tabs_container_widget)
+                self.content_pool.append(content)
             else:
-                tab_widget.set_active_tab(False)
+                for widget in content:
+                    widget.deleteLater()
+
+        for tab in attach:
+            tab.attach_content(self.content_pool.pop()
+                               if self.content_pool else self.create_content())
+
+    def update_tabs(self):
+        '''
+        Update tabs after current index changed or when tabs are removed. Only
+        the previously active tab and the new current tab are updated.
+        '''
+        current_tab = self.public.current_tab()
+        if self.active_tab is not None and self.active_tab is not current_tab:
+            self.active_tab.set_active_tab(False)
+
+        self.active_tab = current_tab
+        if current_tab is not None:
+            current_tab.show()
+            current_tab.set_active_tab(True)
+            self.public.ensureWidgetVisible(current_tab)
+            if not current_tab.has_content():
+                self.request_virtual_tabs_update()
 
     def connect_tab_signals(self, tab):
         tab.clicked.connect(self.public.on_tab_clicked)
@@ -138,13 +263,15 @@ class DockAreaTabBar(QScrollArea):
         self.d.tabs_layout.setSpacing(0)
         self.d.tabs_layout.addStretch(1)
         self.d.tabs_container_widget.setLayout(self.d.tabs_layout)
+        self.horizontalScrollBar().valueChanged.connect(
+            self.d.request_virtual_tabs_update)
 
     def on_tab_clicked(self):
         tab = self.sender()
         if not tab or not isinstance(tab, DockWidgetTab):
             return
 
-        index = self.d.tabs_layout.indexOf(tab)
+        index = self.index_of(tab)
         if index < 0:
             return
 
@@ -152,8 +279,7 @@ class DockAreaTabBar(QScrollArea):
         self.tab_bar_clicked.emit(index)
 
     def on_tab_close_requested(self):
-        tab = self.sender()
-        index = self.d.tabs_layout.indexOf(tab)
+        index = self.index_of(self.sender())
         self.close_tab(index)
 
     def on_close_other_tabs_requested(self):
@@ -176,7 +302,7 @@ class DockAreaTabBar(QScrollArea):
         if not moving_tab or not isinstance(moving_tab, DockWidgetTab):
             return
 
-        from_index = self.d.tabs_layout.indexOf(moving_tab)
+        from_index = self.index_of(moving_tab)
         mouse_pos = self.mapFromGlobal(global_pos)
         to_index = -1
 
@@ -187,7 +313,7 @@ class DockAreaTabBar(QScrollArea):
                     not drop_tab.geometry().contains(mouse_pos)):
                 continue
 
-            to_index = self.d.tabs_layout.indexOf(drop_tab)
+            to_index = self.index_of(drop_tab)
             if to_index == from_index:
                 to_index = -1
                 continue
@@ -206,6 +332,7 @@ class DockAreaTabBar(QScrollArea):
 
         self.d.tabs_layout.removeWidget(moving_tab)
         self.d.tabs_layout.insertWidget(to_index, moving_tab)
+        self.d.tab_index.move(from_index, to_index)
         if to_index >= 0:
             logger.debug('tabMoved from %s to %s', from_index, to_index)
             self.tab_moved.emit(from_index, to_index)
@@ -226,6 +353,17 @@ class DockAreaTabBar(QScrollArea):
                  else -20)
         horizontal_bar.setValue(self.horizontalScrollBar().value() + delta)
 
+    def resizeEvent(self, event: QResizeEvent):
+        '''
+        Resizeevent
+
+        Parameters
+        ----------
+        event : QResizeEvent
+        '''
+        super().resizeEvent(event)
+        self.d.request_virtual_tabs_update()
+
     def mousePressEvent(self, ev: QMouseEvent):
         '''
         Stores mouse position to detect dragging
@@ -318,6 +456,14 @@ class DockAreaTabBar(QScrollArea):
         ----------
         offset : QPoint
         '''
+        dock_manager = self.d.dock_area.dock_manager()
+        if DockFlags.drag_preview in dock_manager.config_flags():
+            # The dock area is only moved when the preview is dropped
+            preview = FloatingDragPreview(dock_area=self.d.dock_area)
+            preview.start_dragging(offset, self.d.dock_area.size(), self)
+            self.d.floating_widget = preview
+            return
+
         self.d.floating_widget = self.make_area_floating(
             offset, DragState.floating_widget)
 
@@ -356,7 +502,18 @@ class DockAreaTabBar(QScrollArea):
         index : int
         tab : DockWidgetTab
         '''
+        if index < 0 or index > self.count():
+            index = self.count()
+
         self.d.tabs_layout.insertWidget(index, tab)
+        self.d.tab_index.insert(index, tab)
+        if self.d.is_virtual():
+            # The content is attached once the tab is near the visible part
+            # of the tab bar
+            tab.set_virtual(True, self.d.virtual_close_button_size())
+            self.d.request_virtual_tabs_update()
+        else:
+            tab.attach_content()
 
         self.d.connect_tab_signals(tab)
         tab.installEventFilter(self)
@@ -377,7 +534,7 @@ class DockAreaTabBar(QScrollArea):
 
         logger.debug('DockAreaTabBar.removeTab')
         new_current_index = self.current_index()
-        remove_index = self.d.tabs_layout.indexOf(tab)
+        remove_index = self.index_of(tab)
         if self.count() == 1:
             new_current_index = -1
 
@@ -402,9 +559,14 @@ class DockAreaTabBar(QScrollArea):
 
         self.removing_tab.emit(remove_index)
         self.d.tabs_layout.removeWidget(tab)
+        self.d.tab_index.remove(tab)
         self.d.disconnect_tab_signals(tab)
 
         tab.removeEventFilter(self)
+        # The tab may be inserted into a tab bar that is not virtual
+        tab.set_virtual(False)
+        tab.attach_content()
+        self.d.request_virtual_tabs_update()
         logger.debug('NewCurrentIndex %s', new_current_index)
 
         if new_current_index != self.d.current_index:
@@ -412,6 +574,28 @@ class DockAreaTabBar(QScrollArea):
         else:
             self.d.update_tabs()
 
+    def move_tab(self, from_index: int, to_index: int):
+        '''
+        Moves the tab at from_index to to_index and keeps the current tab. In
+        contrast to dragging a tab, this does not emit tab_moved.
+
+        Parameters
+        ----------
+        from_index : int
+        to_index : int
+        '''
+        tab = self.tab(from_index)
+        if tab is None or to_index < 0 or to_index >= self.count():
+            return
+
+        current_tab = self.current_tab()
+        self.d.tabs_layout.removeWidget(tab)
+        self.d.tabs_layout.insertWidget(to_index, tab)
+        self.d.tab_index.move(from_index, to_index)
+        if current_tab is not None:
+            self.d.current_index = self.index_of(current_tab)
+        self.d.request_virtual_tabs_update()
+
     def count(self) -> int:
         '''
         Returns the number of tabs in this tabbar
@@ -420,8 +604,7 @@ class DockAreaTabBar(QScrollArea):
         -------
         value : int
         '''
-        # The tab bar contains a stretch item as last item
-        return self.d.tabs_layout.count() - 1
+        return len(self.d.tab_index)
 
     def current_index(self) -> int:
         '''
@@ -443,7 +626,7 @@ class DockAreaTabBar(QScrollArea):
         '''
         if self.d.current_index < 0:
             return None
-        return self.d.tabs_layout.itemAt(self.d.current_index).widget()
+        return self.d.tab_index[self.d.current_index]
 
     def tab(self, index: int) -> Optional['DockWidgetTab']:
         '''
@@ -460,7 +643,38 @@ class DockAreaTabBar(QScrollArea):
         if index >= self.count() or index < 0:
             return None
 
-        return self.d.tabs_layout.itemAt(index).widget()
+        return self.d.tab_index[index]
+
+    def index_of(self, tab: 'DockWidgetTab') -> int:
+        '''
+        Returns the index of the given tab, or -1 if it is not in this tab bar
+
+        Parameters
+        ----------
+        tab : DockWidgetTab
+
+        Returns
+        -------
+        value : int
+        '''
+        return self.d.tab_index.index_of(tab)
+
+    def check_consistency(self):
+        '''
+        Checks that the tab index matches the tabs of the layout and that the
+        current index is valid. Meant for tests.
+
+        Raises
+        ------
+        RuntimeError
+            If the tab bar is inconsistent
+        '''
+        layout = self.d.tabs_layout
+        # The tab bar contains a stretch item as last item
+        self.d.tab_index.check_consistency(
+            layout.itemAt(i).widget() for i in range(layout.count() - 1))
+        if not -1 <= self.d.current_index < self.count():
+            raise RuntimeError(f'Invalid current index {self.d.current_index}')
 
     @event_filter_decorator
     def eventFilter(self, tab: QObject, event: QEvent) -> bool:
@@ -479,9 +693,11 @@ class DockAreaTabBar(QScrollArea):
         result = super().eventFilter(tab, event)
         if isinstance(tab, DockWidgetTab):
             if event.type() == QEvent.Hide:
-                self.tab_closed.emit(self.d.tabs_layout.indexOf(tab))
+                self.tab_closed.emit(self.index_of(tab))
+                self.d.request_virtual_tabs_update()
             elif event.type() == QEvent.Show:
-                self.tab_opened.emit(self.d.tabs_layout.indexOf(tab))
+                self.tab_opened.emit(self.index_of(tab))
+                self.d.request_virtual_tabs_update()
 
         return result
 
@@ -8,11 +8,12 @@ from qtpy.QtWidgets import (QAbstractButton, QAction, QBoxLayout, QFrame,
 
 
 from .enums import DockFlags, DragState, DockWidgetFeature, TitleBarButton
+from .tabs_menu import TabsMenu
 from .util import set_button_icon
 
 
 if TYPE_CHECKING:
-    from . import DockAreaWidget, DockAreaTabBar, DockManager
+    from . import DockAreaWidget, DockAreaTabBar, DockManager, DockWidgetTab
 
 
 logger = logging.getLogger(__name__)
@@ -27,7 +28,7 @@ class DockAreaTitleBarPrivate:
     dock_area: 'DockAreaWidget'
     tab_bar: 'DockAreaTabBar'
     menu_outdated: bool
-    tabs_menu: QMenu
+    tabs_menu: TabsMenu
 
     def __init__(self, public: 'DockAreaTitleBar'):
         self.public = public
@@ -37,7 +38,7 @@ class DockAreaTitleBarPrivate:
         self.top_layout = None
         self.dock_area = None
         self.tab_bar = None
-        self.menu_outdated = True
+        self.menu_outdated = False
         self.tabs_menu = None
 
     def create_buttons(self):
@@ -52,8 +53,7 @@ class DockAreaTitleBarPrivate:
         style = self.public.style()
         set_button_icon(style, self.tabs_menu_button, QStyle.SP_TitleBarUnshadeButton)
 
-        self.tabs_menu = QMenu(self.tabs_menu_button)
-        self.tabs_menu.setToolTipsVisible(True)
+        self.tabs_menu = TabsMenu(self.tabs_menu_button)
         self.tabs_menu.aboutToShow.connect(
             self.public.on_tabs_menu_about_to_show)
         self.tabs_menu_button.setMenu(self.tabs_menu)
@@ -107,11 +107,11 @@ class DockAreaTitleBarPrivate:
         self.tab_bar = DockAreaTabBar(self.dock_area)
         self.top_layout.addWidget(self.tab_bar)
 
-        self.tab_bar.tab_closed.connect(self.public.mark_tabs_menu_outdated)
-        self.tab_bar.tab_opened.connect(self.public.mark_tabs_menu_outdated)
-        self.tab_bar.tab_inserted.connect(self.public.mark_tabs_menu_outdated)
-        self.tab_bar.removing_tab.connect(self.public.mark_tabs_menu_outdated)
-        self.tab_bar.tab_moved.connect(self.public.mark_tabs_menu_outdated)
+        self.tab_bar.tab_closed.connect(self.public.on_tab_opened_or_closed)
+        self.tab_bar.tab_opened.connect(self.public.on_tab_opened_or_closed)
+        self.tab_bar.tab_inserted.connect(self.public.on_tab_inserted)
+        self.tab_bar.removing_tab.connect(self.public.on_removing_tab)
+        self.tab_bar.tab_moved.connect(self.public.on_tab_moved)
         self.tab_bar.current_changed.connect(self.public.on_current_tab_changed)
         self.tab_bar.tab_bar_clicked.connect(self.public.tab_bar_clicked)
 
@@ -174,24 +174,75 @@ class DockAreaTitleBar(QFrame):
         return f'<{self.__class__.__name__}>'
 
     def on_tabs_menu_about_to_show(self):
+        '''
+        Rebuilds the tabs menu if it has been marked outdated. Otherwise it
+        is already up to date.
+        '''
         if not self.d.menu_outdated:
             return
 
-        menu = self.d.tabs_menu_button.menu()
-        if menu is not None:
-            menu.clear()
+        tab_bar = self.d.tab_bar
+        self.d.tabs_menu.set_tabs(tab_bar.tab(i)
+                                  for i in range(tab_bar.count()))
+        self.d.menu_outdated = False
 
-        for i in range(self.d.tab_bar.count()):
-            if not self.d.tab_bar.is_tab_open(i):
-                continue
+    def on_tab_inserted(self, index: int):
+        '''
+        Adds the inserted tab to the tabs menu
+
+        Parameters
+        ----------
+        index : int
+        '''
+        if not self.d.menu_outdated:
+            self.d.tabs_menu.insert_tab(index, self.d.tab_bar.tab(index))
 
-            tab = self.d.tab_bar.tab(i)
-            # TODO icon None?
-            action = menu.addAction(tab.text())  # QAction(tab.icon(), tab.text()))
-            action.setToolTip(tab.toolTip())
-            action.setData(i)
+    def on_removing_tab(self, index: int):
+        '''
+        Removes the tab from the tabs menu
 
-        self.d.menu_outdated = False
+        Parameters
+        ----------
+        index : int
+        '''
+        if not self.d.menu_outdated:
+            self.d.tabs_menu.remove_tab(index)
+
+    def on_tab_moved(self, from_index: int, to_index: int):
+        '''
+        Moves the tab in the tabs menu
+
+        Parameters
+        ----------
+        from_index : int
+        to_index : int
+        '''
+        if not self.d.menu_outdated:
+            self.d.tabs_menu.move_tab(from_index, to_index)
+
+    def on_tab_opened_or_closed(self, index: int):
+        '''
+        Shows or hides the tab in the tabs menu
+
+        Parameters
+        ----------
+        index : int
+        '''
+        tab = self.d.tab_bar.tab(index)
+        if tab is not None:
+            self.update_tabs_menu_entry(tab)
+
+    def update_tabs_menu_entry(self, tab: 'DockWidgetTab'):
+        '''
+        Updates the tabs menu entry after the title, the tooltip or the open
+        state of the tab changed
+
+        Parameters
+        ----------
+        tab : DockWidgetTab
+        '''
+        if not self.d.menu_outdated:
+            self.d.tabs_menu.update_tab(tab)
 
     def on_close_button_clicked(self):
         logger.debug('DockAreaTitleBar.onCloseButtonClicked')
@@ -213,7 +264,10 @@ class DockAreaTitleBar(QFrame):
         ----------
         action : QAction
         '''
-        index = action.data()
+        index = self.d.tab_bar.index_of(action.data())
+        if index < 0:
+            return
+
         self.d.tab_bar.set_current_index(index)
         self.tab_bar_clicked.emit(index)
 
@@ -251,8 +305,22 @@ class DockAreaTitleBar(QFrame):
         menu.exec_(self.mapToGlobal(pos))
 
     def mark_tabs_menu_outdated(self):
+        '''
+        Rebuilds the tabs menu the next time it is shown, for changes that
+        are not applied incrementally
+        '''
         self.d.menu_outdated = True
 
+    def tabs_menu(self) -> TabsMenu:
+        '''
+        Returns the menu of the tabs menu button
+
+        Returns
+        -------
+        value : TabsMenu
+        '''
+        return self.d.tabs_menu
+
     def tab_bar(self) -> 'DockAreaTabBar':
         '''
         Returns the pointer to the tabBar
@@ -283,14 +351,3 @@ class DockAreaTitleBar(QFrame):
             return self.d.close_button
 
         return None
-
-    def setVisible(self, visible: bool):
-        '''
-        This function is here for debug reasons
-
-        Parameters
-        ----------
-        visible : bool
-        '''
-        super().setVisible(visible)
-        self.mark_tabs_menu_outdated()
@@ -8,6 +8,7 @@ from .util import (find_parent, DEBUG_LEVEL, hide_empty_parent_splitters,
                    emit_top_level_event_for_widget)
 from .enums import TitleBarButton, DockWidgetFeature
 from .dock_area_layout import DockAreaLayout
+from .layout_snapshot import DockAreaSnapshot
 
 if TYPE_CHECKING:
     from . import (DockContainerWidget, DockManager, DockWidget, DockWidgetTab,
@@ -151,6 +152,10 @@ class DockAreaWidget(QFrame):
     # toggle view function
     view_toggled = Signal(bool)
 
+    # This signal is emitted if this dock area is shown or hidden, no matter
+    # if this was caused by toggle_view(), by hide() or by reparenting
+    visibility_changed = Signal(bool)
+
     def __init__(self, dock_manager: 'DockManager',
                  parent: 'DockContainerWidget'):
         '''
@@ -210,6 +215,25 @@ class DockAreaWidget(QFrame):
         self.d.contents_layout.insert_widget(to_index, widget)
         self.set_current_index(to_index)
 
+    def move_dock_widget(self, dock_widget: 'DockWidget', index: int):
+        '''
+        Moves the given dock widget and its tab to the given index without
+        changing the current dock widget
+
+        Parameters
+        ----------
+        dock_widget : DockWidget
+        index : int
+        '''
+        from_index = self.index(dock_widget)
+        if from_index == index or index < 0 or index >= self.dock_widgets_count():
+            return
+
+        self.d.tab_bar().move_tab(from_index, index)
+        self.d.contents_layout.move_widget(from_index, index)
+        if self.d.title_bar:
+            self.d.title_bar.on_tab_moved(from_index, index)
+
     def insert_dock_widget(self, index: int, dock_widget: 'DockWidget',
                            activate: bool = True):
         '''
@@ -238,6 +262,9 @@ class DockAreaWidget(QFrame):
         tab_bar.blockSignals(False)
 
         tab_widget.setVisible(not dock_widget.is_closed())
+        # The signals were blocked for the current index change, the tabs
+        # menu still needs to know about the new tab
+        tab_bar.tab_inserted.emit(tab_bar.index_of(tab_widget))
         dock_widget.setProperty('index', index)
         if activate:
             self.set_current_index(index)
@@ -269,6 +296,7 @@ class DockAreaWidget(QFrame):
         tab_widget = dock_widget.tab_widget()
         tab_widget.hide()
         self.d.tab_bar().remove_tab(tab_widget)
+        dock_widget.set_dock_area(None)
         dock_container = self.dock_container()
         if next_open_dock_widget is not None:
             self.set_current_dock_widget(next_open_dock_widget)
@@ -299,12 +327,12 @@ class DockAreaWidget(QFrame):
         Parameters
         ----------
         dock_widget : DockWidget
-            Unused
         open : bool
             Unused
         '''
         #pylint: disable=unused-argument
         self.update_title_bar_visibility()
+        self.update_title_bar_menu_entry(dock_widget)
 
     def next_open_dock_widget(self, dock_widget: 'DockWidget'
                               ) -> Optional['DockWidget']:
@@ -347,6 +375,27 @@ class DockAreaWidget(QFrame):
         '''
         return self.d.contents_layout.index_of(dock_widget)
 
+    def check_consistency(self):
+        '''
+        Checks that the index maps of the contents layout and the tab bar are
+        consistent and that the tabs are in the order of the dock widgets.
+        Meant for tests.
+
+        Raises
+        ------
+        RuntimeError
+            If the dock area is inconsistent
+        '''
+        self.d.contents_layout.check_consistency()
+        tab_bar = self.d.tab_bar()
+        tab_bar.check_consistency()
+        tabs = [tab_bar.tab(i) for i in range(tab_bar.count())]
+        expected = [self.dock_widget(i).tab_widget()
+                    for i in range(self.dock_widgets_count())]
+        if tabs != expected:
+            raise RuntimeError('The tabs are not in the order of the dock '
+                               'widgets')
+
     def hide_area_with_no_visible_content(self):
         '''
         Call this function, if you already know, that the dock does not contain
@@ -409,6 +458,18 @@ class DockAreaWidget(QFrame):
         if self.d.title_bar:
             self.d.title_bar.mark_tabs_menu_outdated()
 
+    def update_title_bar_menu_entry(self, dock_widget: 'DockWidget'):
+        '''
+        Updates the tabs menu entry of the dock widget after its title or
+        tooltip changed
+
+        Parameters
+        ----------
+        dock_widget : DockWidget
+        '''
+        if self.d.title_bar:
+            self.d.title_bar.update_tabs_menu_entry(dock_widget.tab_widget())
+
     def toggle_view(self, open_: bool):
         '''
         Toggle view
@@ -602,6 +663,20 @@ class DockAreaWidget(QFrame):
 
         stream.writeEndElement()
 
+    def snapshot(self) -> DockAreaSnapshot:
+        '''
+        Returns the current state as a layout snapshot node
+
+        Returns
+        -------
+        value : DockAreaSnapshot
+        '''
+        current_dock_widget = self.current_dock_widget()
+        name = current_dock_widget.objectName() if current_dock_widget else ''
+        return DockAreaSnapshot(
+            name, tuple(self.dock_widget(i).snapshot()
+                        for i in range(self.d.contents_layout.count())))
+
     @property
     def closable(self):
         '''
@@ -655,10 +730,14 @@ class DockAreaWidget(QFrame):
         ----------
         visible : bool
         '''
+        was_hidden = self.isHidden()
         super().setVisible(visible)
         if self.d.update_title_bar_buttons:
             self.d.update_title_bar_button_states()
 
+        if self.isHidden() != was_hidden:
+            self.visibility_changed.emit(not self.isHidden())
+
     def set_current_index(self, index: int):
         '''
         This activates the tab for the given tab index. If the dock widget for
@@ -1,16 +1,19 @@
 import logging
-from typing import TYPE_CHECKING, List, Dict, Tuple, Optional
+from typing import TYPE_CHECKING, Generator, List, Dict, Optional
 
-from qtpy.QtCore import (QByteArray, QEvent, QPoint, QXmlStreamReader,
-                         QXmlStreamWriter, Qt, Signal)
+from qtpy.QtCore import (QByteArray, QEvent, QPoint, QXmlStreamWriter, Qt,
+                         Signal)
 from qtpy.QtWidgets import QFrame, QGridLayout, QSplitter, QWidget
 
-from .util import (find_parent, hide_empty_parent_splitters,
-                   emit_top_level_event_for_widget, find_child, find_children)
+from .util import (DEBUG_LEVEL, find_parent, hide_empty_parent_splitters,
+                   emit_top_level_event_for_widget, find_child, find_children,
+                   run_to_completion)
 from .enums import (DockWidgetArea, DockWidgetFeature, TitleBarButton,
                     DockFlags, DockInsertParam)
 from .dock_splitter import DockSplitter
 from .dock_area_widget import DockAreaWidget
+from .layout_snapshot import (ContainerSnapshot, DockAreaSnapshot,
+                              SplitterSnapshot)
 
 
 if TYPE_CHECKING:
@@ -19,8 +22,6 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
-# TODO global?
-_z_order_counter = 0
 
 def dock_area_insert_parameters(area: DockWidgetArea) -> DockInsertParam:
     '''
@@ -82,7 +83,6 @@ def replace_splitter_widget(splitter: QSplitter, from_: QWidget, to: QWidget):
 class DockContainerWidgetPrivate:
     public: 'DockContainerWidget'
     dock_manager: 'DockManager'
-    z_order_index: int
     dock_areas: List[DockAreaWidget]
     layout: QGridLayout
     root_splitter: DockSplitter
@@ -101,13 +101,12 @@ class DockContainerWidgetPrivate:
         '''
         self.public = public
         self.dock_manager = None
-        self.z_order_index = 0
         self.dock_areas = []
         self.layout = None
         self.root_splitter = None
         self.is_floating = False
         self.last_added_area_cache = {}
-        self._visible_dock_area_count = -1
+        self._visible_dock_area_count = 0
         self.top_level_dock_area = None
 
     def dock_widget_into_container(self, area: DockWidgetArea,
@@ -438,6 +437,35 @@ class DockContainerWidgetPrivate:
         self.dock_areas.extend(new_dock_areas)
         for dock_area in new_dock_areas:
             dock_area.view_toggled.connect(self.on_dock_area_view_toggled)
+            dock_area.visibility_changed.connect(
+                self.on_dock_area_visibility_changed)
+            dock_area.current_changed.connect(
+                self.dock_manager.notify_layout_changed)
+            if not dock_area.isHidden():
+                self._visible_dock_area_count += 1
+
+    def remove_dock_area_from_list(self, dock_area: DockAreaWidget):
+        '''
+        Removes the dock area from the internal dock area list and
+        disconnects its signals
+
+        Parameters
+        ----------
+        dock_area : DockAreaWidget
+        '''
+        dock_area.view_toggled.disconnect(self.on_dock_area_view_toggled)
+        dock_area.visibility_changed.disconnect(
+            self.on_dock_area_visibility_changed)
+        self.dock_areas.remove(dock_area)
+        if not dock_area.isHidden():
+            self._visible_dock_area_count -= 1
+
+    def clear_dock_areas(self):
+        '''
+        Removes all dock areas from the internal dock area list
+        '''
+        for dock_area in list(self.dock_areas):
+            self.remove_dock_area_from_list(dock_area)
 
     def save_child_nodes_state(self, stream: QXmlStreamWriter, widget: QWidget):
         '''
@@ -470,167 +498,130 @@ class DockContainerWidgetPrivate:
         elif isinstance(widget, DockAreaWidget):
             widget.save_state(stream)
 
-    def restore_child_nodes(self, stream: QXmlStreamReader,
-                            testing: bool) -> Tuple[bool, Optional[QWidget]]:
+    def snapshot_child_nodes(self, widget: QWidget):
+        '''
+        Returns the snapshot of the given splitter or dock area
+
+        Parameters
+        ----------
+        widget : QWidget
+
+        Returns
+        -------
+        node : SplitterSnapshot or DockAreaSnapshot
+        '''
+        if isinstance(widget, QSplitter):
+            return SplitterSnapshot(
+                widget.orientation(),
+                tuple(self.snapshot_child_nodes(widget.widget(i))
+                      for i in range(widget.count())),
+                tuple(widget.sizes()))
+        if isinstance(widget, DockAreaWidget):
+            return widget.snapshot()
+        return None
+
+    def restore_child_nodes(self, node) -> Generator[None, None,
+                                                     Optional[QWidget]]:
         '''
         Restore state of child nodes.
 
+        This is a generator that yields after each restored dock area, so
+        that the restore process can be split into several steps.
+
         Parameters
         ----------
-        stream : QXmlStreamReader
-        created_widget : QWidget
-        testing : bool
+        node : SplitterSnapshot or DockAreaSnapshot
 
         Returns
         -------
-        value : bool
         widget : QWidget
         '''
-        result = True
-        widget = None
-        while stream.readNextStartElement():
-            if stream.name() == "Splitter":
-                result, widget = self.restore_splitter(stream, testing)
-            elif stream.name() == "Area":
-                result, widget = self.restore_dock_area(stream, testing)
-            else:
-                stream.skipCurrentElement()
-            logger.debug('restored child node %s: %s', stream.name(), widget)
+        if isinstance(node, SplitterSnapshot):
+            widget = yield from self.restore_splitter(node)
+        elif isinstance(node, DockAreaSnapshot):
+            widget = self.restore_dock_area(node)
+            yield
+        else:
+            widget = None
 
-        return result, widget
+        logger.debug('restored child node %s: %s', node, widget)
+        return widget
 
-    def restore_splitter(self, stream: QXmlStreamReader, testing: bool
-                         ) -> Tuple[bool, Optional[QWidget]]:
+    def restore_splitter(self, node: SplitterSnapshot
+                         ) -> Generator[None, None, Optional[QWidget]]:
         '''
         Restores a splitter.
 
         Parameters
         ----------
-        stream : QXmlStreamReader
-        created_widget : QWidget
-        testing : bool
+        node : SplitterSnapshot
 
         Returns
         -------
-        value : bool
         widget : QWidget
         '''
-        orientation_str = stream.attributes().value("Orientation")
-        if orientation_str.startswith("-"):
-            orientation = Qt.Horizontal
-        elif orientation_str.startswith("|"):
-            orientation = Qt.Vertical
-        else:
-            return False, None
-
-        widget_count = int(stream.attributes().value("Count"))
-        if not widget_count:
-            return False, None
-
         logger.debug('Restore NodeSplitter Orientation: %s  WidgetCount: %s',
-                     orientation, widget_count)
+                     node.orientation, len(node.sizes))
 
-        splitter = (None if testing
-                    else self.new_splitter(orientation))
+        splitter = self.new_splitter(node.orientation)
         visible = False
-        sizes = []
-
-        while stream.readNextStartElement():
-            child_node = None
-            if stream.name() == "Splitter":
-                result, child_node = self.restore_splitter(stream, testing)
-                if not result:
-                    return False, None
-            elif stream.name() == "Area":
-                result, child_node = self.restore_dock_area(stream, testing)
-                if not result:
-                    return False, None
-            elif stream.name() == "Sizes":
-                s_sizes = stream.readElementText().strip()
-                sizes = [int(sz) for sz in s_sizes.split(' ')]
-                logger.debug('Sizes: %s (from s_sizes: %s)', sizes, s_sizes)
-            else:
-                stream.skipCurrentElement()
-
-            if splitter is not None and child_node is not None:
-                logger.debug('ChildNode isVisible %s isVisibleTo %s',
-                             child_node.isVisible(),
-                             child_node.isVisibleTo(splitter))
-                splitter.addWidget(child_node)
-                visible |= child_node.isVisibleTo(splitter)
+        for child in node.children:
+            child_node = yield from self.restore_child_nodes(child)
+            if child_node is None:
+                continue
 
-        if len(sizes) != widget_count:
-            return False, None
+            logger.debug('ChildNode isVisible %s isVisibleTo %s',
+                         child_node.isVisible(),
+                         child_node.isVisibleTo(splitter))
+            splitter.addWidget(child_node)
+            visible |= child_node.isVisibleTo(splitter)
 
-        if testing:
-            splitter = None
-        else:
-            if not splitter.count():
-                splitter.deleteLater()
-                splitter = None
-            else:
-                splitter.setSizes(sizes)
-                splitter.setVisible(visible)
+        if not splitter.count():
+            splitter.deleteLater()
+            return None
 
-        return True, splitter
+        splitter.setSizes(list(node.sizes))
+        splitter.setVisible(visible)
+        return splitter
 
-    def restore_dock_area(self, stream: QXmlStreamReader, testing: bool) -> Tuple[bool, QWidget]:
+    def restore_dock_area(self, node: DockAreaSnapshot) -> Optional[DockAreaWidget]:
         '''
         Restores a dock area.
 
         Parameters
         ----------
-        stream : QXmlStreamReader
-        created_widget : QWidget
-        testing : bool
+        node : DockAreaSnapshot
 
         Returns
         -------
-        value : bool
-        widget : QWidget
+        widget : DockAreaWidget
         '''
-        tabs = int(stream.attributes().value("Tabs"))
-        current_dock_widget = stream.attributes().value("Current")
         logger.debug('Restore NodeDockArea Tabs: %s current: %s',
-                     tabs, current_dock_widget)
-        dock_area = None
-        if not testing:
-            dock_area = DockAreaWidget(self.dock_manager, self.public)
-
-        while stream.readNextStartElement():
-            if stream.name() != "Widget":
+                     len(node.widgets), node.current)
+        dock_area = DockAreaWidget(self.dock_manager, self.public)
+        for widget_node in node.widgets:
+            dock_widget = self.dock_manager.find_dock_widget(widget_node.name)
+            if dock_widget is None:
                 continue
 
-            object_name = stream.attributes().value("Name")
-            if not object_name:
-                return False, None
-
-            closed = bool(int(stream.attributes().value("Closed")))
-
-            stream.skipCurrentElement()
-            dock_widget = self.dock_manager.find_dock_widget(object_name)
-            if dock_widget and dock_area:
-                logger.debug('Dock Widget found - parent %s', dock_widget.parent())
-                # We hide the DockArea here to prevent the short display (the flashing)
-                # of the dock areas during application startup
-                dock_area.hide()
-                dock_area.add_dock_widget(dock_widget)
-                dock_widget.set_toggle_view_action_checked(not closed)
-                dock_widget.set_closed_state(closed)
-                dock_widget.setProperty("closed", closed)
-                dock_widget.setProperty("dirty", False)
-
-        if testing:
-            return True, None
+            logger.debug('Dock Widget found - parent %s', dock_widget.parent())
+            closed = widget_node.closed
+            # We hide the DockArea here to prevent the short display (the flashing)
+            # of the dock areas during application startup
+            dock_area.hide()
+            dock_area.add_dock_widget(dock_widget)
+            dock_widget.set_toggle_view_action_checked(not closed)
+            dock_widget.set_closed_state(closed)
+            dock_widget.setProperty("closed", closed)
+            dock_widget.setProperty("dirty", False)
 
         if not dock_area.dock_widgets_count():
             dock_area.deleteLater()
-            dock_area = None
-        else:
-            dock_area.setProperty("currentDockWidget", current_dock_widget)
-            self.append_dock_areas(dock_area)
+            return None
 
-        return True, dock_area
+        dock_area.setProperty("currentDockWidget", node.current)
+        self.append_dock_areas(dock_area)
+        return dock_area
 
     def dump_recursive(self, level: int, widget: QWidget):
         '''
@@ -680,15 +671,15 @@ class DockContainerWidgetPrivate:
         -------
         value : int
         '''
-        # Lazy initialisation - we initialize the VisibleDockAreaCount variable
-        # on first use
-        if self._visible_dock_area_count > -1:
-            return self._visible_dock_area_count
+        # The counter is updated whenever a dock area is added, removed, shown
+        # or hidden
+        if DEBUG_LEVEL > 0:
+            count = sum(1 for dock_area in self.dock_areas
+                        if not dock_area.isHidden())
+            assert self._visible_dock_area_count == count, (
+                f'Visible dock area count {self._visible_dock_area_count} '
+                f'!= {count}')
 
-        self._visible_dock_area_count = 0
-        for dock_area in self.dock_areas:
-            if not dock_area.isHidden():
-                self._visible_dock_area_count += 1
         return self._visible_dock_area_count
 
     def on_visible_dock_area_count_changed(self):
@@ -736,6 +727,7 @@ class DockContainerWidgetPrivate:
                          self.dock_manager.config_flags())
         splitter.setOpaqueResize(opaque_resize)
         splitter.setChildrenCollapsible(False)
+        splitter.splitterMoved.connect(self.dock_manager.notify_layout_changed)
         return splitter
 
     def on_dock_area_view_toggled(self, visible: bool):
@@ -752,15 +744,19 @@ class DockContainerWidgetPrivate:
             logger.exception('qtpydocking bug')
             return
 
-        self.visible_dock_area_count()
-        if visible:
-            self._visible_dock_area_count += 1
-        else:
-            self._visible_dock_area_count -= 1
-
         self.on_visible_dock_area_count_changed()
         self.public.dock_area_view_toggled.emit(dock_area, visible)
 
+    def on_dock_area_visibility_changed(self, visible: bool):
+        '''
+        Updates the visible dock area counter
+
+        Parameters
+        ----------
+        visible : bool
+        '''
+        self._visible_dock_area_count += 1 if visible else -1
+
 
 class DockContainerWidget(QFrame):
     # This signal is emitted if one or multiple dock areas has been added to
@@ -812,7 +808,8 @@ class DockContainerWidget(QFrame):
 
     def event(self, e: QEvent) -> bool:
         '''
-        Handles activation events to update zOrderIndex
+        Handles activation events to raise the container in the z-order of
+        the dock manager
 
         Parameters
         ----------
@@ -823,13 +820,8 @@ class DockContainerWidget(QFrame):
         value : bool
         '''
         result = super().event(e)
-        global _z_order_counter  # TODO
-        if e.type() == QEvent.WindowActivate:
-            _z_order_counter += 1
-            self.d.z_order_index = _z_order_counter
-        elif e.type() == QEvent.Show and not self.d.z_order_index:
-            _z_order_counter += 1
-            self.d.z_order_index = _z_order_counter
+        if e.type() == QEvent.WindowActivate and self.d.dock_manager:
+            self.d.dock_manager.raise_dock_container(self)
 
         return result
 
@@ -881,14 +873,17 @@ class DockContainerWidget(QFrame):
 
             if drop_area != DockWidgetArea.invalid:
                 logger.debug('Dock Area Drop Content: %s', drop_area)
-                self.d.drop_into_section(floating_widget, dock_area, drop_area)
+                with self.d.dock_manager.measure('drop_into_section'):
+                    self.d.drop_into_section(floating_widget, dock_area,
+                                             drop_area)
 
         # mouse is over container
         if DockWidgetArea.invalid == drop_area:
             drop_area = container_drop_area
             logger.debug('Container Drop Content: %s', drop_area)
             if drop_area != DockWidgetArea.invalid:
-                self.d.drop_into_container(floating_widget, drop_area)
+                with self.d.dock_manager.measure('drop_into_container'):
+                    self.d.drop_into_container(floating_widget, drop_area)
 
         # If there was a top level widget before the drop, then it is not top
         # level widget anymore
@@ -939,8 +934,7 @@ class DockContainerWidget(QFrame):
                          area, self)
             return
 
-        area.view_toggled.disconnect(self.d.on_dock_area_view_toggled)
-        self.d.dock_areas.remove(area)
+        self.d.remove_dock_area_from_list(area)
         splitter = find_parent(DockSplitter, area)
 
         # Remove are from parent splitter and recursively hide tree of parent
@@ -1017,54 +1011,67 @@ class DockContainerWidget(QFrame):
         self.d.save_child_nodes_state(stream, self.d.root_splitter)
         stream.writeEndElement()
 
-    def restore_state(self, stream: QXmlStreamReader, testing: bool = False) -> bool:
+    def snapshot(self) -> ContainerSnapshot:
         '''
-        Restores the state from given stream.
+        Returns the current state as a layout snapshot node
+
+        Returns
+        -------
+        value : ContainerSnapshot
+        '''
+        geometry = None
+        if self.is_floating():
+            geometry = bytes(self.floating_widget().saveGeometry())
+
+        return ContainerSnapshot(
+            self.is_floating(), geometry,
+            self.d.snapshot_child_nodes(self.d.root_splitter))
+
+    def restore_state(self, state: ContainerSnapshot) -> bool:
+        '''
+        Restores the state from the given, already validated, container
+        snapshot.
 
         Parameters
         ----------
-        stream : QXmlStreamReader
-        testing : bool
-            If Testing is true, the function only parses the data from the
-            given stream but does not restore anything. You can use this check
-            for faulty files before you start restoring the state
+        state : ContainerSnapshot
 
         Returns
         -------
         value : bool
         '''
-        is_floating = bool(int(stream.attributes().value("Floating")))
-        logger.debug('Restore DockContainerWidget Floating %s', is_floating)
-
-        if not testing:
-            self.d._visible_dock_area_count = -1
+        return run_to_completion(self.iter_restore_state(state))
 
-            # invalidate the dock area count and clear the area cache
-            self.d.dock_areas.clear()
-            self.d.last_added_area_cache.clear()
-
-        if is_floating:
-            logger.debug('Restore floating widget')
-            if not stream.readNextStartElement() or stream.name() != "Geometry":
-                return False
+    def iter_restore_state(self, state: ContainerSnapshot
+                           ) -> Generator[None, None, bool]:
+        '''
+        Generator version of restore_state() that yields after each restored
+        dock area. The new layout replaces the current one in the last step.
 
-            geometry_string = stream.readElementText(
-                QXmlStreamReader.ErrorOnUnexpectedElement)
+        Parameters
+        ----------
+        state : ContainerSnapshot
 
-            geometry = QByteArray.fromHex(geometry_string)
-            if geometry.isEmpty():
-                return False
+        Returns
+        -------
+        value : bool
+        '''
+        logger.debug('Restore DockContainerWidget Floating %s', state.floating)
 
-            if not testing:
-                floating_widget = self.floating_widget()
-                floating_widget.restoreGeometry(geometry)
+        # Clear the dock areas, which resets the visible dock area count, and
+        # the area cache
+        self.d.clear_dock_areas()
+        self.d.last_added_area_cache.clear()
 
-        res, new_root_splitter = self.d.restore_child_nodes(stream, testing)
-        if not res:
-            return False
+        if state.floating:
+            logger.debug('Restore floating widget')
+            floating_widget = self.floating_widget()
+            floating_widget.restoreGeometry(QByteArray(state.geometry))
 
-        if testing:
-            return True
+        new_root_splitter = None
+        if state.root is not None:
+            new_root_splitter = yield from self.d.restore_child_nodes(
+                state.root)
 
         # If the root splitter is empty, rostoreChildNodes returns a 0 pointer
         # and we need to create a new empty root splitter
@@ -1207,13 +1214,16 @@ class DockContainerWidget(QFrame):
 
     def z_order_index(self) -> int:
         '''
-        Returns the current zOrderIndex
+        Returns the position of this container in the z-order of its dock
+        manager
 
         Returns
         -------
         value : unsigned int
         '''
-        return self.d.z_order_index
+        if not self.d.dock_manager:
+            return 0
+        return self.d.dock_manager.container_z_order_index(self)
 
     def is_in_front_of(self, other: 'DockContainerWidget') -> bool:
         '''
@@ -1243,6 +1253,11 @@ class DockContainerWidget(QFrame):
         -------
         value : DockAreaWidget
         '''
+        index = self.d.dock_manager.drop_target_index()
+        if index is not None:
+            dock_areas = index.targets_at(global_pos, owner=self)
+            return dock_areas[0] if dock_areas else None
+
         for dock_area in self.d.dock_areas:
             pos = dock_area.mapFromGlobal(global_pos)
             if dock_area.isVisible() and dock_area.rect().contains(pos):
@@ -1276,6 +1291,12 @@ class DockContainerWidget(QFrame):
         -------
         value : list
         '''
+        visible_count = self.d.visible_dock_area_count()
+        if visible_count == len(self.d.dock_areas):
+            return list(self.d.dock_areas)
+        if not visible_count:
+            return []
+
         return [dock_area
                 for dock_area in self.d.dock_areas
                 if not dock_area.isHidden()
@@ -1299,14 +1320,7 @@ class DockContainerWidget(QFrame):
         -------
         value : int
         '''
-        return len([dock_area
-                    for dock_area in self.d.dock_areas
-                    if not dock_area.isHidden()
-                    ])
-
-        # TODO_UPSTREAM Cache or precalculate this to speed it up because it is used during
-        # movement of floating widget
-        # return d.visible_dock_area_count()
+        return self.d.visible_dock_area_count()
 
     def is_floating(self) -> bool:
         '''
@@ -1,9 +1,15 @@
+import functools
 import logging
+import os
 import pathlib
+import time
 
-from typing import TYPE_CHECKING, Dict, List
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (TYPE_CHECKING, Callable, Dict, Generator, Iterator, List,
+                    Optional, Tuple)
 
-from qtpy.QtCore import (QByteArray, QSettings, QXmlStreamReader,
+from qtpy.QtCore import (QByteArray, QEvent, QObject, QSettings, QTimer,
                          QXmlStreamWriter, Signal)
 from qtpy.QtGui import QIcon
 from qtpy.QtWidgets import QAction, QMainWindow, QMenu, QWidget
@@ -12,8 +18,16 @@ from .enums import InsertionOrder, DockFlags, DockWidgetArea, OverlayMode
 
 from .dock_container_widget import DockContainerWidget
 from .dock_overlay import DockOverlay
+from .dock_widget import DockWidget
+from .drag_instrumentation import DragInstrumentation
+from .drop_target_index import DropTargetIndex
 from .floating_dock_container import FloatingDockContainer
-from .util import LINUX
+from .layout_reconciler import LayoutReconciler
+from .layout_snapshot import BINARY_MAGIC, ContainerSnapshot, LayoutSnapshot
+from .perspective_archive import PerspectiveArchive
+from . import state_codec
+from .state_codec import CODEC_MAGIC, StateCodec
+from .util import LINUX, event_filter_decorator, run_to_completion
 
 try:
     from qtpy.QtCore import qCompress, qUncompress
@@ -24,25 +38,73 @@ except ImportError:
 
 if TYPE_CHECKING:
     from .dock_area_widget import DockAreaWidget
-    from .dock_widget import DockWidget
 
 
 logger = logging.getLogger(__name__)
 
 
+class _NullMeasurement:
+    '''
+    Context manager returned by DockManager.measure() if the instrumentation
+    is disabled
+    '''
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_null_measurement = _NullMeasurement()
+
+
+class PerspectiveCacheInfo(namedtuple('PerspectiveCacheInfo', ('hits',
+                                                               'misses',
+                                                               'max_size',
+                                                               'size'))):
+    '''
+    Statistics of the cache of parsed perspectives
+    '''
+
+
 class DockManagerPrivate:
     public: 'DockManager'
     floating_widgets: List[FloatingDockContainer]
     containers: List['DockContainerWidget']
+    z_stack: List['DockContainerWidget']
     container_overlay: DockOverlay
     dock_area_overlay: DockOverlay
     dock_widgets_map: Dict[str, 'DockWidget']
-    perspectives: Dict[str, QByteArray]
+    dock_widget_factories: Dict[str, Tuple[Callable[['DockWidget'], None],
+                                           str]]
+    perspectives: Dict[str, Optional[QByteArray]]
+    perspective_archive: Optional[PerspectiveArchive]
+    perspective_cache: 'OrderedDict[str, LayoutSnapshot]'
+    perspective_cache_size: int
+    perspective_cache_hits: int
+    perspective_cache_misses: int
     view_menu_groups: Dict[str, QMenu]
     view_menu: QMenu
     menu_insertion_order: InsertionOrder
     restoring_state: bool
+    restore_task: Optional[Generator[None, None, bool]]
+    restore_timer: Optional[QTimer]
+    restore_time_slice: int
+    restore_progress: int
+    restore_area_count: int
+    restore_was_hidden: bool
     config_flags: DockFlags
+    codec: Optional[StateCodec]
+    layout_dirty: bool
+    autosave_path: Optional[pathlib.Path]
+    autosave_version: int
+    autosave_timer: Optional[QTimer]
+    autosave_executor: Optional[ThreadPoolExecutor]
+    drop_target_index: Optional[DropTargetIndex]
+    drop_target_tracking: bool
+    drop_target_watched: List[QWidget]
+    drag_instrumentation: Optional[DragInstrumentation]
 
     def __init__(self, public):
         '''
@@ -55,70 +117,127 @@ class DockManagerPrivate:
         self.public = public
         self.floating_widgets = []
         self.containers = []
+        # Back to front, the dock manager is always at the back
+        self.z_stack = []
         self.container_overlay = None
         self.dock_area_overlay = None
         self.dock_widgets_map = {}
+        self.dock_widget_factories = {}
         self.perspectives = {}
+        self.perspective_archive = None
+        self.perspective_cache = OrderedDict()
+        self.perspective_cache_size = 8
+        self.perspective_cache_hits = 0
+        self.perspective_cache_misses = 0
         self.view_menu_groups = {}
         self.view_menu = None
         self.menu_insertion_order = InsertionOrder.by_spelling
         self.restoring_state = False
+        self.restore_task = None
+        self.restore_timer = None
+        self.restore_time_slice = 10
+        self.restore_progress = 0
+        self.restore_area_count = 0
+        self.restore_was_hidden = False
         self.config_flags = DockFlags.default_config
+        self.codec = None
+        self.layout_dirty = False
+        self.autosave_path = None
+        self.autosave_version = 0
+        self.autosave_timer = None
+        self.autosave_executor = None
+        self.drop_target_index = None
+        self.drop_target_tracking = False
+        self.drop_target_watched = []
+        self.drag_instrumentation = None
+
+    def on_container_destroyed(self, container: 'DockContainerWidget',
+                               obj: QObject = None):
+        '''
+        Removes a deleted container from the registries. Only python objects
+        are touched, as the dock manager may be deleted as well.
 
-    def check_format(self, state: QByteArray, version: int) -> bool:
+        Parameters
+        ----------
+        container : DockContainerWidget
+        obj : QObject
+            Unused
+        '''
+        #pylint: disable=unused-argument
+        for registry in (self.containers, self.z_stack):
+            if container in registry:
+                registry.remove(container)
+        # The index is rebuilt on demand without the deleted container
+        self.drop_target_index = None
+
+    def on_floating_widget_destroyed(self,
+                                     floating_widget: FloatingDockContainer,
+                                     obj: QObject = None):
         '''
-        Checks if the given data stream is a valid docking system state file.
+        Removes a deleted floating widget from the registry
 
         Parameters
         ----------
-        state : QByteArray
-        version : int
+        floating_widget : FloatingDockContainer
+        obj : QObject
+            Unused
+        '''
+        #pylint: disable=unused-argument
+        if floating_widget in self.floating_widgets:
+            self.floating_widgets.remove(floating_widget)
 
-        Returns
-        -------
-        value : bool
+    def connect_dock_widget(self, dock_widget: 'DockWidget'):
         '''
-        return self.restore_state_from_xml(state, version, testing=True)
+        Reports the view toggles of the dock widget as layout changes. Adding
+        a dock widget again does not add another connection.
 
-    def restore_state_from_xml(self, state: QByteArray, version: int, testing: bool) -> bool:
+        Parameters
+        ----------
+        dock_widget : DockWidget
         '''
-        Restores the state
+        self.disconnect_dock_widget(dock_widget)
+        dock_widget.view_toggled.connect(self.public.notify_layout_changed)
+
+    def disconnect_dock_widget(self, dock_widget: 'DockWidget'):
+        '''
+        Stops reporting the view toggles of the dock widget
 
         Parameters
         ----------
-        state : QByteArray
-        version : int
-        testing : bool
+        dock_widget : DockWidget
+        '''
+        try:
+            dock_widget.view_toggled.disconnect(
+                self.public.notify_layout_changed)
+        except (TypeError, RuntimeError):
+            # Not connected
+            pass
+
+    def iter_restore_containers(self, snapshot: LayoutSnapshot
+                                ) -> Generator[None, None, bool]:
+        '''
+        Restores the containers from the given, already validated, snapshot.
+        Yields after each restored dock area.
+
+        Parameters
+        ----------
+        snapshot : LayoutSnapshot
 
         Returns
         -------
         value : bool
         '''
-        if state.isEmpty():
-            return False
-
-        stream = QXmlStreamReader(state)
-        stream.readNextStartElement()
-        if stream.name() != "QtAdvancedDockingSystem":
-            return False
-
-        v = stream.attributes().value("Version")
-        if int(v) != version:
-            return False
-
         result = True
-        dock_containers = stream.attributes().value("Containers")
-        logger.debug('dock_containers %s', dock_containers)
+        logger.debug('dock_containers %s', len(snapshot.containers))
         dock_container_count = 0
-        while stream.readNextStartElement():
-            if stream.name() == "Container":
-                result = self.restore_container(dock_container_count, stream,
-                                                testing=testing)
-                if not result:
-                    break
-                dock_container_count += 1
-
-        if testing or not dock_container_count:
+        for container_state in snapshot.containers:
+            result = yield from self.iter_restore_container(
+                dock_container_count, container_state)
+            if not result:
+                break
+            dock_container_count += 1
+
+        if not dock_container_count:
             return result
 
         # Delete remaining empty floating widgets
@@ -134,27 +253,269 @@ class DockManagerPrivate:
 
         return result
 
-    def restore_state(self, state: QByteArray, version: int) -> bool:
+    def decode_state(self, state: QByteArray) -> Optional[LayoutSnapshot]:
         '''
-        Restore state
+        Decompresses the state if required and parses it into a snapshot
 
         Parameters
         ----------
         state : QByteArray
+
+        Returns
+        -------
+        value : LayoutSnapshot
+            None if the state is invalid
+        '''
+        if state.startsWith(CODEC_MAGIC):
+            state = state_codec.decode(state)
+            if state is None:
+                return None
+
+        if state.startsWith(BINARY_MAGIC):
+            return LayoutSnapshot.from_binary(state)
+
+        if not state.startsWith(b'<?xml'):
+            if qUncompress is None:
+                raise RuntimeError(
+                        'Compression utilities unavailable with the '
+                        'current qt bindings')
+            state = qUncompress(state)
+
+        return LayoutSnapshot.from_xml(state)
+
+    def serialize_state(self, version: int) -> QByteArray:
+        '''
+        Serializes the current state into the XML or binary format, without
+        any compression
+
+        Parameters
+        ----------
         version : int
 
+        Returns
+        -------
+        value : QByteArray
+        '''
+        if DockFlags.binary_state in self.config_flags:
+            return self.public.save_snapshot(version).to_binary()
+
+        xmldata = QByteArray()
+        stream = QXmlStreamWriter(xmldata)
+        stream.setAutoFormatting(
+            DockFlags.xml_auto_formatting in self.config_flags)
+        stream.writeStartDocument()
+        stream.writeStartElement("QtAdvancedDockingSystem")
+        stream.writeAttribute("Version", str(version))
+        stream.writeAttribute("Containers", str(len(self.containers)))
+        for container in self.containers:
+            if isinstance(container, DockManager):
+                DockContainerWidget.save_state(container, stream)
+            else:
+                container.save_state(stream)
+
+        stream.writeEndElement()
+        stream.writeEndDocument()
+        return xmldata
+
+    @staticmethod
+    def compress_state(state: QByteArray, codec: Optional[StateCodec],
+                       config_flags: DockFlags) -> QByteArray:
+        '''
+        Compresses a serialized state with the given codec or, for the XML
+        format, according to the `DockFlags.xml_compression` flag. This
+        function does not access any widgets and may be called from a worker
+        thread.
+
+        Parameters
+        ----------
+        state : QByteArray
+        codec : StateCodec
+        config_flags : DockFlags
+
+        Returns
+        -------
+        value : QByteArray
+        '''
+        if codec is not None:
+            return state_codec.encode(state, codec)
+
+        if (state.startsWith(BINARY_MAGIC)
+                or DockFlags.xml_compression not in config_flags
+                or qCompress is None):
+            return state
+
+        return qCompress(state, 9)
+
+    @classmethod
+    def write_autosave(cls, path: pathlib.Path, data: bytes,
+                       codec: Optional[StateCodec], config_flags: DockFlags):
+        '''
+        Compresses the serialized state and writes it to the given path. The
+        state is written to a temporary file first, which then atomically
+        replaces the file. Runs on the autosave worker thread.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+        data : bytes
+        codec : StateCodec
+        config_flags : DockFlags
+        '''
+        state = cls.compress_state(QByteArray(data), codec, config_flags)
+        tmp_path = path.with_name(path.name + '.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(bytes(state))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except Exception:
+            logger.exception('Autosaving the layout to %s failed', path)
+            raise
+
+        logger.debug('Autosaved the layout to %s', path)
+
+    def autosave_if_dirty(self):
+        '''
+        Autosaves the layout when the debounce timer expires, if it has
+        changed since the last autosave
+        '''
+        if self.layout_dirty:
+            self.public.autosave_now()
+
+    def perspective_state(self, name: str) -> Optional[QByteArray]:
+        '''
+        Returns the saved state of the perspective with the given name. If a
+        perspective archive is used, the state is read from the archive.
+
+        Parameters
+        ----------
+        name : str
+
+        Returns
+        -------
+        value : QByteArray
+        '''
+        state = self.perspectives.get(name, None)
+        if state is None and self.perspective_archive is not None:
+            state = self.perspective_archive.read(name)
+        return state
+
+    def perspective_snapshot(self, name: str) -> Optional[LayoutSnapshot]:
+        '''
+        Returns the parsed snapshot of the perspective with the given name.
+        Recently used snapshots are kept in a least recently used cache.
+
+        Parameters
+        ----------
+        name : str
+
+        Returns
+        -------
+        value : LayoutSnapshot
+            None if there is no valid perspective with the given name
+        '''
+        cache = self.perspective_cache
+        try:
+            snapshot = cache[name]
+        except KeyError:
+            ...
+        else:
+            self.perspective_cache_hits += 1
+            cache.move_to_end(name)
+            return snapshot
+
+        self.perspective_cache_misses += 1
+        state = self.perspective_state(name)
+        if state is None:
+            return None
+
+        snapshot = self.decode_state(state)
+        if snapshot is not None and self.perspective_cache_size > 0:
+            cache[name] = snapshot
+            while len(cache) > self.perspective_cache_size:
+                cache.popitem(last=False)
+
+        return snapshot
+
+    def is_current_layout(self, snapshot: LayoutSnapshot) -> bool:
+        '''
+        Returns true if the snapshot has the fingerprint of the current layout
+
+        Parameters
+        ----------
+        snapshot : LayoutSnapshot
+
         Returns
         -------
         value : bool
         '''
-        if not self.check_format(state, version):
-            logger.debug('checkFormat: Error checking format!')
-            return False
+        return snapshot.fingerprint() == self.public.layout_fingerprint()
+
+    def create_dock_widgets(self, snapshot: LayoutSnapshot):
+        '''
+        Creates the dock widgets of the snapshot that are not registered yet
+        but have a registered factory. Closed dock widgets are created as
+        placeholders without content.
+
+        Parameters
+        ----------
+        snapshot : LayoutSnapshot
+        '''
+        if not self.dock_widget_factories:
+            return
+
+        for widget in snapshot.dock_widgets():
+            name = widget.name
+            if name in self.dock_widgets_map:
+                continue
+
+            try:
+                factory, title = self.dock_widget_factories[name]
+            except KeyError:
+                continue
+
+            dock_widget = DockWidget(title or name)
+            dock_widget.setObjectName(name)
+            dock_widget.set_dock_manager(self.public)
+            dock_widget.set_content_factory(factory)
+            self.connect_dock_widget(dock_widget)
+            self.dock_widgets_map[name] = dock_widget
+            if not widget.closed:
+                dock_widget.materialize()
+
+    def restore_state(self, snapshot: LayoutSnapshot) -> bool:
+        '''
+        Restore state by rebuilding all containers from the snapshot
+
+        Parameters
+        ----------
+        snapshot : LayoutSnapshot
 
+        Returns
+        -------
+        value : bool
+        '''
+        return run_to_completion(self.iter_restore_state(snapshot))
+
+    def iter_restore_state(self, snapshot: LayoutSnapshot
+                           ) -> Generator[None, None, bool]:
+        '''
+        Generator version of restore_state() that yields after each restored
+        dock area
+
+        Parameters
+        ----------
+        snapshot : LayoutSnapshot
+
+        Returns
+        -------
+        value : bool
+        '''
         # Hide updates of floating widgets from use
         self.hide_floating_widgets()
         self.mark_dock_widgets_dirty()
-        if not self.restore_state_from_xml(state, version, testing=False):
+        if not (yield from self.iter_restore_containers(snapshot)):
             logger.debug('restoreState: Error restoring state!')
             return False
 
@@ -163,6 +524,74 @@ class DockManagerPrivate:
         self.emit_top_level_events()
         return True
 
+    def start_restore_task(self, snapshot: LayoutSnapshot, time_slice: int,
+                           was_hidden: bool):
+        '''
+        Starts restoring the given snapshot in time slices from the event loop
+
+        Parameters
+        ----------
+        snapshot : LayoutSnapshot
+        time_slice : int
+            The time in milliseconds after which control is returned to the
+            event loop
+        was_hidden : bool
+            True if the dock manager was hidden before the restore started
+        '''
+        self.restore_task = self.iter_restore_state(snapshot)
+        self.restore_time_slice = time_slice
+        self.restore_progress = 0
+        self.restore_area_count = sum(1 for _ in snapshot.dock_areas())
+        self.restore_was_hidden = was_hidden
+        if self.restore_timer is None:
+            self.restore_timer = QTimer(self.public)
+            self.restore_timer.setInterval(0)
+            self.restore_timer.timeout.connect(self.continue_restore_task)
+
+        self.restore_timer.start()
+
+    def continue_restore_task(self):
+        '''
+        Restores dock areas until the time slice is used up
+        '''
+        deadline = time.perf_counter() + self.restore_time_slice / 1000
+        result = None
+        try:
+            while True:
+                next(self.restore_task)
+                self.restore_progress += 1
+                if time.perf_counter() >= deadline:
+                    break
+        except StopIteration as ex:
+            result = ex.value
+        except Exception:
+            logger.exception('Restoring the state failed')
+            result = False
+
+        self.public.restore_progress.emit(
+            min(self.restore_progress, self.restore_area_count),
+            self.restore_area_count)
+        if result is not None:
+            self.finish_restore_task(result)
+
+    def finish_restore_task(self, result: bool):
+        '''
+        Finishes an asynchronous restore
+
+        Parameters
+        ----------
+        result : bool
+        '''
+        if not result:
+            logger.debug('restoreState: Error restoring state!')
+
+        self.restore_timer.stop()
+        self.restore_task = None
+        self.restoring_state = False
+        self.public.state_restored.emit()
+        if not self.restore_was_hidden:
+            self.public.show()
+
     def restore_dock_widgets_open_state(self):
         # All dock widgets, that have not been processed in the restore state
         # function are invisible to the user now and have no assigned dock area
@@ -185,10 +614,11 @@ class DockManagerPrivate:
                 dock_area = dock_container.dock_area(i)
                 dock_widget_name = dock_area.property("currentDockWidget")
                 dock_widget = None
-                if not dock_widget_name:
+                if dock_widget_name:
                     dock_widget = self.public.find_dock_widget(dock_widget_name)
 
-                if not dock_widget or dock_widget.is_closed():
+                if (not dock_widget or dock_widget.is_closed()
+                        or dock_widget.dock_area_widget() is not dock_area):
                     index = dock_area.index_of_first_open_dock_widget()
                     if index < 0:
                         continue
@@ -220,35 +650,32 @@ class DockManagerPrivate:
         for dock_widget in self.dock_widgets_map.values():
             dock_widget.setProperty("dirty", True)
 
-    def restore_container(self, index: int, stream: QXmlStreamReader,
-                          testing: bool) -> bool:
+    def iter_restore_container(self, index: int, state: ContainerSnapshot
+                               ) -> Generator[None, None, bool]:
         '''
-        Restores the container with the given index
+        Restores the container with the given index. Yields after each
+        restored dock area.
 
         Parameters
         ----------
         index : int
-        stream : QXmlStreamReader
-        testing : bool
+        state : ContainerSnapshot
 
         Returns
         -------
         value : bool
         '''
-        if testing:
-            index = 0
-
         if index >= len(self.containers):
             floating_widget = FloatingDockContainer(dock_manager=self.public)
-            result = floating_widget.restore_state(stream, testing)
+            result = yield from floating_widget.iter_restore_state(state)
         else:
             logger.debug('containers[%d].restore_state()', index)
             container = self.containers[index]
             if container.is_floating():
-                result = container.floating_widget().restore_state(stream, testing)
+                result = yield from container.floating_widget(
+                ).iter_restore_state(state)
             else:
-                result = DockContainerWidget.restore_state(container, stream,
-                                                           testing)
+                result = yield from container.iter_restore_state(state)
 
         return result
 
@@ -306,6 +733,11 @@ class DockManager(DockContainerWidget):
     # openPerspective() function is called
     state_restored = Signal()
 
+    # This signal is emitted during restore_state_async() after each time
+    # slice with the number of restored dock areas and the total number of
+    # dock areas
+    restore_progress = Signal(int, int)
+
     # This signal is emitted, if the dock manager starts opening a perspective.
     # Opening a perspective may take more than a second if there are many complex
     # widgets. The application may use this signal to show some progress
@@ -315,6 +747,11 @@ class DockManager(DockContainerWidget):
     # This signal is emitted if the dock manager finished opening a perspective
     perspective_opened = Signal(str)
 
+    # This signal is emitted each time the layout is modified, e.g. if dock
+    # areas are added or removed, dock widgets are opened or closed, the
+    # current tab changes, a splitter is moved or a floating widget is moved
+    layout_changed = Signal()
+
     def __init__(self, parent: QWidget):
         '''
         The central dock manager that maintains the complete docking system.
@@ -336,12 +773,23 @@ class DockManager(DockContainerWidget):
             parent.setCentralWidget(self)
 
         self._mgr.view_menu = QMenu("Show View", self)
-        self._mgr.dock_area_overlay = DockOverlay(self, OverlayMode.dock_area)
-        self._mgr.container_overlay = DockOverlay(self, OverlayMode.container)
+        self._mgr.dock_area_overlay = DockOverlay(self, OverlayMode.dock_area,
+                                                  dock_manager=self)
+        self._mgr.container_overlay = DockOverlay(self, OverlayMode.container,
+                                                  dock_manager=self)
         self._mgr.containers.append(self)
+        self._mgr.z_stack.append(self)
+        self.watch_dock_container(self)
         self._mgr.load_stylesheet()
 
     def deleteLater(self):
+        if self._mgr.autosave_executor is not None:
+            if self._mgr.autosave_timer.isActive():
+                self._mgr.autosave_if_dirty()
+            self._mgr.autosave_timer.stop()
+            self._mgr.autosave_executor.shutdown(wait=False)
+            self._mgr.autosave_executor = None
+
         floating_widgets = self._mgr.floating_widgets
         for floating_widget in floating_widgets:
             floating_widget.deleteLater()
@@ -357,6 +805,8 @@ class DockManager(DockContainerWidget):
         floating_widget : FloatingDockContainer
         '''
         self._mgr.floating_widgets.append(floating_widget)
+        floating_widget.destroyed.connect(functools.partial(
+            self._mgr.on_floating_widget_destroyed, floating_widget))
         logger.debug('floating widgets count = %d',
                      len(self._mgr.floating_widgets))
 
@@ -385,6 +835,329 @@ class DockManager(DockContainerWidget):
         dock_container : DockContainerWidget
         '''
         self._mgr.containers.append(dock_container)
+        self._mgr.z_stack.append(dock_container)
+        dock_container.destroyed.connect(functools.partial(
+            self._mgr.on_container_destroyed, dock_container))
+        self.watch_dock_container(dock_container)
+
+    def raise_dock_container(self, dock_container: DockContainerWidget):
+        '''
+        Moves the given container to the front of the z-order. The dock
+        manager itself always stays at the back.
+
+        Parameters
+        ----------
+        dock_container : DockContainerWidget
+        '''
+        z_stack = self._mgr.z_stack
+        if dock_container is self or (z_stack and
+                                      z_stack[-1] is dock_container):
+            return
+
+        if dock_container in z_stack:
+            z_stack.remove(dock_container)
+        z_stack.append(dock_container)
+
+    def container_z_order_index(self, dock_container: DockContainerWidget
+                                ) -> int:
+        '''
+        Returns the position of the given container in the z-order, 0 is the
+        back
+
+        Parameters
+        ----------
+        dock_container : DockContainerWidget
+
+        Returns
+        -------
+        value : int
+            0 for the dock manager and unregistered containers
+        '''
+        try:
+            return self._mgr.z_stack.index(dock_container)
+        except ValueError:
+            return 0
+
+    def z_ordered_containers(self) -> Iterator[DockContainerWidget]:
+        '''
+        Iterates over the registered containers from front to back
+
+        Returns
+        -------
+        value : iterator of DockContainerWidget
+        '''
+        return reversed(self._mgr.z_stack)
+
+    def watch_dock_container(self, dock_container: DockContainerWidget):
+        '''
+        Connects the signals of the given container that modify the layout to
+        notify_layout_changed()
+
+        Parameters
+        ----------
+        dock_container : DockContainerWidget
+        '''
+        dock_container.dock_areas_added.connect(self.notify_layout_changed)
+        dock_container.dock_areas_removed.connect(self.notify_layout_changed)
+        dock_container.dock_area_view_toggled.connect(
+            self.notify_layout_changed)
+
+    def notify_layout_changed(self):
+        '''
+        Marks the layout as modified, emits layout_changed and restarts the
+        autosave timer.
+
+        The containers, dock areas and dock widgets of this dock manager call
+        this function when the layout changes. Applications only need to call
+        it for changes that the docking system does not track.
+        '''
+        self._mgr.layout_dirty = True
+        self._mgr.drop_target_index = None
+        self.layout_changed.emit()
+        if self._mgr.autosave_timer is not None:
+            self._mgr.autosave_timer.start()
+
+    def build_drop_target_index(self, dragged_container:
+                                Optional[DockContainerWidget] = None):
+        '''
+        Builds the spatial index of all visible containers and dock areas
+        that is used for hit testing while a floating widget is dragged. The
+        index is rebuilt on demand after layout changes, and after a
+        container or its window is moved, resized, shown or hidden, until
+        release_drop_target_index() is called.
+
+        Parameters
+        ----------
+        dragged_container : DockContainerWidget, optional
+            The container of the dragged floating widget. It is no drop
+            target, so its moves do not invalidate the index.
+        '''
+        self.release_drop_target_index()
+        containers = self.dock_containers()
+        self._mgr.drop_target_tracking = True
+        self._mgr.drop_target_index = DropTargetIndex.from_containers(
+            containers)
+
+        watched = self._mgr.drop_target_watched
+        for container in containers:
+            if container is dragged_container:
+                continue
+            for widget in (container, container.window()):
+                if widget not in watched:
+                    widget.installEventFilter(self)
+                    watched.append(widget)
+
+    def release_drop_target_index(self):
+        '''
+        Discards the drop target index at the end of a drag
+        '''
+        self._mgr.drop_target_tracking = False
+        self._mgr.drop_target_index = None
+        for widget in self._mgr.drop_target_watched:
+            try:
+                widget.removeEventFilter(self)
+            except RuntimeError:
+                # The widget has been deleted during the drag
+                pass
+        self._mgr.drop_target_watched.clear()
+
+    def invalidate_drop_target_index(self):
+        '''
+        Marks the drop target index as outdated, e.g. after the geometry or
+        visibility of a container changed without a layout change
+        '''
+        self._mgr.drop_target_index = None
+
+    @event_filter_decorator
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        '''
+        Invalidates the drop target index when a watched container or window
+        is moved, resized, shown or hidden during a drag
+
+        Parameters
+        ----------
+        watched : QObject
+        event : QEvent
+
+        Returns
+        -------
+        value : bool
+        '''
+        if (self._mgr.drop_target_tracking and event.type() in (
+                QEvent.Move, QEvent.Resize, QEvent.Show, QEvent.Hide)):
+            self.invalidate_drop_target_index()
+
+        return super().eventFilter(watched, event)
+
+    def drop_target_index(self) -> Optional[DropTargetIndex]:
+        '''
+        Returns the drop target index during a drag, rebuilding it if it is
+        outdated
+
+        Returns
+        -------
+        value : DropTargetIndex
+            None if no drag is in progress
+        '''
+        if not self._mgr.drop_target_tracking:
+            return None
+
+        if self._mgr.drop_target_index is None:
+            self._mgr.drop_target_index = DropTargetIndex.from_containers(
+                self.dock_containers())
+        return self._mgr.drop_target_index
+
+    def enable_drag_instrumentation(self, window: int = 1000
+                                    ) -> DragInstrumentation:
+        '''
+        Starts recording the duration of the stages of dragging and dropping
+        floating widgets, see DragInstrumentation
+
+        Parameters
+        ----------
+        window : int, optional
+            The number of recent durations kept per stage
+
+        Returns
+        -------
+        value : DragInstrumentation
+        '''
+        self._mgr.drag_instrumentation = DragInstrumentation(window)
+        return self._mgr.drag_instrumentation
+
+    def disable_drag_instrumentation(self):
+        '''
+        Stops recording drag durations
+        '''
+        self._mgr.drag_instrumentation = None
+
+    def drag_instrumentation(self) -> Optional[DragInstrumentation]:
+        '''
+        Returns the drag instrumentation, None if it is disabled
+
+        Returns
+        -------
+        value : DragInstrumentation
+        '''
+        return self._mgr.drag_instrumentation
+
+    def measure(self, stage: str):
+        '''
+        Returns a context manager that records the duration of its block for
+        the given stage if the drag instrumentation is enabled
+
+        Parameters
+        ----------
+        stage : str
+
+        Returns
+        -------
+        value : context manager
+        '''
+        instrumentation = self._mgr.drag_instrumentation
+        if instrumentation is None:
+            return _null_measurement
+        return instrumentation.measure(stage)
+
+    def is_layout_dirty(self) -> bool:
+        '''
+        Returns true if the layout has changed since the last autosave
+
+        Returns
+        -------
+        value : bool
+        '''
+        return self._mgr.layout_dirty
+
+    def enable_autosave(self, path, delay: int = 1000, version: int = 0):
+        '''
+        Saves the layout automatically to the given file after it has changed.
+
+        Bursts of changes are coalesced: the layout is saved once no further
+        change occurred for the given delay. The state is serialized on the
+        GUI thread, but the compression with the state codec and the file
+        write are done on a worker thread. The file is replaced atomically,
+        so it always contains a complete state that can be passed to
+        restore_state().
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+        delay : int, optional
+            The debounce delay in milliseconds
+        version : int, optional
+            The version stored in the saved state
+        '''
+        mgr = self._mgr
+        mgr.autosave_path = pathlib.Path(path)
+        mgr.autosave_version = version
+        if mgr.autosave_timer is None:
+            mgr.autosave_timer = QTimer(self)
+            mgr.autosave_timer.setSingleShot(True)
+            mgr.autosave_timer.timeout.connect(mgr.autosave_if_dirty)
+
+        mgr.autosave_timer.setInterval(delay)
+        if mgr.autosave_executor is None:
+            mgr.autosave_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='qtpydocking-autosave')
+
+    def disable_autosave(self, wait: bool = True):
+        '''
+        Stops saving the layout automatically. Changes that were not saved
+        yet are discarded.
+
+        Parameters
+        ----------
+        wait : bool, optional
+            Wait until a running file write has finished
+        '''
+        mgr = self._mgr
+        if mgr.autosave_timer is not None:
+            mgr.autosave_timer.stop()
+
+        if mgr.autosave_executor is not None:
+            mgr.autosave_executor.shutdown(wait=wait)
+
+        mgr.autosave_executor = None
+        mgr.autosave_path = None
+
+    def autosave_path(self) -> Optional[pathlib.Path]:
+        '''
+        Returns the autosave file, None if autosave is disabled
+
+        Returns
+        -------
+        value : pathlib.Path
+        '''
+        return self._mgr.autosave_path
+
+    def autosave_now(self) -> Optional[Future]:
+        '''
+        Saves the layout to the autosave file immediately, without waiting
+        for the debounce delay
+
+        Returns
+        -------
+        value : concurrent.futures.Future
+            The future of the file write, None if autosave is disabled or a
+            restore is running. In that case the layout is saved later.
+        '''
+        mgr = self._mgr
+        if mgr.autosave_path is None:
+            return None
+
+        mgr.autosave_timer.stop()
+        if mgr.restoring_state:
+            # An asynchronous restore has not finished building the layout
+            mgr.layout_dirty = True
+            mgr.autosave_timer.start()
+            return None
+
+        data = bytes(mgr.serialize_state(mgr.autosave_version))
+        mgr.layout_dirty = False
+        return mgr.autosave_executor.submit(
+            mgr.write_autosave, mgr.autosave_path, data, mgr.codec,
+            mgr.config_flags)
 
     def remove_dock_container(self, dock_container: DockContainerWidget):
         '''
@@ -396,6 +1169,8 @@ class DockManager(DockContainerWidget):
         '''
         if self is not dock_container and dock_container in self._mgr.containers:
             self._mgr.containers.remove(dock_container)
+        if self is not dock_container and dock_container in self._mgr.z_stack:
+            self._mgr.z_stack.remove(dock_container)
 
     def container_overlay(self) -> DockOverlay:
         '''
@@ -438,6 +1213,8 @@ class DockManager(DockContainerWidget):
         flags : DockFlags
         '''
         self._mgr.config_flags = flags
+        for dock_widget in self._mgr.dock_widgets_map.values():
+            dock_widget.tab_widget().update_close_button()
 
     def add_dock_widget(
             self, area: DockWidgetArea,
@@ -463,6 +1240,7 @@ class DockManager(DockContainerWidget):
         value : DockAreaWidget
         '''
         self._mgr.dock_widgets_map[dock_widget.objectName()] = dock_widget
+        self._mgr.connect_dock_widget(dock_widget)
         return super().add_dock_widget(area, dock_widget, dock_area_widget)
 
     def add_dock_widget_tab(self, area: DockWidgetArea,
@@ -523,6 +1301,39 @@ class DockManager(DockContainerWidget):
         '''
         return self._mgr.dock_widgets_map.get(object_name, None)
 
+    def register_dock_widget_factory(
+            self, object_name: str,
+            factory: Callable[['DockWidget'], None],
+            title: str = ''):
+        '''
+        Registers a factory for the dock widget with the given object name.
+
+        If a restored state contains a dock widget that does not exist yet,
+        the dock manager creates it instead of skipping it. Closed dock
+        widgets are created as lightweight placeholders and the factory is
+        only called with the dock widget the first time it is opened. The
+        factory is expected to set the content widget, e.g. via set_widget().
+        Created dock widgets can be found via find_dock_widget().
+
+        Parameters
+        ----------
+        object_name : str
+        factory : callable
+        title : str, optional
+            The title of the created dock widget, defaults to the object name
+        '''
+        self._mgr.dock_widget_factories[object_name] = (factory, title)
+
+    def unregister_dock_widget_factory(self, object_name: str):
+        '''
+        Removes the factory registered for the given object name
+
+        Parameters
+        ----------
+        object_name : str
+        '''
+        self._mgr.dock_widget_factories.pop(object_name, None)
+
     def dock_widgets_map(self) -> dict:
         '''
         This function returns a readable reference to the internal dock widgets
@@ -543,27 +1354,21 @@ class DockManager(DockContainerWidget):
         widget : DockWidget
         '''
         self._mgr.dock_widgets_map.pop(widget.objectName())
+        self._mgr.disconnect_dock_widget(widget)
         super().remove_dock_widget(widget)
 
     def dock_containers(self) -> list:
         '''
-        Returns the list of all active and visible dock containers
+        Returns the list of all registered dock containers
 
         Dock containers are the main dock manager and all floating widgets.
+        Deleted containers are removed from the registry when they are
+        destroyed.
 
         Returns
         -------
         value : list
         '''
-        # qtpydocking TODO containers getting deleted
-        for container in list(self._mgr.containers):
-            try:
-                container.isVisible()
-            except RuntimeError as ex:
-                self._mgr.containers.remove(container)
-                logger.debug('qtpydocking TODO, container deleted',
-                             exc_info=ex)
-
         return list(self._mgr.containers)
 
     def floating_widgets(self) -> list:
@@ -593,7 +1398,9 @@ class DockManager(DockContainerWidget):
         the returned QByteArray.
 
         See also `config_flags`, which allow for auto-formatting and compression
-        of the resulting XML file.
+        of the resulting XML file, or for selecting the compact binary format
+        with `DockFlags.binary_state`. If a state codec is set, it is used
+        instead of the `DockFlags.xml_compression` flag.
 
         Parameters
         ----------
@@ -603,27 +1410,85 @@ class DockManager(DockContainerWidget):
         -------
         value : QByteArray
         '''
-        xmldata = QByteArray()
-        stream = QXmlStreamWriter(xmldata)
-        stream.setAutoFormatting(
-            DockFlags.xml_auto_formatting in self._mgr.config_flags)
-        stream.writeStartDocument()
-        stream.writeStartElement("QtAdvancedDockingSystem")
-        stream.writeAttribute("Version", str(version))
-        stream.writeAttribute("Containers", str(len(self._mgr.containers)))
-        for container in self._mgr.containers:
-            if isinstance(container, DockManager):
-                DockContainerWidget.save_state(container, stream)
-            else:
-                container.save_state(stream)
+        return self._mgr.compress_state(self._mgr.serialize_state(version),
+                                        self._mgr.codec,
+                                        self._mgr.config_flags)
 
-        stream.writeEndElement()
-        stream.writeEndDocument()
+    def set_state_codec(self, codec: Optional[StateCodec]):
+        '''
+        Sets the codec that save_state() uses to compress the state, e.g.
+        ZlibCodec(level=1) or LzmaCodec(). The name of the codec is stored in
+        the state, so restore_state() picks the matching decoder from the
+        registered codecs. The codec is registered, so custom codecs can
+        decode the states they encode. None restores the default behavior.
+
+        Parameters
+        ----------
+        codec : StateCodec
+
+        Raises
+        ------
+        TypeError
+            If the codec is neither None nor a StateCodec
+        '''
+        if codec is not None:
+            state_codec.register_codec(codec)
+        self._mgr.codec = codec
+
+    def state_codec(self) -> Optional[StateCodec]:
+        '''
+        Returns the codec used by save_state()
+
+        Returns
+        -------
+        value : StateCodec
+        '''
+        return self._mgr.codec
+
+    def save_snapshot(self, version: int = 0) -> LayoutSnapshot:
+        '''
+        Returns the current state of the dock manager and all its dock widgets
+        as a layout snapshot
+
+        Parameters
+        ----------
+        version : int
+
+        Returns
+        -------
+        value : LayoutSnapshot
+        '''
+        containers = tuple(container.snapshot()
+                           for container in self._mgr.containers)
+        return LayoutSnapshot(version, containers)
+
+    def layout_fingerprint(self) -> str:
+        '''
+        Returns the fingerprint of the current layout, see
+        LayoutSnapshot.fingerprint()
+
+        Returns
+        -------
+        value : str
+        '''
+        return self.save_snapshot().fingerprint()
+
+    def state_fingerprint(self, state: QByteArray) -> Optional[str]:
+        '''
+        Returns the fingerprint of a saved state, e.g. of a perspective.
+        States with the same fingerprint restore the same layout.
+
+        Parameters
+        ----------
+        state : QByteArray
 
-        return (qCompress(xmldata, 9)
-                if DockFlags.xml_compression in self._mgr.config_flags
-                and qCompress is not None
-                else xmldata)
+        Returns
+        -------
+        value : str
+            None if the state is invalid
+        '''
+        snapshot = self._mgr.decode_state(state)
+        return snapshot.fingerprint() if snapshot is not None else None
 
     def restore_state(self, state: QByteArray, version: int = 0) -> bool:
         '''
@@ -632,6 +1497,9 @@ class DockManager(DockContainerWidget):
         dockmanager's state is left unchanged, and this function returns false;
         otherwise, the state is restored, and this function returns true.
 
+        The state may be in the XML format, compressed or not, or in the
+        binary format; the format is detected automatically.
+
         Parameters
         ----------
         state : QByteArray
@@ -641,18 +1509,59 @@ class DockManager(DockContainerWidget):
         -------
         value : bool
         '''
-        if not state.startsWith(b'<?xml'):
-            if qUncompress is None:
-                raise RuntimeError(
-                        'Compression utilities unavailable with the '
-                        'current qt bindings')
-            state = qUncompress(state)
-
         # Prevent multiple calls as long as state is not restore. This may
         # happen, if QApplication.processEvents() is called somewhere
         if self._mgr.restoring_state:
             return False
 
+        snapshot = self._mgr.decode_state(state)
+        if snapshot is None or snapshot.version != version:
+            logger.debug('checkFormat: Error checking format!')
+            return False
+
+        return self.restore_snapshot(snapshot)
+
+    def restore_snapshot(self, snapshot: LayoutSnapshot) -> bool:
+        '''
+        Restores the state of this dockmanagers dockwidgets from an already
+        parsed snapshot.
+
+        If the `DockFlags.incremental_restore` flag is set and the splitter
+        structure of the snapshot matches the current layout, only the
+        differences are applied: dock widgets are moved between the existing
+        dock areas, splitters are resized and dock widgets are opened or
+        closed. Otherwise all dock areas and splitters are rebuilt.
+
+        If the snapshot has the same fingerprint as the current layout, see
+        layout_fingerprint(), nothing is changed and only the restoring_state
+        and state_restored signals are emitted.
+
+        Parameters
+        ----------
+        snapshot : LayoutSnapshot
+
+        Returns
+        -------
+        value : bool
+        '''
+        if self._mgr.restoring_state:
+            return False
+
+        if self._mgr.is_current_layout(snapshot):
+            logger.debug('Layout is unchanged, nothing to restore')
+            self.restoring_state.emit()
+            self.state_restored.emit()
+            return True
+
+        self._mgr.create_dock_widgets(snapshot)
+        reconciler = None
+        if DockFlags.incremental_restore in self._mgr.config_flags:
+            reconciler = LayoutReconciler(self, snapshot)
+            if not reconciler.plan():
+                logger.debug('Layout structure differs, restoring all '
+                             'dock areas')
+                reconciler = None
+
         # We hide the complete dock manager here. Restoring the state means
         # that DockWidgets are removed from the DockArea internal stack layout
         # which in turn  means, that each time a widget is removed the stack
@@ -660,15 +1569,21 @@ class DockManager(DockContainerWidget):
         # triggers show events for the dock widgets. To avoid this we hide the
         # dock manager. Because there will be no processing of application
         # events until this function is finished, the user will not see this
-        # hiding
-        is_hidden = self.isHidden()
+        # hiding. An incremental restore keeps the dock areas and does not
+        # need this.
+        is_hidden = self.isHidden() or reconciler is not None
         if not is_hidden:
             self.hide()
 
         try:
             self._mgr.restoring_state = True
             self.restoring_state.emit()
-            result = self._mgr.restore_state(state, version)
+            if reconciler is not None:
+                reconciler.apply()
+                self._mgr.emit_top_level_events()
+                result = True
+            else:
+                result = self._mgr.restore_state(snapshot)
         finally:
             self._mgr.restoring_state = False
 
@@ -678,6 +1593,78 @@ class DockManager(DockContainerWidget):
 
         return result
 
+    def restore_state_async(self, state: QByteArray, version: int = 0,
+                            time_slice: int = 10) -> bool:
+        '''
+        Restores the state like restore_state(), but builds the containers
+        and dock areas in time slices from the event loop, so that restoring
+        large layouts does not freeze the application.
+
+        The dock manager is hidden until the restore has finished. The
+        restore_progress signal is emitted after each time slice and
+        state_restored is emitted at the end. While the restore is running,
+        is_restoring_state() returns true and further restore requests are
+        rejected.
+
+        Parameters
+        ----------
+        state : QByteArray
+        version : int
+        time_slice : int, optional
+            The time in milliseconds after which control is returned to the
+            event loop
+
+        Returns
+        -------
+        value : bool
+            True if the restore was started
+        '''
+        if self._mgr.restoring_state:
+            return False
+
+        snapshot = self._mgr.decode_state(state)
+        if snapshot is None or snapshot.version != version:
+            logger.debug('checkFormat: Error checking format!')
+            return False
+
+        return self.restore_snapshot_async(snapshot, time_slice)
+
+    def restore_snapshot_async(self, snapshot: LayoutSnapshot,
+                               time_slice: int = 10) -> bool:
+        '''
+        Asynchronous version of restore_snapshot(), see restore_state_async()
+
+        An incremental restore (see `DockFlags.incremental_restore`) is fast
+        and is always done synchronously.
+
+        Parameters
+        ----------
+        snapshot : LayoutSnapshot
+        time_slice : int, optional
+
+        Returns
+        -------
+        value : bool
+            True if the restore was started
+        '''
+        if self._mgr.restoring_state:
+            return False
+
+        if self._mgr.is_current_layout(snapshot) or (
+                DockFlags.incremental_restore in self._mgr.config_flags
+                and LayoutReconciler(self, snapshot).plan()):
+            return self.restore_snapshot(snapshot)
+
+        self._mgr.create_dock_widgets(snapshot)
+        is_hidden = self.isHidden()
+        if not is_hidden:
+            self.hide()
+
+        self._mgr.restoring_state = True
+        self.restoring_state.emit()
+        self._mgr.start_restore_task(snapshot, time_slice, is_hidden)
+        return True
+
     def add_perspective(self, unique_perspective_name: str):
         '''
         Saves the current perspective to the internal list of perspectives. A
@@ -690,7 +1677,14 @@ class DockManager(DockContainerWidget):
         ----------
         unique_perspective_name : str
         '''
-        self._mgr.perspectives[unique_perspective_name] = self.save_state()
+        state = self.save_state()
+        if self._mgr.perspective_archive is not None:
+            self._mgr.perspective_archive.write(unique_perspective_name, state)
+            # The state is read from the archive when it is needed
+            state = None
+
+        self._mgr.perspectives[unique_perspective_name] = state
+        self._mgr.perspective_cache.pop(unique_perspective_name, None)
         self.perspective_list_changed.emit()
 
     def remove_perspectives(self, *names):
@@ -701,16 +1695,20 @@ class DockManager(DockContainerWidget):
         ----------
         *names : str
         '''
-        count = 0
+        removed = []
         for name in names:
+            self._mgr.perspective_cache.pop(name, None)
             try:
                 del self._mgr.perspectives[name]
             except KeyError:
                 ...
             else:
-                count += 1
+                removed.append(name)
 
-        if count:
+        if removed and self._mgr.perspective_archive is not None:
+            self._mgr.perspective_archive.remove(*removed)
+
+        if removed:
             self.perspectives_removed.emit()
             self.perspective_list_changed.emit()
 
@@ -734,10 +1732,10 @@ class DockManager(DockContainerWidget):
         '''
         settings.beginWriteArray("Perspectives", len(self._mgr.perspectives))
 
-        for i, (key, perspective) in enumerate(self._mgr.perspectives.items()):
+        for i, key in enumerate(self._mgr.perspectives):
             settings.setArrayIndex(i)
             settings.setValue("Name", key)
-            settings.setValue("State", perspective)
+            settings.setValue("State", self._mgr.perspective_state(key))
 
         settings.endArray()
 
@@ -750,6 +1748,7 @@ class DockManager(DockContainerWidget):
         settings : QSettings
         '''
         self._mgr.perspectives.clear()
+        self._mgr.perspective_cache.clear()
         size = settings.beginReadArray("Perspectives")
         if not size:
             settings.endArray()
@@ -765,6 +1764,45 @@ class DockManager(DockContainerWidget):
             self._mgr.perspectives[name] = data
 
         settings.endArray()
+        archive = self._mgr.perspective_archive
+        if archive is not None:
+            archive.replace_all(self._mgr.perspectives)
+            self._mgr.perspectives = dict.fromkeys(archive.names())
+
+    def set_perspective_archive(self, archive: Optional[PerspectiveArchive]):
+        '''
+        Uses the given archive file as the store of all perspectives.
+
+        The perspectives currently held in memory are discarded and replaced
+        by the perspectives of the archive. Only the names are read
+        immediately, the states are read from the archive when a perspective
+        is opened. add_perspective() and remove_perspectives() update the
+        archive file directly and load_perspectives() replaces its content.
+
+        Parameters
+        ----------
+        archive : PerspectiveArchive
+            None to keep the perspectives in memory again
+        '''
+        old_archive = self._mgr.perspective_archive
+        if old_archive is not None and old_archive is not archive:
+            old_archive.close()
+
+        self._mgr.perspective_archive = archive
+        self._mgr.perspective_cache.clear()
+        self._mgr.perspectives = (dict.fromkeys(archive.names())
+                                  if archive is not None else {})
+        self.perspective_list_changed.emit()
+
+    def perspective_archive(self) -> Optional[PerspectiveArchive]:
+        '''
+        Returns the archive that stores the perspectives, if any
+
+        Returns
+        -------
+        value : PerspectiveArchive
+        '''
+        return self._mgr.perspective_archive
 
     def add_toggle_view_action_to_menu(self, toggle_view_action: QAction,
                                        group: str, group_icon: QIcon) -> QAction:
@@ -853,11 +1891,39 @@ class DockManager(DockContainerWidget):
         ----------
         perspective_name : str
         '''
-        try:
-            perspective = self._mgr.perspectives[perspective_name]
-        except KeyError:
+        if perspective_name not in self._mgr.perspectives:
             return
 
         self.opening_perspective.emit(perspective_name)
-        self.restore_state(perspective)
+        snapshot = self._mgr.perspective_snapshot(perspective_name)
+        if snapshot is not None and snapshot.version == 0:
+            self.restore_snapshot(snapshot)
         self.perspective_opened.emit(perspective_name)
+
+    def perspective_cache_info(self) -> PerspectiveCacheInfo:
+        '''
+        Returns the hit and miss counters, the maximum size and the current
+        size of the cache of parsed perspectives used by open_perspective()
+
+        Returns
+        -------
+        value : PerspectiveCacheInfo
+        '''
+        return PerspectiveCacheInfo(self._mgr.perspective_cache_hits,
+                                    self._mgr.perspective_cache_misses,
+                                    self._mgr.perspective_cache_size,
+                                    len(self._mgr.perspective_cache))
+
+    def set_perspective_cache_size(self, size: int):
+        '''
+        Sets the maximum number of parsed perspectives that are kept in
+        memory. A size of 0 disables the cache.
+
+        Parameters
+        ----------
+        size : int
+        '''
+        self._mgr.perspective_cache_size = max(size, 0)
+        cache = self._mgr.perspective_cache
+        while len(cache) > self._mgr.perspective_cache_size:
+            cache.popitem(last=False)
@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import TYPE_CHECKING, Dict, Optional
 
 from qtpy.QtCore import (QEvent, QPoint, QPointF, QRect, Qt, QSizeF, QRectF,
                          QLineF)
@@ -12,6 +12,9 @@ from .enums import OverlayMode, DockWidgetArea, IconColor, area_alignment
 from .dock_container_widget import DockAreaWidget
 from .util import LINUX
 
+if TYPE_CHECKING:
+    from . import DockManager
+
 
 def _drop_indicator_width(label: QLabel) -> float:
     '''
@@ -32,6 +35,7 @@ class DockOverlayPrivate:
     drop_preview_enabled: bool
     mode: OverlayMode
     drop_area_rect: QRect
+    dock_manager: Optional['DockManager']
 
     def __init__(self, public: 'DockOverlay'):
         '''
@@ -49,12 +53,61 @@ class DockOverlayPrivate:
         self.last_location = DockWidgetArea.invalid
         self.drop_preview_enabled = True
         self.mode = OverlayMode.dock_area
-        self.drop_area_rect = None
+        self.drop_area_rect = QRect()
+        self.dock_manager = None
+
+    def preview_rect(self, area: DockWidgetArea) -> QRect:
+        '''
+        Returns the rectangle of the drop preview for the given area
+
+        Parameters
+        ----------
+        area : DockWidgetArea
+
+        Returns
+        -------
+        value : QRect
+            An empty rectangle if there is no preview
+        '''
+        if not self.drop_preview_enabled:
+            return QRect()
+
+        r = self.public.rect()
+        factor = (3
+                  if OverlayMode.container == self.mode
+                  else 2)
+
+        if area == DockWidgetArea.top:
+            r.setHeight(r.height() // factor)
+        elif area == DockWidgetArea.right:
+            r.setX(int(r.width() * (1 - 1./factor)))
+        elif area == DockWidgetArea.bottom:
+            r.setY(int(r.height() * (1 - 1./factor)))
+        elif area == DockWidgetArea.left:
+            r.setWidth(r.width() // factor)
+        elif area != DockWidgetArea.center:
+            return QRect()
+
+        return r
+
+    def update_preview(self):
+        '''
+        Recomputes the drop preview rectangle and repaints only the region
+        covered by the old and the new rectangle
+        '''
+        old_rect = self.drop_area_rect
+        new_rect = self.preview_rect(self.last_location)
+        if new_rect == old_rect:
+            return
+
+        self.drop_area_rect = new_rect
+        self.public.update(old_rect.united(new_rect))
 
 
 class DockOverlay(QFrame):
 
-    def __init__(self, parent: QWidget, mode: OverlayMode):
+    def __init__(self, parent: QWidget, mode: OverlayMode,
+                 dock_manager: 'DockManager' = None):
         '''
         Creates a dock overlay
 
@@ -62,10 +115,14 @@ class DockOverlay(QFrame):
         ----------
         parent : QWidget
         mode : OverlayMode
+        dock_manager : DockManager, optional
+            The dock manager whose drag instrumentation measures the painting
+            of the overlay
         '''
         super().__init__(parent)
         self.d = DockOverlayPrivate(self)
         self.d.mode = mode
+        self.d.dock_manager = dock_manager
         self.d.cross = DockOverlayCross(self)
 
         self.setWindowFlags(Qt.Tool | Qt.FramelessWindowHint)
@@ -137,14 +194,17 @@ class DockOverlay(QFrame):
             # Hint: We could update geometry of overlay here.
             da = self.drop_area_under_cursor()
             if da != self.d.last_location:
-                self.repaint()
                 self.d.last_location = da
+                self.d.update_preview()
 
             return da
 
         self.d.target_widget = target
         self.d.target_rect = QRect()
         self.d.last_location = DockWidgetArea.invalid
+        # A new target repaints the whole overlay
+        self.d.drop_area_rect = QRect()
+        self.update()
 
         # Move it over the target.
         self.resize(target.size())
@@ -153,7 +213,9 @@ class DockOverlay(QFrame):
         self.show()
         self.d.cross.update_position()
         self.d.cross.update_overlay_icons()
-        return self.drop_area_under_cursor()
+        self.d.last_location = self.drop_area_under_cursor()
+        self.d.update_preview()
+        return self.d.last_location
 
     def hide_overlay(self):
         '''
@@ -163,6 +225,7 @@ class DockOverlay(QFrame):
         self.d.target_widget = None
         self.d.target_rect = QRect()
         self.d.last_location = DockWidgetArea.invalid
+        self.d.drop_area_rect = QRect()
 
     def enable_drop_preview(self, enable: bool):
         '''
@@ -173,8 +236,11 @@ class DockOverlay(QFrame):
         ----------
         enable : bool
         '''
+        if enable == self.d.drop_preview_enabled:
+            return
+
         self.d.drop_preview_enabled = enable
-        self.update()
+        self.d.update_preview()
 
     def drop_overlay_rect(self) -> QRect:
         '''
@@ -215,30 +281,26 @@ class DockOverlay(QFrame):
         '''
         #pylint: disable=unused-argument
 
-        # Draw rect based on location
-        if not self.d.drop_preview_enabled:
-            self.d.drop_area_rect = QRect()
+        # The preview rectangle is computed when the drop area changes
+        r = self.d.drop_area_rect
+        if r.isEmpty():
             return
 
-        r = self.rect()
-        da = self.drop_area_under_cursor()
-        factor = (3
-                  if OverlayMode.container == self.d.mode
-                  else 2)
-
-        if da == DockWidgetArea.top:
-            r.setHeight(r.height()/factor)
-        elif da == DockWidgetArea.right:
-            r.setX(r.width() * (1 - 1./factor))
-        elif da == DockWidgetArea.bottom:
-            r.setY(r.height() * (1 - 1./factor))
-        elif da == DockWidgetArea.left:
-            r.setWidth(r.width()/factor)
-        elif da == DockWidgetArea.center:
-            r = self.rect()
-        else:
+        if self.d.dock_manager is None:
+            self.paint_drop_preview(r)
             return
 
+        with self.d.dock_manager.measure('paint_overlay'):
+            self.paint_drop_preview(r)
+
+    def paint_drop_preview(self, r: QRect):
+        '''
+        Paints the drop preview rectangle
+
+        Parameters
+        ----------
+        r : QRect
+        '''
         painter = QPainter(self)
         color = self.palette().color(QPalette.Active, QPalette.Highlight)
 
@@ -252,7 +314,6 @@ class DockOverlay(QFrame):
         color.setAlpha(64)
         painter.setBrush(color)
         painter.drawRect(r.adjusted(0, 0, -1, -1))
-        self.d.drop_area_rect = r
 
     def showEvent(self, e: QShowEvent):
         '''
@@ -277,6 +338,18 @@ class DockOverlay(QFrame):
         super().hideEvent(e)
 
 
+# Drop indicator pixmaps of all overlays, keyed by area, overlay mode,
+# logical size, device pixel ratio and icon colors
+_drop_indicator_pixmaps: Dict[tuple, QPixmap] = {}
+
+
+def clear_drop_indicator_pixmap_cache():
+    '''
+    Removes all cached drop indicator pixmaps
+    '''
+    _drop_indicator_pixmaps.clear()
+
+
 class DockOverlayCrossPrivate:
     public: 'DockOverlayCross'
     mode: OverlayMode
@@ -431,7 +504,8 @@ class DockOverlayCrossPrivate:
             self, size: QSizeF, area: DockWidgetArea,
             mode: OverlayMode) -> QPixmap:
         '''
-        Create high dpi drop indicator pixmap
+        Returns the high dpi drop indicator pixmap from the cache, painting it
+        if required
 
         Parameters
         ----------
@@ -443,9 +517,6 @@ class DockOverlayCrossPrivate:
         -------
         value : QPixmap
         '''
-        border_color = self.icon_color(IconColor.frame_color)
-        background_color = self.icon_color(IconColor.window_background_color)
-
         window = self.public.window()
 
         # QT version compatibility (TODO necessary for qtpy?)
@@ -453,6 +524,42 @@ class DockOverlayCrossPrivate:
                               if hasattr(window, 'devicePixelRatioF')
                               else window.devicePixelRatio())
 
+        # The pixmaps only depend on the key, so they are shared by the
+        # overlays of all dock managers
+        key = (area, mode, size.width(), size.height(),
+               round(device_pixel_ratio, 3),
+               tuple(self.icon_color(color_index).rgba()
+                     for color_index in self.icon_colors))
+        try:
+            return _drop_indicator_pixmaps[key]
+        except KeyError:
+            ...
+
+        pm = self.render_drop_indicator_pixmap(size, area, mode,
+                                               device_pixel_ratio)
+        _drop_indicator_pixmaps[key] = pm
+        return pm
+
+    def render_drop_indicator_pixmap(
+            self, size: QSizeF, area: DockWidgetArea, mode: OverlayMode,
+            device_pixel_ratio: float) -> QPixmap:
+        '''
+        Paints a drop indicator pixmap
+
+        Parameters
+        ----------
+        size : QSizeF
+        area : DockWidgetArea
+        mode : OverlayMode
+        device_pixel_ratio : float
+
+        Returns
+        -------
+        value : QPixmap
+        '''
+        border_color = self.icon_color(IconColor.frame_color)
+        background_color = self.icon_color(IconColor.window_background_color)
+
         pixmap_size = QSizeF(size * device_pixel_ratio)
         pm = QPixmap(pixmap_size.toSize())
         pm.fill(QColor(0, 0, 0, 0))
@@ -757,8 +864,8 @@ class DockOverlayCross(QWidget):
         '''
         self.resize(self.d.dock_overlay.size())
         top_left = self.d.dock_overlay.pos()
-        offest = QPoint((self.width()-self.d.dock_overlay.width())/2,
-                        (self.height()-self.d.dock_overlay.height())/2)
+        offest = QPoint((self.width()-self.d.dock_overlay.width()) // 2,
+                        (self.height()-self.d.dock_overlay.height()) // 2)
         cross_top_left = top_left-offest
         self.move(cross_top_left)
 
@@ -819,7 +926,7 @@ class DockOverlayCross(QWidget):
         # Delete old widgets.
         for area, widget in self.d.drop_indicator_widgets.items():
             self.d.grid_layout.removeWidget(widget)
-            widget.destroyLater()
+            widget.deleteLater()
 
         self.d.drop_indicator_widgets.clear()
 
@@ -1,5 +1,5 @@
 import logging
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Callable, Optional
 
 from qtpy.QtCore import QEvent, QSize, QXmlStreamWriter, Qt, Signal
 from qtpy.QtGui import QIcon
@@ -8,6 +8,7 @@ from qtpy.QtWidgets import (QAction, QBoxLayout, QFrame, QScrollArea,
 
 from .enums import (DockWidgetFeature, WidgetState, ToggleViewActionMode,
                     InsertMode)
+from .layout_snapshot import DockWidgetSnapshot
 from .util import find_parent, emit_top_level_event_for_widget
 
 if TYPE_CHECKING:
@@ -33,6 +34,7 @@ class DockWidgetPrivate:
     tool_bar_icon_size_docked: QSize
     tool_bar_icon_size_floating: QSize
     is_floating_top_level: bool
+    content_factory: Optional[Callable[['DockWidget'], None]]
 
     def __init__(self, public: 'DockWidget'):
         self.public = public
@@ -51,6 +53,7 @@ class DockWidgetPrivate:
         self.tool_bar_icon_size_docked = QSize(16, 16)
         self.tool_bar_icon_size_floating = QSize(24, 24)
         self.is_floating_top_level = False
+        self.content_factory = None
 
     def show_dock_widget(self):
         '''
@@ -247,6 +250,16 @@ class DockWidget(QFrame):
         stream.writeAttribute("Closed", '1' if self.d.closed else '0')
         stream.writeEndElement()
 
+    def snapshot(self) -> DockWidgetSnapshot:
+        '''
+        Returns the current state as a layout snapshot node
+
+        Returns
+        -------
+        value : DockWidgetSnapshot
+        '''
+        return DockWidgetSnapshot(self.objectName(), self.d.closed)
+
     def flag_as_unassigned(self):
         '''
         This is a helper function for the dock manager to flag this widget as
@@ -303,6 +316,9 @@ class DockWidget(QFrame):
         ----------
         open_ : bool
         '''
+        if open_:
+            self.materialize()
+
         dock_container = self.dock_container()
         top_level_dock_widget_before = (dock_container.top_level_dock_widget()
                                         if dock_container else None)
@@ -339,6 +355,42 @@ class DockWidget(QFrame):
 
         self.view_toggled.emit(open_)
 
+    def set_content_factory(self, factory: Callable[['DockWidget'], None]):
+        '''
+        Turns this dock widget into a placeholder whose content is created
+        lazily. The factory is called with this dock widget the first time it
+        is opened and is expected to set its content widget, e.g. via
+        set_widget().
+
+        Parameters
+        ----------
+        factory : callable
+        '''
+        self.d.content_factory = factory
+
+    def is_materialized(self) -> bool:
+        '''
+        Returns false if this dock widget is a placeholder whose content
+        factory has not been called yet
+
+        Returns
+        -------
+        value : bool
+        '''
+        return self.d.content_factory is None
+
+    def materialize(self):
+        '''
+        Calls the pending content factory of a placeholder dock widget
+        '''
+        factory = self.d.content_factory
+        if factory is None:
+            return
+
+        self.d.content_factory = None
+        logger.debug('Creating content of %s', self)
+        factory(self)
+
     def minimumSizeHint(self) -> QSize:
         '''
         We return a fixed minimum size hint for all dock widgets
@@ -429,6 +481,7 @@ class DockWidget(QFrame):
         features : DockWidgetFeature
         '''
         self.d.features = features
+        self.d.tab_widget.update_close_button()
 
     def set_feature(self, flag: DockWidgetFeature, on: bool = True):
         '''
@@ -444,6 +497,7 @@ class DockWidget(QFrame):
             self.d.features |= flag
         else:
             self.d.features &= ~flag
+        self.d.tab_widget.update_close_button()
 
     def features(self) -> DockWidgetFeature:
         '''
@@ -715,7 +769,7 @@ class DockWidget(QFrame):
 
         if self.d.dock_area:
             # update tabs menu
-            self.d.dock_area.mark_title_bar_menu_outdated()
+            self.d.dock_area.update_title_bar_menu_entry(self)
 
     def event(self, e: QEvent) -> bool:
         '''
@@ -732,12 +786,12 @@ class DockWidget(QFrame):
         if e.type() == QEvent.WindowTitleChange:
             title = self.windowTitle()
             if self.d.tab_widget:
-                self.d.tab_widget.setText(title)
+                self.d.tab_widget.set_text(title)
             if self.d.toggle_view_action:
                 self.d.toggle_view_action.setText(title)
             if self.d.dock_area:
                 # update tabs menu
-                self.d.dock_area.mark_title_bar_menu_outdated()
+                self.d.dock_area.update_title_bar_menu_entry(self)
 
             self.title_changed.emit(title)
 
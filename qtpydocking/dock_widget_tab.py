@@ -1,8 +1,11 @@
-from typing import TYPE_CHECKING, no_type_check
+from collections import namedtuple
+from typing import TYPE_CHECKING, Optional, Tuple, Union, no_type_check
 import logging
 
 from qtpy.QtCore import QEvent, QPoint, QSize, Qt, Signal
-from qtpy.QtGui import QContextMenuEvent, QCursor, QFontMetrics, QIcon, QMouseEvent
+from qtpy.QtGui import (QBrush, QContextMenuEvent, QCursor, QFontMetrics,
+                        QGradient, QIcon, QLinearGradient, QMouseEvent,
+                        QPainter, QPaintEvent, QPalette)
 from qtpy.QtWidgets import (QBoxLayout, QFrame, QLabel, QMenu, QSizePolicy,
                             QStyle, QWidget, QPushButton)
 
@@ -11,23 +14,92 @@ from .enums import DragState, DockFlags, DockWidgetArea, DockWidgetFeature
 from .eliding_label import ElidingLabel
 
 if TYPE_CHECKING:
-    from . import (DockWidget, DockAreaWidget, FloatingDockContainer)
+    from . import (DockWidget, DockAreaWidget, FloatingDockContainer,
+                   FloatingDragPreview)
 
 logger = logging.getLogger(__name__)
 
 
+class TabContent(namedtuple('TabContent', ('title_label', 'close_button'))):
+    '''
+    The child widgets of a tab, which virtual tab bars recycle between tabs
+    '''
+
+
+def create_tab_content(style: QStyle) -> TabContent:
+    '''
+    Creates the title label and the close button of a tab
+
+    Parameters
+    ----------
+    style : QStyle
+        The style providing the icon of the close button
+
+    Returns
+    -------
+    value : TabContent
+    '''
+    title_label = ElidingLabel()
+    title_label.set_elide_mode(Qt.ElideRight)
+    title_label.setObjectName("dockWidgetTabLabel")
+    title_label.setAlignment(Qt.AlignCenter)
+    close_button = QPushButton()
+    close_button.setObjectName("tabCloseButton")
+
+    set_button_icon(style, close_button, QStyle.SP_TitleBarCloseButton)
+
+    close_button.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+    close_button.setToolTip("Close Tab")
+    return TabContent(title_label, close_button)
+
+
+# Background brush of active tabs and the cache key of its palette. Only the
+# brush of the most recent palette is kept, as all tabs usually share one.
+_active_tab_brush: Tuple[Optional[int], Optional[QBrush]] = (None, None)
+
+
+def active_tab_brush(palette: QPalette) -> QBrush:
+    '''
+    Returns the background brush of an active tab for the given palette, a
+    gradient from the window to the light color
+
+    Parameters
+    ----------
+    palette : QPalette
+
+    Returns
+    -------
+    value : QBrush
+    '''
+    global _active_tab_brush
+    key, brush = _active_tab_brush
+    if key != palette.cacheKey() or brush is None:
+        gradient = QLinearGradient(0, 0, 0, 0.5)
+        gradient.setCoordinateMode(QGradient.ObjectBoundingMode)
+        gradient.setColorAt(0, palette.color(QPalette.Window))
+        gradient.setColorAt(1, palette.color(QPalette.Light))
+        brush = QBrush(gradient)
+        _active_tab_brush = (palette.cacheKey(), brush)
+    return brush
+
+
 class DockWidgetTabPrivate:
     public: 'DockWidgetTab'
     dock_widget: 'DockWidget'
     icon_label: QLabel
-    title_label: QLabel
+    title_label: Optional[ElidingLabel]
     drag_start_mouse_position: QPoint
     is_active_tab: bool
     dock_area: 'DockAreaWidget'
     drag_state: DragState
-    floating_widget: 'FloatingDockContainer'
+    floating_widget: Union['FloatingDockContainer', 'FloatingDragPreview']
     icon: QIcon
-    close_button: QPushButton
+    close_button: Optional[QPushButton]
+    text: str
+    close_button_visible: bool
+    close_button_size: QSize
+    spacing: int
+    virtual: bool
 
     @no_type_check
     def __init__(self, public: 'DockWidgetTab'):
@@ -49,40 +121,103 @@ class DockWidgetTabPrivate:
         self.floating_widget = None
         self.icon = None
         self.close_button = None
+        self.text = ''
+        self.close_button_visible = False
+        self.close_button_size = QSize()
+        self.spacing = 0
+        self.virtual = False
 
     def create_layout(self):
         '''
-        Creates the complete layout including all controls
+        Creates the layout of the tab. The title label and the close button
+        are added by attach_content().
         '''
-        self.title_label = ElidingLabel(text=self.dock_widget.windowTitle())
-        self.title_label.set_elide_mode(Qt.ElideRight)
-        self.title_label.setObjectName("dockWidgetTabLabel")
-        self.title_label.setAlignment(Qt.AlignCenter)
-        self.close_button = QPushButton()
-        self.close_button.setObjectName("tabCloseButton")
-
-        set_button_icon(self.public.style(), self.close_button,
-                        QStyle.SP_TitleBarCloseButton)
-
-        self.close_button.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
-        self.close_button.setVisible(False)
-        self.close_button.setToolTip("Close Tab")
-        self.close_button.clicked.connect(self.public.close_requested)
-
-        fm = QFontMetrics(self.title_label.font())
-        spacing = round(fm.height()/4.0)
+        self.text = self.dock_widget.windowTitle()
+        fm = QFontMetrics(self.public.font())
+        self.spacing = round(fm.height()/4.0)
 
-        # Fill the layout
         layout = QBoxLayout(QBoxLayout.LeftToRight)
-        layout.setContentsMargins(2*spacing, 0, 0, 0)
+        layout.setContentsMargins(2*self.spacing, 0, 0, 0)
         layout.setSpacing(0)
+        layout.setAlignment(Qt.AlignCenter)
         self.public.setLayout(layout)
+
+    def attach_content(self, content: TabContent):
+        '''
+        Fills the layout with the given title label and close button and
+        updates them to the state of this tab
+
+        Parameters
+        ----------
+        content : TabContent
+        '''
+        self.title_label, self.close_button = content
+        self.title_label.setText(self.text)
+        # Recycled labels may still have the tooltip of another tab
+        self.title_label.setToolTip(self.public.toolTip())
+        self.title_label.setForegroundRole(
+            QPalette.WindowText if self.is_active_tab else QPalette.Dark)
+        self.close_button.setVisible(self.close_button_visible)
+        self.close_button.clicked.connect(self.public.close_requested)
+
+        layout = self.public.layout()
         layout.addWidget(self.title_label, 1)
-        layout.addSpacing(spacing)
+        layout.addSpacing(self.spacing)
         layout.addWidget(self.close_button)
-        layout.addSpacing(round(spacing*4.0/3.0))
-        layout.setAlignment(Qt.AlignCenter)
+        layout.addSpacing(round(self.spacing*4.0/3.0))
         self.title_label.setVisible(True)
+        if self.icon is not None:
+            self.public.set_icon(self.icon)
+
+    def detach_content(self) -> TabContent:
+        '''
+        Removes the title label and the close button from the layout. The
+        state of the tab is kept, so they can be attached again later.
+
+        Returns
+        -------
+        value : TabContent
+        '''
+        self.close_button_size = self.close_button.sizeHint()
+        content = TabContent(self.title_label, self.close_button)
+        self.close_button.clicked.disconnect(self.public.close_requested)
+        if self.icon_label is not None:
+            self.icon_label.deleteLater()
+            self.icon_label = None
+
+        layout = self.public.layout()
+        while layout.count():
+            layout.takeAt(0)
+
+        for widget in content:
+            widget.hide()
+        self.title_label = None
+        self.close_button = None
+        return content
+
+    def size_hint(self) -> QSize:
+        '''
+        Returns the size hint of a virtual tab, computed from the state of
+        the tab without the title label and the close button
+
+        Returns
+        -------
+        value : QSize
+        '''
+        if self.close_button is not None:
+            close_button_size = self.close_button.sizeHint()
+        else:
+            close_button_size = self.close_button_size
+
+        fm = self.public.fontMetrics()
+        spacing = self.spacing
+        width = 3*spacing + fm.width(self.text) + round(spacing*4.0/3.0)
+        if self.close_button_visible:
+            width += close_button_size.width()
+        if self.icon is not None and not self.icon.isNull():
+            width += 16 + round(1.5*spacing)
+        height = max(fm.height(), close_button_size.height())
+        return QSize(width, height)
 
     def move_tab(self, ev: QMouseEvent):
         '''
@@ -171,6 +306,20 @@ class DockWidgetTabPrivate:
 
         from .floating_dock_container import FloatingDockContainer
 
+        if (dragging_state == DragState.floating_widget and
+                self.test_config_flag(DockFlags.drag_preview)):
+            # The content is only moved when the preview is dropped
+            from .floating_drag_preview import FloatingDragPreview
+            if self.dock_area.dock_widgets_count() > 1:
+                self.floating_widget = FloatingDragPreview(
+                    dock_widget=self.dock_widget)
+            else:
+                self.floating_widget = FloatingDragPreview(
+                    dock_area=self.dock_area)
+            self.floating_widget.start_dragging(
+                self.drag_start_mouse_position, size, self.public)
+            return True
+
         if self.dock_area.dock_widgets_count() > 1:
             # If section widget has multiple tabs, we take only one tab
             self.floating_widget = FloatingDockContainer(dock_widget=self.dock_widget)
@@ -240,6 +389,21 @@ class DockWidgetTab(QFrame):
             self.d.drag_start_mouse_position = self.mapFromGlobal(QCursor.pos())
             self.d.start_floating(DragState.inactive)
 
+    def paintEvent(self, ev: QPaintEvent):
+        '''
+        Paints the background of the active tab below the frame of the
+        stylesheet
+
+        Parameters
+        ----------
+        ev : QPaintEvent
+        '''
+        if self.d.is_active_tab:
+            painter = QPainter(self)
+            painter.fillRect(self.rect(), active_tab_brush(self.palette()))
+            painter.end()
+        super().paintEvent(ev)
+
     def mousePressEvent(self, ev: QMouseEvent):
         '''
         Mousepressevent
@@ -378,21 +542,122 @@ class DockWidgetTab(QFrame):
         ----------
         active : bool
         '''
-        closable = DockWidgetFeature.closable in self.d.dock_widget.features()
-        tab_has_close_button = self.d.test_config_flag(DockFlags.active_tab_has_close_button)
-        self.d.close_button.setVisible(active and closable and tab_has_close_button)
         if self.d.is_active_tab == active:
             return
 
         self.d.is_active_tab = active
-        self.style().unpolish(self)
-        self.style().polish(self)
-        self.d.title_label.style().unpolish(self.d.title_label)
-        self.d.title_label.style().polish(self.d.title_label)
+        self.update_close_button()
+        # The active state is not part of the stylesheet, changing it does
+        # not require polishing the tab and the label again
+        if self.d.title_label is not None:
+            self.d.title_label.setForegroundRole(
+                QPalette.WindowText if active else QPalette.Dark)
         self.update()
 
         self.active_tab_changed.emit()
 
+    def update_close_button(self):
+        '''
+        Updates the visibility of the close button. Call this function if
+        the features of the dock widget or the config flags change.
+        '''
+        visible = (self.d.is_active_tab and
+                   self.d.dock_area is not None and
+                   DockWidgetFeature.closable in self.d.dock_widget.features()
+                   and self.d.test_config_flag(
+                       DockFlags.active_tab_has_close_button))
+        if visible == self.d.close_button_visible:
+            return
+
+        self.d.close_button_visible = visible
+        if self.d.close_button is not None:
+            self.d.close_button.setVisible(visible)
+        if self.d.virtual:
+            self.updateGeometry()
+
+    def has_content(self) -> bool:
+        '''
+        Returns true if the tab has its title label and close button. Tabs
+        of a virtual tab bar only have them while they are near the visible
+        part of the tab bar.
+
+        Returns
+        -------
+        value : bool
+        '''
+        return self.d.title_label is not None
+
+    def attach_content(self, content: Optional[TabContent] = None):
+        '''
+        Gives the tab its title label and close button. The given ones,
+        released by another tab, are reused; otherwise new ones are created.
+        Does nothing if the tab already has content.
+
+        Parameters
+        ----------
+        content : TabContent, optional
+        '''
+        if self.d.title_label is None:
+            self.d.attach_content(
+                content or create_tab_content(self.style()))
+
+    def release_content(self) -> Optional[TabContent]:
+        '''
+        Removes the title label and the close button of the tab, e.g. to
+        reuse them for another tab
+
+        Returns
+        -------
+        value : TabContent
+            None if the tab has no content
+        '''
+        if self.d.title_label is None:
+            return None
+        return self.d.detach_content()
+
+    def set_virtual(self, virtual: bool,
+                    close_button_size: Optional[QSize] = None):
+        '''
+        Virtual tabs compute their size hint from their state, so it does
+        not change when the title label and the close button are released
+
+        Parameters
+        ----------
+        virtual : bool
+        close_button_size : QSize, optional
+            The size hint of the close button, used while the tab has no
+            content
+        '''
+        if close_button_size is not None:
+            self.d.close_button_size = QSize(close_button_size)
+        if virtual != self.d.virtual:
+            self.d.virtual = virtual
+            self.updateGeometry()
+
+    def sizeHint(self) -> QSize:
+        '''
+        Sizehint
+
+        Returns
+        -------
+        value : QSize
+        '''
+        if self.d.virtual:
+            return self.d.size_hint()
+        return super().sizeHint()
+
+    def minimumSizeHint(self) -> QSize:
+        '''
+        Minimumsizehint
+
+        Returns
+        -------
+        value : QSize
+        '''
+        if self.d.virtual:
+            return self.d.size_hint()
+        return super().minimumSizeHint()
+
     def dock_widget(self) -> 'DockWidget':
         '''
         Returns the dock widget this title widget belongs to
@@ -431,8 +696,12 @@ class DockWidgetTab(QFrame):
         ----------
         icon : QIcon
         '''
+        self.d.icon = icon
         layout = self.layout()
-        if not self.d.icon_label and icon.isNull():
+        if self.d.virtual:
+            self.updateGeometry()
+        if self.d.title_label is None or (not self.d.icon_label and
+                                          icon.isNull()):
             return
 
         if not self.d.icon_label:
@@ -450,7 +719,6 @@ class DockWidgetTab(QFrame):
             self.d.icon_label.deleteLater()
             self.d.icon_label = None
 
-        self.d.icon = icon
         if self.d.icon_label:
             self.d.icon_label.setPixmap(icon.pixmap(self.windowHandle(), QSize(16, 16)))
             self.d.icon_label.setVisible(True)
@@ -473,7 +741,7 @@ class DockWidgetTab(QFrame):
         -------
         value : str
         '''
-        return self.d.title_label.text()
+        return self.d.text
 
     def set_text(self, title: str):
         '''
@@ -483,7 +751,11 @@ class DockWidgetTab(QFrame):
         ----------
         title : str
         '''
-        self.d.title_label.setText(title)
+        self.d.text = title
+        if self.d.title_label is not None:
+            self.d.title_label.setText(title)
+        if self.d.virtual:
+            self.updateGeometry()
 
     def is_closable(self) -> bool:
         '''
@@ -510,7 +782,8 @@ class DockWidgetTab(QFrame):
         '''
         if e.type() == QEvent.ToolTipChange:
             text = self.toolTip()
-            self.d.title_label.setToolTip(text)
+            if self.d.title_label is not None:
+                self.d.title_label.setToolTip(text)
 
         return super().event(e)
 
@@ -0,0 +1,235 @@
+import bisect
+import json
+import logging
+import pathlib
+import time
+from collections import deque, namedtuple
+from typing import Deque, Dict, List, Tuple, Union
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets in milliseconds
+HISTOGRAM_BUCKETS = (0.1, 0.25, 0.5, 1., 2.5, 5., 10., 25., 50., 100.,
+                     float('inf'))
+
+# The stages measured by the dock manager
+STAGES = (
+    'move',
+    'hit_test',
+    'show_overlay',
+    'paint_overlay',
+    'drop_floating_widget',
+    'drop_into_section',
+    'drop_into_container',
+)
+
+
+class StageStatistics(namedtuple('StageStatistics', ('count', 'mean', 'p50',
+                                                     'p95', 'max'))):
+    '''
+    Statistics of the recorded durations of a stage in milliseconds
+    '''
+
+
+class _Measurement:
+    __slots__ = ('instrumentation', 'stage', 'start')
+
+    def __init__(self, instrumentation: 'DragInstrumentation', stage: str):
+        self.instrumentation = instrumentation
+        self.stage = stage
+        self.start = 0.
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.instrumentation.record(self.stage,
+                                    time.perf_counter() - self.start)
+        return False
+
+
+class DragInstrumentation:
+    window: int
+    _samples: Dict[str, Deque[float]]
+    _totals: Dict[str, int]
+
+    def __init__(self, window: int = 1000):
+        '''
+        Records the duration of the stages of the drag and drop pipeline.
+
+        For each stage the most recent durations are kept in a rolling
+        window, from which histograms and statistics are computed. The
+        measured stages are listed in STAGES: 'move' is the complete
+        processing of a floating widget move, which includes the hit testing
+        of containers and dock areas ('hit_test') and showing the overlays
+        ('show_overlay'). 'paint_overlay' is the paint event of an overlay,
+        the remaining stages measure the drop.
+
+        Parameters
+        ----------
+        window : int, optional
+            The number of recent durations kept per stage
+        '''
+        self.window = window
+        self._samples = {}
+        self._totals = {}
+
+    def __repr__(self):
+        return (f'<{self.__class__.__name__} '
+                f'stages={sorted(self._samples)}>')
+
+    def measure(self, stage: str) -> _Measurement:
+        '''
+        Returns a context manager that records the duration of its block
+
+        Parameters
+        ----------
+        stage : str
+
+        Returns
+        -------
+        value : context manager
+        '''
+        return _Measurement(self, stage)
+
+    def record(self, stage: str, duration: float):
+        '''
+        Records the duration of a stage
+
+        Parameters
+        ----------
+        stage : str
+        duration : float
+            The duration in seconds
+        '''
+        try:
+            samples = self._samples[stage]
+        except KeyError:
+            samples = self._samples[stage] = deque(maxlen=self.window)
+            self._totals[stage] = 0
+
+        samples.append(duration * 1000.)
+        self._totals[stage] += 1
+
+    def stages(self) -> List[str]:
+        '''
+        Returns the stages with recorded durations
+
+        Returns
+        -------
+        value : list of str
+        '''
+        return list(self._samples)
+
+    def samples(self, stage: str) -> List[float]:
+        '''
+        Returns the durations of the rolling window of a stage in
+        milliseconds, oldest first
+
+        Parameters
+        ----------
+        stage : str
+
+        Returns
+        -------
+        value : list of float
+        '''
+        return list(self._samples.get(stage, ()))
+
+    def total_count(self, stage: str) -> int:
+        '''
+        Returns the number of durations recorded for a stage since the last
+        reset, including those that left the rolling window
+
+        Parameters
+        ----------
+        stage : str
+
+        Returns
+        -------
+        value : int
+        '''
+        return self._totals.get(stage, 0)
+
+    def histogram(self, stage: str) -> List[Tuple[float, int]]:
+        '''
+        Returns the histogram of the rolling window of a stage
+
+        Parameters
+        ----------
+        stage : str
+
+        Returns
+        -------
+        value : list of (float, int)
+            The upper bound of each bucket in milliseconds, see
+            HISTOGRAM_BUCKETS, and the number of durations in the bucket
+        '''
+        counts = [0] * len(HISTOGRAM_BUCKETS)
+        for duration in self._samples.get(stage, ()):
+            counts[bisect.bisect_left(HISTOGRAM_BUCKETS, duration)] += 1
+        return list(zip(HISTOGRAM_BUCKETS, counts))
+
+    def statistics(self, stage: str) -> StageStatistics:
+        '''
+        Returns statistics of the rolling window of a stage
+
+        Parameters
+        ----------
+        stage : str
+
+        Returns
+        -------
+        value : StageStatistics
+        '''
+        samples = sorted(self._samples.get(stage, ()))
+        if not samples:
+            return StageStatistics(0, 0., 0., 0., 0.)
+
+        def percentile(fraction):
+            return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+        return StageStatistics(len(samples), sum(samples) / len(samples),
+                               percentile(0.5), percentile(0.95),
+                               samples[-1])
+
+    def reset(self):
+        '''
+        Removes all recorded durations
+        '''
+        self._samples.clear()
+        self._totals.clear()
+
+    def to_dict(self) -> dict:
+        '''
+        Returns all recorded data as a dictionary that can be serialized to
+        JSON
+
+        Returns
+        -------
+        value : dict
+        '''
+        return {
+            stage: {
+                'total_count': self._totals[stage],
+                'statistics': self.statistics(stage)._asdict(),
+                'histogram': [[str(bound), count] for bound, count in
+                              self.histogram(stage)],
+                'samples_ms': list(samples),
+            }
+            for stage, samples in self._samples.items()
+        }
+
+    def export(self, path: Union[str, pathlib.Path]):
+        '''
+        Writes all recorded data to a JSON file
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+        '''
+        with open(path, 'wt') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        logger.debug('Exported %s to %s', self, path)
@@ -0,0 +1,136 @@
+import logging
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
+
+from qtpy.QtCore import QPoint, QRect
+from qtpy.QtWidgets import QWidget
+
+if TYPE_CHECKING:
+    from . import DockContainerWidget
+
+
+logger = logging.getLogger(__name__)
+
+
+def global_rect(widget: QWidget) -> QRect:
+    '''
+    Returns the rectangle of the widget in global coordinates
+
+    Parameters
+    ----------
+    widget : QWidget
+
+    Returns
+    -------
+    value : QRect
+    '''
+    return QRect(widget.mapToGlobal(QPoint(0, 0)), widget.size())
+
+
+class DropTargetIndex:
+    cell_size: int
+    _cells: Dict[Tuple[int, int], List[Tuple[QRect, object, object]]]
+
+    def __init__(self, cell_size: int = 128):
+        '''
+        Uniform grid of drop target rectangles in global coordinates.
+
+        Each target is stored in all grid cells that its rectangle overlaps,
+        so a lookup only tests the few targets of a single cell, independent
+        of the number of containers and dock areas. Targets are grouped by an
+        owner, e.g. the container of a dock area.
+
+        Parameters
+        ----------
+        cell_size : int, optional
+            The width and height of a grid cell in pixels
+        '''
+        self.cell_size = cell_size
+        self._cells = defaultdict(list)
+        self._count = 0
+
+    def __repr__(self):
+        return (f'<{self.__class__.__name__} targets={self._count} '
+                f'cells={len(self._cells)}>')
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, rect: QRect, target, owner=None):
+        '''
+        Adds a drop target
+
+        Parameters
+        ----------
+        rect : QRect
+            The rectangle of the target in global coordinates
+        target : object
+        owner : object, optional
+        '''
+        if rect.isEmpty():
+            return
+
+        size = self.cell_size
+        entry = (QRect(rect), target, owner)
+        for x in range(rect.left() // size, rect.right() // size + 1):
+            for y in range(rect.top() // size, rect.bottom() // size + 1):
+                self._cells[(x, y)].append(entry)
+        self._count += 1
+
+    def targets_at(self, pos: QPoint, owner=None) -> list:
+        '''
+        Returns the targets of the given owner that contain the position, in
+        the order they were added
+
+        Parameters
+        ----------
+        pos : QPoint
+            The position in global coordinates
+        owner : object, optional
+
+        Returns
+        -------
+        value : list
+        '''
+        size = self.cell_size
+        cell = self._cells.get((pos.x() // size, pos.y() // size), ())
+        return [target for rect, target, target_owner in cell
+                if target_owner is owner and rect.contains(pos)]
+
+    def clear(self):
+        '''
+        Removes all targets
+        '''
+        self._cells.clear()
+        self._count = 0
+
+    @classmethod
+    def from_containers(cls, containers: Iterable['DockContainerWidget'],
+                        cell_size: int = 128) -> 'DropTargetIndex':
+        '''
+        Builds the index of the given visible containers and their visible
+        dock areas. Containers are added without an owner, dock areas with
+        their container as owner.
+
+        Parameters
+        ----------
+        containers : iterable of DockContainerWidget
+        cell_size : int, optional
+
+        Returns
+        -------
+        value : DropTargetIndex
+        '''
+        index = cls(cell_size)
+        for container in containers:
+            if not container.isVisible():
+                continue
+
+            index.add(global_rect(container), container)
+            for i in range(container.dock_area_count()):
+                dock_area = container.dock_area(i)
+                if dock_area.isVisible():
+                    index.add(global_rect(dock_area), dock_area, container)
+
+        logger.debug('Built %s', index)
+        return index
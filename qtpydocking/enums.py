@@ -75,6 +75,26 @@ class DockFlags(enum.IntFlag):
     # If enabled, the XML output will be compressed and is not human readable
     # anymore
     xml_compression = 0x20
+    # If enabled, restoring a state or opening a perspective only moves,
+    # resizes, opens and closes what differs from the current layout, as long
+    # as the splitter structure is the same
+    incremental_restore = 0x40
+    # If enabled, save_state() writes the compact binary format instead of
+    # XML. restore_state() detects the format automatically.
+    binary_state = 0x80
+    # If enabled, the drop overlays are updated at most once per screen
+    # refresh while a floating widget is dragged, using the latest cursor
+    # position
+    drag_pacing = 0x100
+    # If enabled, dragging a dock widget or dock area out of its dock area
+    # drags a translucent snapshot of the content. The content itself is only
+    # moved on drop, and stays where it is if the drag is cancelled.
+    drag_preview = 0x200
+    # If enabled, the tabs of a dock area only have a title label and a close
+    # button while they are near the visible part of the tab bar. The widgets
+    # are recycled as the tab bar is scrolled, which keeps dock areas with
+    # hundreds of tabs cheap.
+    virtual_tabs = 0x400
     # the default configuration
     default_config = (active_tab_has_close_button
                       | dock_area_has_close_button
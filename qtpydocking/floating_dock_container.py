@@ -1,28 +1,28 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Generator, Optional
 import logging
 
-from qtpy.QtCore import (QEvent, QObject, QPoint, QRect, QSize, QXmlStreamReader, Qt)
-from qtpy.QtGui import QCloseEvent, QCursor, QGuiApplication, QHideEvent, QMoveEvent
+from qtpy.QtCore import (QEvent, QObject, QPoint, QRect, QSize, QTimer, Qt)
+from qtpy.QtGui import (QCloseEvent, QCursor, QGuiApplication, QHideEvent,
+                        QMoveEvent, QResizeEvent)
 from qtpy.QtWidgets import QApplication, QBoxLayout, QWidget, QDockWidget
 
-from .enums import DockWidgetFeature, DragState, DockWidgetArea
-from .util import QT_VERSION_TUPLE, LINUX, event_filter_decorator
+from .enums import DockFlags, DockWidgetFeature, DragState, DockWidgetArea
+from .util import (QT_VERSION_TUPLE, LINUX, event_filter_decorator,
+                   run_to_completion)
 from .dock_container_widget import DockContainerWidget
 from .floating_widget_title_bar import FloatingWidgetTitleBar
 
 if TYPE_CHECKING:
     from . import DockAreaWidget, DockWidget, DockManager
+    from .layout_snapshot import ContainerSnapshot
 
 
 logger = logging.getLogger(__name__)
 
-_z_order_counter = 0  # TODO
-
 
 class FloatingDockContainerPrivate:
     public: 'FloatingDockContainer'
     dock_container: DockContainerWidget
-    z_order_index: int
     dock_manager: 'DockManager'
     dragging_state: DragState
     drag_start_mouse_position: QPoint
@@ -30,6 +30,8 @@ class FloatingDockContainerPrivate:
     single_dock_area: 'DockAreaWidget'
     mouse_event_handler: QWidget
     title_bar: FloatingWidgetTitleBar
+    drop_overlay_timer: Optional[QTimer]
+    pending_drop_overlay_pos: Optional[QPoint]
 
     def __init__(self, public):
         '''
@@ -42,10 +44,6 @@ class FloatingDockContainerPrivate:
         self.public = public
         self.dock_container = None
 
-        global _z_order_counter  # TODO
-        _z_order_counter += 1
-        self.z_order_index = _z_order_counter
-
         self.dock_manager = None
         self.dragging_state = DragState.inactive
         self.drag_start_mouse_position = QPoint()
@@ -55,8 +53,12 @@ class FloatingDockContainerPrivate:
         # For Linux, specifically (TODO - better split?)
         self.mouse_event_handler = None
         self.title_bar = None
+        self.drop_overlay_timer = None
+        self.pending_drop_overlay_pos = None
 
     def title_mouse_release_event(self):
+        # The drop decision depends on the overlays at the release position
+        self.flush_drop_overlay_update()
         self.set_state(DragState.inactive)
         if not self.drop_container:
             logger.debug('title_mouse_release_event: no drop container?')
@@ -94,7 +96,9 @@ class FloatingDockContainerPrivate:
                 qapp = QApplication.instance()
                 qapp.processEvents()
 
-            self.drop_container.drop_floating_widget(self.public, QCursor.pos())
+            with dock_manager.measure('drop_floating_widget'):
+                self.drop_container.drop_floating_widget(self.public,
+                                                         QCursor.pos())
 
         container_overlay.hide_overlay()
         dock_area_overlay.hide_overlay()
@@ -110,19 +114,62 @@ class FloatingDockContainerPrivate:
         if not self.public.isVisible() or not self.dock_manager:
             return
 
-        top_container = None
-        for container_widget in self.dock_manager.dock_containers():
-            if not container_widget.isVisible():
-                continue
-            if self.dock_container is container_widget:
-                continue
+        measure = self.dock_manager.measure
+        with measure('move'):
+            with measure('hit_test'):
+                top_container = self.top_container_at(global_pos)
+                dock_area = (top_container.dock_area_at(global_pos)
+                             if top_container is not None else None)
+
+            self.drop_container = top_container
+            with measure('show_overlay'):
+                self.show_drop_overlays(top_container, dock_area)
+
+    def top_container_at(self, global_pos: QPoint
+                         ) -> Optional[DockContainerWidget]:
+        '''
+        Returns the front-most visible container at the given position,
+        except the container of this floating widget
+
+        Parameters
+        ----------
+        global_pos : QPoint
+
+        Returns
+        -------
+        value : DockContainerWidget
+        '''
+        index = self.dock_manager.drop_target_index()
+        if index is not None:
+            candidates = set(index.targets_at(global_pos))
+            candidates.discard(self.dock_container)
+            if len(candidates) <= 1:
+                return candidates.pop() if candidates else None
+
+            for container_widget in self.dock_manager.z_ordered_containers():
+                if container_widget in candidates:
+                    return container_widget
+            return None
+
+        # Walk the z-order from front to back; the first hit is the top
+        for container_widget in self.dock_manager.z_ordered_containers():
+            if (container_widget is not self.dock_container and
+                    container_widget.isVisible() and container_widget.rect(
+                    ).contains(container_widget.mapFromGlobal(global_pos))):
+                return container_widget
 
-            mapped_pos = container_widget.mapFromGlobal(global_pos)
-            if container_widget.rect().contains(mapped_pos):
-                if not top_container or container_widget.is_in_front_of(top_container):
-                    top_container = container_widget
+        return None
 
-        self.drop_container = top_container
+    def show_drop_overlays(self, top_container: Optional[DockContainerWidget],
+                           dock_area: Optional['DockAreaWidget']):
+        '''
+        Shows the container and dock area overlays for the drop target
+
+        Parameters
+        ----------
+        top_container : DockContainerWidget
+        dock_area : DockAreaWidget
+        '''
         container_overlay = self.dock_manager.container_overlay()
         dock_area_overlay = self.dock_manager.dock_area_overlay()
         if not top_container:
@@ -132,7 +179,7 @@ class FloatingDockContainerPrivate:
             return
 
         logger.debug('update_drop_overlays: top container=%s name=%s',
-                     self.drop_container, self.drop_container.objectName())
+                     top_container, top_container.objectName())
 
         visible_dock_areas = top_container.visible_dock_area_count()
         container_overlay.set_allowed_areas(
@@ -143,8 +190,6 @@ class FloatingDockContainerPrivate:
 
         container_area = container_overlay.show_overlay(top_container)
         container_overlay.enable_drop_preview(container_area != DockWidgetArea.invalid)
-        dock_area = top_container.dock_area_at(global_pos)
-
         if dock_area and dock_area.isVisible() and visible_dock_areas > 0:
             dock_area_overlay.enable_drop_preview(True)
             dock_area_overlay.set_allowed_areas(
@@ -166,6 +211,57 @@ class FloatingDockContainerPrivate:
         else:
             dock_area_overlay.hide_overlay()
 
+    def request_drop_overlay_update(self, global_pos: QPoint):
+        '''
+        Updates the drop overlays for the given cursor position. With the
+        `DockFlags.drag_pacing` flag, only the latest position is recorded
+        and the update is done once per frame interval.
+
+        Parameters
+        ----------
+        global_pos : QPoint
+        '''
+        if (self.dock_manager is None or DockFlags.drag_pacing
+                not in self.dock_manager.config_flags()):
+            self.update_drop_overlays(global_pos)
+            return
+
+        self.pending_drop_overlay_pos = QPoint(global_pos)
+        if self.drop_overlay_timer is None:
+            self.drop_overlay_timer = QTimer(self.public)
+            self.drop_overlay_timer.setSingleShot(True)
+            self.drop_overlay_timer.timeout.connect(
+                self.flush_drop_overlay_update)
+
+        if not self.drop_overlay_timer.isActive():
+            self.drop_overlay_timer.start(self.frame_interval())
+
+    def flush_drop_overlay_update(self):
+        '''
+        Processes a pending drop overlay update immediately
+        '''
+        if self.drop_overlay_timer is not None:
+            self.drop_overlay_timer.stop()
+
+        global_pos = self.pending_drop_overlay_pos
+        self.pending_drop_overlay_pos = None
+        if global_pos is not None:
+            self.update_drop_overlays(global_pos)
+
+    def frame_interval(self) -> int:
+        '''
+        Returns the refresh interval of the screen in milliseconds
+
+        Returns
+        -------
+        value : int
+        '''
+        window = self.public.windowHandle()
+        screen = (window.screen() if window is not None
+                  else QGuiApplication.primaryScreen())
+        rate = screen.refreshRate() if screen is not None else 0
+        return max(1, int(1000 / rate)) if rate > 0 else 16
+
     def set_state(self, state_id: DragState):
         '''
         Set state
@@ -174,7 +270,26 @@ class FloatingDockContainerPrivate:
         ----------
         state_id : DragState
         '''
+        previous_state = self.dragging_state
         self.dragging_state = state_id
+        if self.dock_manager is None or state_id == previous_state:
+            return
+
+        if state_id == DragState.floating_widget:
+            self.dock_manager.build_drop_target_index(self.dock_container)
+            # The mouse release is not received if the floating widget is
+            # behind the drop overlay cross. The application wide filter is
+            # only installed while dragging.
+            QApplication.instance().installEventFilter(self.public)
+        elif previous_state == DragState.floating_widget:
+            QApplication.instance().removeEventFilter(self.public)
+            # A drag that ends without a drop discards the pending update
+            if self.drop_overlay_timer is not None:
+                self.drop_overlay_timer.stop()
+            self.pending_drop_overlay_pos = None
+            self.dock_manager.release_drop_target_index()
+            # Moves during the drag are not reported individually
+            self.dock_manager.notify_layout_changed()
 
     def set_window_title(self, text: str):
         if LINUX:
@@ -237,11 +352,6 @@ class FloatingDockContainer(FloatingWidgetBase):
 
         dock_manager.register_floating_widget(self)
 
-        # We install an event filter to detect mouse release events because we
-        # do not receive mouse release event if the floating widget is behind
-        # the drop overlay cross
-        qapp = QApplication.instance()
-        qapp.installEventFilter(self)
         if dock_area is not None:
             dock_container.add_dock_area(dock_area)
         elif dock_widget is not None:
@@ -376,23 +486,36 @@ class FloatingDockContainer(FloatingWidgetBase):
         move_to_pos = QCursor.pos()-self.d.drag_start_mouse_position-QPoint(border_size, 0)
         self.move(move_to_pos)
 
-    def restore_state(self, stream: QXmlStreamReader, testing: bool) -> bool:
+    def restore_state(self, state: 'ContainerSnapshot') -> bool:
+        '''
+        Restores the state from the given, already validated, container
+        snapshot
+
+        Parameters
+        ----------
+        state : ContainerSnapshot
+
+        Returns
+        -------
+        value : bool
+        '''
+        return run_to_completion(self.iter_restore_state(state))
+
+    def iter_restore_state(self, state: 'ContainerSnapshot'
+                           ) -> Generator[None, None, bool]:
         '''
-        Restores the state from given stream. If Testing is true, the function
-        only parses the data from the given stream but does not restore
-        anything. You can use this check for faulty files before you start
-        restoring the state
+        Generator version of restore_state() that yields after each restored
+        dock area
 
         Parameters
         ----------
-        stream : QXmlStreamReader
-        testing : bool
+        state : ContainerSnapshot
 
         Returns
         -------
         value : bool
         '''
-        if not self.d.dock_container.restore_state(stream, testing):
+        if not (yield from self.d.dock_container.iter_restore_state(state)):
             return False
 
         self.on_dock_areas_added_or_removed()
@@ -421,9 +544,8 @@ class FloatingDockContainer(FloatingWidgetBase):
         QWidget.changeEvent(self, event)
         if (event.type() == QEvent.ActivationChange) and self.isActiveWindow():
             logger.debug('FloatingWidget.changeEvent QEvent.ActivationChange ')
-            global _z_order_counter  # TODO
-            _z_order_counter += 1
-            self.d.z_order_index = _z_order_counter
+            if self.d.dock_manager:
+                self.d.dock_manager.raise_dock_container(self.d.dock_container)
 
     def moveEvent(self, event: QMoveEvent):
         '''
@@ -435,11 +557,26 @@ class FloatingDockContainer(FloatingWidgetBase):
         '''
         QWidget.moveEvent(self, event)
         state = self.d.dragging_state
+        if self.d.dock_manager is not None and state == DragState.inactive:
+            self.d.dock_manager.notify_layout_changed()
+
         if state == DragState.mouse_pressed:
             self.d.set_state(DragState.floating_widget)
-            self.d.update_drop_overlays(QCursor.pos())
+            self.d.request_drop_overlay_update(QCursor.pos())
         elif state == DragState.floating_widget:
-            self.d.update_drop_overlays(QCursor.pos())
+            self.d.request_drop_overlay_update(QCursor.pos())
+
+    def resizeEvent(self, event: QResizeEvent):
+        '''
+        Resizeevent
+
+        Parameters
+        ----------
+        event : QResizeEvent
+        '''
+        QWidget.resizeEvent(self, event)
+        if self.d.dock_manager is not None:
+            self.d.dock_manager.notify_layout_changed()
 
     def event(self, e: QEvent) -> bool:
         '''
@@ -561,8 +698,6 @@ class FloatingDockContainer(FloatingWidgetBase):
         if event.type() == QEvent.MouseButtonRelease:
             logger.debug('MouseButtonRelease')
             if self.d.dragging_state == DragState.floating_widget:
-                qapp = QApplication.instance()
-                qapp.removeEventFilter(self)
                 logger.debug('FloatingWidget.eventFilter QEvent.MouseButtonRelease')
                 self.finish_dragging()
                 self.d.title_mouse_release_event()
@@ -0,0 +1,290 @@
+from typing import TYPE_CHECKING, Optional, Union
+import logging
+
+from qtpy.QtCore import QEvent, QObject, QPoint, QSize, Qt
+from qtpy.QtGui import (QCursor, QMoveEvent, QPainter, QPaintEvent, QPalette,
+                        QPixmap)
+from qtpy.QtWidgets import QWidget
+
+from .enums import DragState, DockWidgetArea
+from .util import create_transparent_pixmap, event_filter_decorator
+from .dock_container_widget import DockContainerWidget
+from .floating_dock_container import (FloatingDockContainer,
+                                      FloatingDockContainerPrivate)
+
+if TYPE_CHECKING:
+    from . import DockAreaWidget, DockWidget
+
+
+logger = logging.getLogger(__name__)
+
+# The opacity of the content snapshot
+PREVIEW_OPACITY = 0.6
+
+
+class FloatingDragPreviewPrivate(FloatingDockContainerPrivate):
+    public: 'FloatingDragPreview'
+    content: Union['DockWidget', 'DockAreaWidget']
+    content_source_area: 'DockAreaWidget'
+    content_pixmap: QPixmap
+
+    def __init__(self, public):
+        '''
+        Private data constructor
+
+        Parameters
+        ----------
+        public : FloatingDragPreview
+        '''
+        super().__init__(public)
+        self.content = None
+        self.content_source_area = None
+        self.content_pixmap = QPixmap()
+
+    def is_content_source_area(self, dock_area: Optional['DockAreaWidget']
+                               ) -> bool:
+        '''
+        Returns true if dropping onto the given dock area would drop the
+        content onto itself
+
+        Parameters
+        ----------
+        dock_area : DockAreaWidget
+
+        Returns
+        -------
+        value : bool
+        '''
+        if dock_area is None or dock_area is not self.content_source_area:
+            return False
+        return (self.content is dock_area or
+                dock_area.open_dock_widgets_count() == 1)
+
+    def show_drop_overlays(self, top_container: Optional[DockContainerWidget],
+                           dock_area: Optional['DockAreaWidget']):
+        '''
+        Shows the container and dock area overlays for the drop target. The
+        dock area of the dragged content is no drop target.
+
+        Parameters
+        ----------
+        top_container : DockContainerWidget
+        dock_area : DockAreaWidget
+        '''
+        if self.is_content_source_area(dock_area):
+            dock_area = None
+        super().show_drop_overlays(top_container, dock_area)
+
+    def create_floating_widget(self) -> FloatingDockContainer:
+        '''
+        Moves the content into a new floating widget with the geometry of the
+        preview. The floating widget is not shown.
+
+        Returns
+        -------
+        value : FloatingDockContainer
+        '''
+        if self.content is self.content_source_area:
+            floating_widget = FloatingDockContainer(dock_area=self.content)
+        else:
+            floating_widget = FloatingDockContainer(dock_widget=self.content)
+
+        floating_widget.setGeometry(self.public.geometry())
+        return floating_widget
+
+    def title_mouse_release_event(self):
+        # The drop decision depends on the overlays at the release position
+        self.flush_drop_overlay_update()
+        self.set_state(DragState.inactive)
+
+        dock_manager = self.dock_manager
+        dock_area_overlay = dock_manager.dock_area_overlay()
+        container_overlay = dock_manager.container_overlay()
+        drop = self.drop_container is not None and any(
+            widget.drop_area_under_cursor() != DockWidgetArea.invalid
+            for widget in (dock_area_overlay, container_overlay))
+
+        # The content is only re-parented now
+        floating_widget = self.create_floating_widget()
+        if drop:
+            with dock_manager.measure('drop_floating_widget'):
+                self.drop_container.drop_floating_widget(floating_widget,
+                                                         QCursor.pos())
+
+        container_overlay.hide_overlay()
+        dock_area_overlay.hide_overlay()
+
+        # Without a drop target the content stays floating where it was
+        # released
+        if floating_widget.dock_container() is not None:
+            floating_widget.show()
+            top_level_dock_widget = floating_widget.top_level_dock_widget()
+            if top_level_dock_widget is not None:
+                top_level_dock_widget.emit_top_level_changed(True)
+
+        self.public.deleteLater()
+
+
+class FloatingDragPreview(QWidget):
+    def __init__(self, *, dock_area: 'DockAreaWidget' = None,
+                 dock_widget: 'DockWidget' = None):
+        '''
+        A translucent snapshot of a dock area or dock widget that is dragged
+        instead of a floating widget with the real content, see
+        `DockFlags.drag_preview`.
+
+        The content is rendered once into a pixmap and stays in its dock
+        area while the preview is dragged. It is only moved when the preview
+        is dropped, into the drop target or into a new floating widget at
+        the release position. Pressing escape cancels the drag and leaves
+        the content untouched.
+
+        Parameters
+        ----------
+        dock_area : DockAreaWidget
+            Drag the given dock area with all its dock widgets
+        dock_widget : DockWidget
+            Drag the given dock widget
+        '''
+        if dock_area is not None:
+            content, source_area = dock_area, dock_area
+        elif dock_widget is not None:
+            content, source_area = dock_widget, dock_widget.dock_area_widget()
+        else:
+            raise ValueError('Must pass in either dock_area or dock_widget')
+
+        dock_manager = content.dock_manager()
+        super().__init__(dock_manager)
+        self.d = FloatingDragPreviewPrivate(self)
+        self.d.dock_manager = dock_manager
+        self.d.content = content
+        self.d.content_source_area = source_area
+
+        pixmap = content.grab()
+        self.d.content_pixmap = create_transparent_pixmap(pixmap,
+                                                          PREVIEW_OPACITY)
+        self.d.content_pixmap.setDevicePixelRatio(pixmap.devicePixelRatio())
+
+        self.setWindowFlags(Qt.Tool | Qt.FramelessWindowHint |
+                            Qt.WindowStaysOnTopHint)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setAttribute(Qt.WA_ShowWithoutActivating)
+
+    def __repr__(self):
+        return f'<FloatingDragPreview content={self.d.content}>'
+
+    def content(self) -> Union['DockWidget', 'DockAreaWidget']:
+        '''
+        The dragged dock area or dock widget
+
+        Returns
+        -------
+        value : DockWidget or DockAreaWidget
+        '''
+        return self.d.content
+
+    def start_dragging(self, drag_start_mouse_pos: QPoint, size: QSize,
+                       mouse_event_handler: QWidget = None):
+        '''
+        Call this function to start dragging the preview
+
+        Parameters
+        ----------
+        drag_start_mouse_pos : QPoint
+        size : QSize
+        mouse_event_handler : QWidget
+            Unused, the widget that started the drag keeps the mouse
+        '''
+        #pylint: disable=unused-argument
+        self.resize(size)
+        self.d.drag_start_mouse_position = drag_start_mouse_pos
+        self.d.set_state(DragState.floating_widget)
+        self.move_floating()
+        self.show()
+
+    def move_floating(self):
+        '''
+        Moves the preview to a new position relative to the position given
+        when start_dragging() was called
+        '''
+        self.move(QCursor.pos() - self.d.drag_start_mouse_position)
+
+    def finish_dragging(self):
+        '''
+        Drops the content at the current cursor position
+        '''
+        if self.d.dragging_state == DragState.floating_widget:
+            self.d.title_mouse_release_event()
+
+    def cancel_dragging(self):
+        '''
+        Cancels the drag, the content stays where it is
+        '''
+        logger.debug('FloatingDragPreview.cancel_dragging')
+        self.d.set_state(DragState.inactive)
+        self.d.dock_manager.container_overlay().hide_overlay()
+        self.d.dock_manager.dock_area_overlay().hide_overlay()
+        self.hide()
+        self.deleteLater()
+
+    def moveEvent(self, event: QMoveEvent):
+        '''
+        Moveevent
+
+        Parameters
+        ----------
+        event : QMoveEvent
+        '''
+        super().moveEvent(event)
+        if self.d.dragging_state == DragState.floating_widget:
+            self.d.request_drop_overlay_update(QCursor.pos())
+
+    def paintEvent(self, event: QPaintEvent):
+        '''
+        Paints the content snapshot with a frame
+
+        Parameters
+        ----------
+        event : QPaintEvent
+            Unused
+        '''
+        #pylint: disable=unused-argument
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.d.content_pixmap)
+        painter.setPen(self.palette().color(QPalette.Active,
+                                            QPalette.Highlight))
+        painter.drawRect(self.rect().adjusted(0, 0, -1, -1))
+
+    @event_filter_decorator
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        '''
+        Finishes the drag on mouse release and cancels it on escape. The
+        release of the mouse button and the escape key are delivered to the
+        widget that started the drag, so the filter is installed on the
+        application while dragging.
+
+        Parameters
+        ----------
+        watched : QObject
+            Unused
+        event : QEvent
+
+        Returns
+        -------
+        value : bool
+        '''
+        #pylint: disable=unused-argument
+        if self.d.dragging_state != DragState.floating_widget:
+            return False
+
+        if event.type() == QEvent.MouseButtonRelease:
+            logger.debug('FloatingDragPreview.eventFilter '
+                         'QEvent.MouseButtonRelease')
+            self.finish_dragging()
+        elif (event.type() == QEvent.KeyPress and
+              event.key() == Qt.Key_Escape):
+            self.cancel_dragging()
+            return True
+
+        return False
@@ -0,0 +1,254 @@
+import logging
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from qtpy.QtCore import QByteArray
+from qtpy.QtWidgets import QSplitter, QWidget
+
+from .dock_area_widget import DockAreaWidget
+from .layout_snapshot import DockAreaSnapshot, LayoutSnapshot, SplitterSnapshot
+
+if TYPE_CHECKING:
+    from . import DockManager, DockWidget, FloatingDockContainer
+
+
+logger = logging.getLogger(__name__)
+
+
+class LayoutReconciler:
+    dock_manager: 'DockManager'
+    snapshot: LayoutSnapshot
+    areas: List[Tuple[DockAreaWidget, DockAreaSnapshot]]
+    splitters: List[Tuple[QSplitter, SplitterSnapshot]]
+    floating: List[Tuple['FloatingDockContainer', bytes]]
+    moves: List[Tuple['DockWidget', Optional[DockAreaWidget]]]
+
+    def __init__(self, dock_manager: 'DockManager', snapshot: LayoutSnapshot):
+        '''
+        Applies a layout snapshot to the live widget tree of a dock manager by
+        changing only what differs, instead of rebuilding all dock areas and
+        splitters.
+
+        The reconciler works if the splitter tree of every container has the
+        same shape as in the snapshot. Dock widgets are then moved between the
+        existing dock areas, splitters are resized and dock widgets are opened
+        or closed as required. Call plan() first; if it returns False, the
+        layout has to be restored from scratch.
+
+        Parameters
+        ----------
+        dock_manager : DockManager
+        snapshot : LayoutSnapshot
+        '''
+        self.dock_manager = dock_manager
+        self.snapshot = snapshot
+        self.areas = []
+        self.splitters = []
+        self.floating = []
+        self.moves = []
+
+    def plan(self) -> bool:
+        '''
+        Matches the snapshot against the live layout and computes the dock
+        widget moves. Nothing is changed by this function.
+
+        Returns
+        -------
+        value : bool
+            True if the snapshot can be applied incrementally
+        '''
+        containers = self.dock_manager.dock_containers()
+        if len(containers) != len(self.snapshot.containers):
+            return False
+
+        for container, state in zip(containers, self.snapshot.containers):
+            if container.is_floating() != state.floating or state.root is None:
+                return False
+
+            if not self.match_node(container.root_splitter(), state.root):
+                return False
+
+            if state.floating:
+                self.floating.append((container.floating_widget(),
+                                      state.geometry))
+
+        return self.plan_moves()
+
+    def match_node(self, widget: QWidget, node) -> bool:
+        '''
+        Recursively matches a live splitter or dock area with a snapshot node
+
+        Parameters
+        ----------
+        widget : QWidget
+        node : SplitterSnapshot or DockAreaSnapshot
+
+        Returns
+        -------
+        value : bool
+        '''
+        if isinstance(node, DockAreaSnapshot):
+            if not isinstance(widget, DockAreaWidget):
+                return False
+
+            self.areas.append((widget, node))
+            return True
+
+        if (not isinstance(widget, QSplitter)
+                or widget.orientation() != node.orientation
+                or widget.count() != len(node.children)):
+            return False
+
+        self.splitters.append((widget, node))
+        return all(self.match_node(widget.widget(i), child)
+                   for i, child in enumerate(node.children))
+
+    def target_dock_widgets(self, node: DockAreaSnapshot) -> list:
+        '''
+        Returns the registered dock widgets of the given area snapshot
+
+        Parameters
+        ----------
+        node : DockAreaSnapshot
+
+        Returns
+        -------
+        value : list of DockWidget
+        '''
+        dock_widgets = (self.dock_manager.find_dock_widget(widget.name)
+                        for widget in node.widgets)
+        return [dock_widget for dock_widget in dock_widgets
+                if dock_widget is not None]
+
+    def plan_moves(self) -> bool:
+        '''
+        Computes the dock widgets that need to change their dock area.
+
+        A dock widget is only moved out of an area that keeps at least one
+        other dock widget, because an empty dock area would be deleted and
+        change the layout structure.
+
+        Returns
+        -------
+        value : bool
+        '''
+        target: Dict['DockWidget', DockAreaWidget] = {}
+        counts: Dict[DockAreaWidget, int] = {}
+        for area, node in self.areas:
+            dock_widgets = self.target_dock_widgets(node)
+            if not dock_widgets:
+                return False
+
+            for dock_widget in dock_widgets:
+                target[dock_widget] = area
+
+            counts[area] = area.dock_widgets_count()
+
+        registered = set(self.dock_manager.dock_widgets_map().values())
+        pending = []
+        for area, _ in self.areas:
+            for dock_widget in area.dock_widgets():
+                if dock_widget not in registered:
+                    return False
+
+                target_area = target.get(dock_widget)
+                if target_area is not area:
+                    pending.append((dock_widget, target_area))
+
+        for dock_widget, area in target.items():
+            source = dock_widget.dock_area_widget()
+            if source is None:
+                pending.append((dock_widget, area))
+            elif source not in counts:
+                return False
+
+        while pending:
+            remaining = []
+            for dock_widget, area in pending:
+                source = dock_widget.dock_area_widget()
+                if source is not None:
+                    if counts[source] <= 1:
+                        remaining.append((dock_widget, area))
+                        continue
+
+                    counts[source] -= 1
+
+                if area is not None:
+                    counts[area] += 1
+
+                self.moves.append((dock_widget, area))
+
+            if len(remaining) == len(pending):
+                logger.debug('Dock widget moves would empty a dock area')
+                return False
+
+            pending = remaining
+
+        return True
+
+    def apply(self):
+        '''
+        Applies the planned changes to the live layout
+        '''
+        for dock_widget, area in self.moves:
+            source = dock_widget.dock_area_widget()
+            if source is not None:
+                source.remove_dock_widget(dock_widget)
+
+            if area is None:
+                dock_widget.flag_as_unassigned()
+            else:
+                area.insert_dock_widget(area.dock_widgets_count(),
+                                        dock_widget, False)
+
+        for area, node in self.areas:
+            for index, dock_widget in enumerate(
+                    self.target_dock_widgets(node)):
+                area.move_dock_widget(dock_widget, index)
+
+        for area, node in self.areas:
+            for widget in node.widgets:
+                dock_widget = self.dock_manager.find_dock_widget(widget.name)
+                if (dock_widget is not None
+                        and dock_widget.is_closed() != widget.closed):
+                    dock_widget.toggle_view_internal(not widget.closed)
+
+        for area, node in self.areas:
+            self.restore_current_dock_widget(area, node)
+
+        for splitter, node in self.splitters:
+            sizes = list(node.sizes)
+            if splitter.sizes() != sizes:
+                splitter.setSizes(sizes)
+
+        for floating_widget, geometry in self.floating:
+            geometry = QByteArray(geometry)
+            if floating_widget.saveGeometry() != geometry:
+                floating_widget.restoreGeometry(geometry)
+
+            floating_widget.update_window_title()
+
+    def restore_current_dock_widget(self, area: DockAreaWidget,
+                                    node: DockAreaSnapshot):
+        '''
+        Activates the saved current dock widget of the given area and shows
+        the area again if moving dock widgets has hidden it
+
+        Parameters
+        ----------
+        area : DockAreaWidget
+        node : DockAreaSnapshot
+        '''
+        current = self.dock_manager.find_dock_widget(node.current)
+        if (current is None or current.is_closed()
+                or current.dock_area_widget() is not area):
+            opened = area.opened_dock_widgets()
+            current = opened[0] if opened else None
+
+        if current is None:
+            return
+
+        if area.isHidden():
+            current.toggle_view_internal(True)
+
+        area.internal_set_current_dock_widget(current)
+        area.update_title_bar_visibility()
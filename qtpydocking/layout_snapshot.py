@@ -0,0 +1,475 @@
+import hashlib
+import logging
+from collections import namedtuple
+from typing import Iterator, Optional
+
+from qtpy.QtCore import QByteArray, QXmlStreamReader, Qt
+
+
+logger = logging.getLogger(__name__)
+
+# Magic header of the binary state format, followed by the format version
+BINARY_MAGIC = b'QADS'
+BINARY_FORMAT_VERSION = 1
+
+# Node tags of the binary state format
+_TAG_NONE = 0
+_TAG_HORIZONTAL_SPLITTER = 1
+_TAG_VERTICAL_SPLITTER = 2
+_TAG_AREA = 3
+
+
+class DockWidgetSnapshot(namedtuple('DockWidgetSnapshot', ('name',
+                                                           'closed'))):
+    '''
+    Saved state of a single dock widget, identified by its object name
+    '''
+
+
+class DockAreaSnapshot(namedtuple('DockAreaSnapshot', ('current',
+                                                       'widgets'))):
+    '''
+    Saved state of a dock area: the object name of the current dock widget and
+    a tuple of DockWidgetSnapshot in tab order
+    '''
+
+
+class SplitterSnapshot(namedtuple('SplitterSnapshot', ('orientation',
+                                                       'children',
+                                                       'sizes'))):
+    '''
+    Saved state of a splitter: its orientation, a tuple of child splitter or
+    dock area snapshots and the sizes of the children
+    '''
+
+
+class ContainerSnapshot(namedtuple('ContainerSnapshot', ('floating',
+                                                         'geometry',
+                                                         'root'))):
+    '''
+    Saved state of a dock container. For floating containers, geometry holds
+    the bytes returned by QWidget.saveGeometry(). The root is the root
+    splitter or dock area snapshot, or None for an empty container.
+    '''
+
+
+class LayoutSnapshot(namedtuple('LayoutSnapshot', ('version',
+                                                   'containers'))):
+    '''
+    Immutable, validated in-memory tree of a complete dock manager state.
+
+    The first container always belongs to the dock manager itself, all
+    following containers are floating widgets.
+    '''
+
+    @classmethod
+    def from_xml(cls, state: QByteArray) -> Optional['LayoutSnapshot']:
+        '''
+        Parses and validates an uncompressed XML state in a single pass
+
+        Parameters
+        ----------
+        state : QByteArray
+
+        Returns
+        -------
+        value : LayoutSnapshot
+            None if the state is not a valid docking system state
+        '''
+        if state.isEmpty():
+            return None
+
+        stream = QXmlStreamReader(state)
+        try:
+            return _read_xml_layout(stream)
+        except _FormatError as ex:
+            logger.debug('Invalid layout state: %s', ex)
+            return None
+
+    @classmethod
+    def from_binary(cls, state: QByteArray) -> Optional['LayoutSnapshot']:
+        '''
+        Decodes and validates a state in the compact binary format
+
+        Parameters
+        ----------
+        state : QByteArray
+
+        Returns
+        -------
+        value : LayoutSnapshot
+            None if the state is not a valid binary state
+        '''
+        data = bytes(state)
+        if not data.startswith(BINARY_MAGIC):
+            return None
+
+        try:
+            return _BinaryReader(data).read_layout()
+        except (_FormatError, IndexError, UnicodeDecodeError) as ex:
+            logger.debug('Invalid binary layout state: %s', ex)
+            return None
+
+    def dock_areas(self) -> Iterator[DockAreaSnapshot]:
+        '''
+        Iterates over the saved state of all dock areas in all containers
+
+        Returns
+        -------
+        value : iterator of DockAreaSnapshot
+        '''
+        nodes = [container.root for container in self.containers]
+        while nodes:
+            node = nodes.pop()
+            if isinstance(node, SplitterSnapshot):
+                nodes.extend(node.children)
+            elif isinstance(node, DockAreaSnapshot):
+                yield node
+
+    def dock_widgets(self) -> Iterator[DockWidgetSnapshot]:
+        '''
+        Iterates over the saved state of all dock widgets in all containers
+
+        Returns
+        -------
+        value : iterator of DockWidgetSnapshot
+        '''
+        for area in self.dock_areas():
+            yield from area.widgets
+
+    def fingerprint(self, precision: int = 2) -> str:
+        '''
+        Returns a fingerprint of the layout structure.
+
+        The fingerprint covers the container tree, the dock widgets of each
+        dock area with their closed flags, the current dock widgets, the
+        geometry of floating containers and the splitter sizes as ratios
+        rounded to the given number of decimals. The version is not part of
+        the fingerprint. Layouts with the same fingerprint look the same, so
+        it can be used to find duplicate perspectives.
+
+        Parameters
+        ----------
+        precision : int, optional
+            The number of decimals of the splitter size ratios
+
+        Returns
+        -------
+        value : str
+            The fingerprint as a hexadecimal string
+        '''
+        key = tuple((container.floating,
+                     bytes(container.geometry) if container.floating else b'',
+                     _fingerprint_key(container.root, precision))
+                    for container in self.containers)
+        return hashlib.blake2b(repr(key).encode('utf-8'),
+                               digest_size=16).hexdigest()
+
+    def to_binary(self) -> QByteArray:
+        '''
+        Encodes the snapshot into the compact binary format.
+
+        The format starts with BINARY_MAGIC and the format version. All dock
+        widget names are stored once in a string table and referenced by
+        index, integers are stored as varints and floating geometry is stored
+        as raw bytes.
+
+        Returns
+        -------
+        value : QByteArray
+        '''
+        return QByteArray(_BinaryWriter().write_layout(self))
+
+
+def _fingerprint_key(node, precision: int):
+    if isinstance(node, SplitterSnapshot):
+        total = sum(node.sizes)
+        ratios = tuple(round(size / total, precision) if total > 0 else 0.0
+                       for size in node.sizes)
+        return (int(node.orientation),
+                tuple(_fingerprint_key(child, precision)
+                      for child in node.children),
+                ratios)
+
+    if isinstance(node, DockAreaSnapshot):
+        return (node.current, tuple(node.widgets))
+
+    return None
+
+
+class _FormatError(ValueError):
+    ...
+
+
+def _int_attribute(stream: QXmlStreamReader, name: str) -> int:
+    value = stream.attributes().value(name)
+    try:
+        return int(value)
+    except ValueError:
+        raise _FormatError(f'Invalid {name} attribute: {value!r}') from None
+
+
+def _read_xml_layout(stream: QXmlStreamReader) -> LayoutSnapshot:
+    stream.readNextStartElement()
+    if stream.name() != "QtAdvancedDockingSystem":
+        raise _FormatError('Not a docking system state')
+
+    version = _int_attribute(stream, "Version")
+    containers = []
+    while stream.readNextStartElement():
+        if stream.name() == "Container":
+            containers.append(_read_xml_container(stream))
+        else:
+            stream.skipCurrentElement()
+
+    if stream.hasError():
+        raise _FormatError(stream.errorString())
+
+    return LayoutSnapshot(version, tuple(containers))
+
+
+def _read_xml_container(stream: QXmlStreamReader) -> ContainerSnapshot:
+    floating = bool(_int_attribute(stream, "Floating"))
+    geometry = None
+    if floating:
+        if not stream.readNextStartElement() or stream.name() != "Geometry":
+            raise _FormatError('Floating container without geometry')
+
+        geometry_string = stream.readElementText(
+            QXmlStreamReader.ErrorOnUnexpectedElement)
+        geometry = QByteArray.fromHex(geometry_string.encode('ascii'))
+        if geometry.isEmpty():
+            raise _FormatError('Empty floating container geometry')
+
+        geometry = bytes(geometry)
+
+    root = None
+    while stream.readNextStartElement():
+        if stream.name() == "Splitter":
+            root = _read_xml_splitter(stream)
+        elif stream.name() == "Area":
+            root = _read_xml_dock_area(stream)
+        else:
+            stream.skipCurrentElement()
+
+    return ContainerSnapshot(floating, geometry, root)
+
+
+def _read_xml_splitter(stream: QXmlStreamReader) -> SplitterSnapshot:
+    orientation_str = stream.attributes().value("Orientation")
+    if orientation_str.startswith("-"):
+        orientation = Qt.Horizontal
+    elif orientation_str.startswith("|"):
+        orientation = Qt.Vertical
+    else:
+        raise _FormatError(f'Invalid splitter orientation {orientation_str!r}')
+
+    widget_count = _int_attribute(stream, "Count")
+    if not widget_count:
+        raise _FormatError('Empty splitter')
+
+    children = []
+    sizes = []
+    while stream.readNextStartElement():
+        if stream.name() == "Splitter":
+            children.append(_read_xml_splitter(stream))
+        elif stream.name() == "Area":
+            children.append(_read_xml_dock_area(stream))
+        elif stream.name() == "Sizes":
+            try:
+                sizes = [int(sz) for sz in stream.readElementText().split()]
+            except ValueError:
+                raise _FormatError('Invalid splitter sizes') from None
+        else:
+            stream.skipCurrentElement()
+
+    if len(sizes) != widget_count:
+        raise _FormatError(f'Splitter sizes {sizes} do not match the '
+                           f'widget count {widget_count}')
+
+    return SplitterSnapshot(orientation, tuple(children), tuple(sizes))
+
+
+def _read_xml_dock_area(stream: QXmlStreamReader) -> DockAreaSnapshot:
+    current_dock_widget = stream.attributes().value("Current")
+    widgets = []
+    while stream.readNextStartElement():
+        if stream.name() != "Widget":
+            stream.skipCurrentElement()
+            continue
+
+        object_name = stream.attributes().value("Name")
+        if not object_name:
+            raise _FormatError('Dock widget without object name')
+
+        closed = bool(_int_attribute(stream, "Closed"))
+        stream.skipCurrentElement()
+        widgets.append(DockWidgetSnapshot(object_name, closed))
+
+    return DockAreaSnapshot(current_dock_widget, tuple(widgets))
+
+
+def _write_varint(buf: bytearray, value: int):
+    while value > 0x7f:
+        buf.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+class _BinaryWriter:
+    def __init__(self):
+        self.names = {}
+        self.body = bytearray()
+
+    def name_index(self, name: str) -> int:
+        try:
+            return self.names[name]
+        except KeyError:
+            index = self.names[name] = len(self.names)
+            return index
+
+    def write_layout(self, snapshot: LayoutSnapshot) -> bytes:
+        body = self.body
+        _write_varint(body, len(snapshot.containers))
+        for container in snapshot.containers:
+            if container.floating:
+                body.append(1)
+                _write_varint(body, len(container.geometry))
+                body += container.geometry
+            else:
+                body.append(0)
+            self.write_node(container.root)
+
+        header = bytearray(BINARY_MAGIC)
+        header.append(BINARY_FORMAT_VERSION)
+        # Zig-zag encoding allows negative layout versions
+        version = snapshot.version
+        _write_varint(header, (version << 1) if version >= 0
+                      else ((-version << 1) - 1))
+        _write_varint(header, len(self.names))
+        for name in self.names:
+            encoded = name.encode('utf-8')
+            _write_varint(header, len(encoded))
+            header += encoded
+
+        return bytes(header + body)
+
+    def write_node(self, node):
+        body = self.body
+        if node is None:
+            body.append(_TAG_NONE)
+        elif isinstance(node, SplitterSnapshot):
+            body.append(_TAG_HORIZONTAL_SPLITTER
+                        if node.orientation == Qt.Horizontal
+                        else _TAG_VERTICAL_SPLITTER)
+            _write_varint(body, len(node.children))
+            for child in node.children:
+                self.write_node(child)
+            for size in node.sizes:
+                _write_varint(body, max(size, 0))
+        else:
+            body.append(_TAG_AREA)
+            # Index 0 means no current dock widget
+            _write_varint(body, self.name_index(node.current) + 1
+                          if node.current else 0)
+            _write_varint(body, len(node.widgets))
+            for widget in node.widgets:
+                _write_varint(body, (self.name_index(widget.name) << 1)
+                              | int(widget.closed))
+
+
+class _BinaryReader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = len(BINARY_MAGIC)
+        self.names = []
+
+    def read_varint(self) -> int:
+        data = self.data
+        result = 0
+        shift = 0
+        while True:
+            byte = data[self.pos]
+            self.pos += 1
+            result |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def read_bytes(self, count: int) -> bytes:
+        end = self.pos + count
+        if end > len(self.data):
+            raise _FormatError('Truncated binary state')
+        value = self.data[self.pos:end]
+        self.pos = end
+        return value
+
+    def read_name(self, index: int) -> str:
+        try:
+            return self.names[index]
+        except IndexError:
+            raise _FormatError(f'Invalid name index {index}') from None
+
+    def read_layout(self) -> LayoutSnapshot:
+        format_version = self.read_bytes(1)[0]
+        if format_version != BINARY_FORMAT_VERSION:
+            raise _FormatError(
+                f'Unsupported binary format version {format_version}')
+
+        version = self.read_varint()
+        version = (version >> 1) if not version & 1 else -((version + 1) >> 1)
+        self.names = [self.read_bytes(self.read_varint()).decode('utf-8')
+                      for _ in range(self.read_varint())]
+        containers = []
+        for _ in range(self.read_varint()):
+            floating = bool(self.read_bytes(1)[0])
+            geometry = None
+            if floating:
+                geometry = self.read_bytes(self.read_varint())
+                if not geometry:
+                    raise _FormatError('Empty floating container geometry')
+            containers.append(
+                ContainerSnapshot(floating, geometry, self.read_node()))
+
+        if self.pos != len(self.data):
+            raise _FormatError('Trailing data in binary state')
+
+        return LayoutSnapshot(version, tuple(containers))
+
+    def read_node(self):
+        tag = self.read_bytes(1)[0]
+        if tag == _TAG_NONE:
+            return None
+
+        if tag == _TAG_AREA:
+            current = self.read_varint()
+            current = self.read_name(current - 1) if current else ''
+            widgets = []
+            for _ in range(self.read_varint()):
+                value = self.read_varint()
+                name = self.read_name(value >> 1)
+                if not name:
+                    raise _FormatError('Dock widget without object name')
+                widgets.append(DockWidgetSnapshot(name, bool(value & 1)))
+            return DockAreaSnapshot(current, tuple(widgets))
+
+        if tag == _TAG_HORIZONTAL_SPLITTER:
+            orientation = Qt.Horizontal
+        elif tag == _TAG_VERTICAL_SPLITTER:
+            orientation = Qt.Vertical
+        else:
+            raise _FormatError(f'Invalid node tag {tag}')
+
+        count = self.read_varint()
+        if not count:
+            raise _FormatError('Empty splitter')
+
+        children = []
+        for _ in range(count):
+            child = self.read_node()
+            if child is None:
+                raise _FormatError('Empty splitter child')
+            children.append(child)
+
+        sizes = tuple(self.read_varint() for _ in range(count))
+        return SplitterSnapshot(orientation, tuple(children), sizes)
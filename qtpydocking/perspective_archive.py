@@ -0,0 +1,280 @@
+import logging
+import mmap
+import os
+import pathlib
+import struct
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from qtpy.QtCore import QByteArray
+
+
+logger = logging.getLogger(__name__)
+
+# Magic, format version, index offset and index length
+_HEADER = struct.Struct('<4sH2xQQ')
+_MAGIC = b'QADP'
+_FORMAT_VERSION = 1
+# Name length, followed by the name, blob offset and blob length
+_ENTRY_NAME = struct.Struct('<H')
+_ENTRY_BLOB = struct.Struct('<QQ')
+_COUNT = struct.Struct('<I')
+
+
+class PerspectiveArchive:
+    path: pathlib.Path
+    compact_threshold: int
+    _index: Dict[str, Tuple[int, int]]
+    _index_length: int
+    _file_size: int
+
+    def __init__(self, path: Union[str, pathlib.Path],
+                 compact_threshold: int = 65536):
+        '''
+        A file that stores named perspectives with an index.
+
+        The file starts with a fixed size header that points to the index of
+        all perspectives. Opening an archive only reads the header and the
+        index; the perspective states are read on demand from a memory map
+        of the file.
+
+        Writing or removing a perspective appends the new data and a new
+        index to the end of the file and then patches the header, so the
+        file is valid at any time. Unused space is reclaimed by compact(),
+        which rewrites the file and atomically replaces it. This happens
+        automatically once the unused space exceeds both the
+        compact_threshold and the size of the used data.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+        compact_threshold : int, optional
+            The number of unused bytes that trigger an automatic compaction
+        '''
+        self.path = pathlib.Path(path)
+        self.compact_threshold = compact_threshold
+        self._index = {}
+        self._index_length = 0
+        self._file_size = 0
+        self._file = None
+        self._map = None
+        if self.path.exists():
+            self._read_index()
+        else:
+            self._rewrite({})
+
+    def __repr__(self):
+        return (f'<{self.__class__.__name__} path={str(self.path)!r} '
+                f'perspectives={len(self._index)}>')
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def names(self) -> List[str]:
+        '''
+        Returns the names of all perspectives in the archive
+
+        Returns
+        -------
+        value : list of str
+        '''
+        return list(self._index)
+
+    def read(self, name: str) -> Optional[QByteArray]:
+        '''
+        Reads the state of the perspective with the given name
+
+        Parameters
+        ----------
+        name : str
+
+        Returns
+        -------
+        value : QByteArray
+            None if there is no perspective with the given name
+        '''
+        try:
+            offset, length = self._index[name]
+        except KeyError:
+            return None
+
+        if self._map is None:
+            self._file = open(self.path, 'rb')
+            self._map = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+
+        return QByteArray(self._map[offset:offset + length])
+
+    def write(self, name: str, state: QByteArray):
+        '''
+        Adds the perspective with the given name or replaces it
+
+        Parameters
+        ----------
+        name : str
+        state : QByteArray
+        '''
+        self._append({name: bytes(state)}, ())
+
+    def remove(self, *names: str) -> int:
+        '''
+        Removes the perspectives with the given names
+
+        Parameters
+        ----------
+        *names : str
+
+        Returns
+        -------
+        value : int
+            The number of removed perspectives
+        '''
+        names = [name for name in names if name in self._index]
+        if names:
+            self._append({}, names)
+        return len(names)
+
+    def replace_all(self, perspectives: Dict[str, QByteArray]):
+        '''
+        Replaces the complete content of the archive
+
+        Parameters
+        ----------
+        perspectives : dict
+            Perspective name to state
+        '''
+        self._rewrite({name: bytes(state)
+                       for name, state in perspectives.items()})
+
+    def unused_size(self) -> int:
+        '''
+        Returns the number of bytes in the file that are no longer used
+
+        Returns
+        -------
+        value : int
+        '''
+        used = sum(length for _, length in self._index.values())
+        return (self._file_size - _HEADER.size - self._index_length - used)
+
+    def compact(self):
+        '''
+        Rewrites the archive without unused space and atomically replaces
+        the file
+        '''
+        self._rewrite({name: bytes(self.read(name)) for name in self._index})
+
+    def close(self):
+        '''
+        Closes the memory map of the file. It is opened again on demand.
+        '''
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = None
+            self._file = None
+
+    def _read_index(self):
+        with open(self.path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                raise ValueError(f'{self.path} is not a perspective archive')
+
+            magic, version, index_offset, index_length = _HEADER.unpack(header)
+            if magic != _MAGIC or version != _FORMAT_VERSION:
+                raise ValueError(f'{self.path} is not a perspective archive '
+                                 f'of version {_FORMAT_VERSION}')
+
+            f.seek(index_offset)
+            data = f.read(index_length)
+            self._file_size = f.seek(0, os.SEEK_END)
+
+        if len(data) != index_length:
+            raise ValueError(f'{self.path}: truncated perspective index')
+
+        index = {}
+        count, = _COUNT.unpack_from(data)
+        pos = _COUNT.size
+        for _ in range(count):
+            name_length, = _ENTRY_NAME.unpack_from(data, pos)
+            pos += _ENTRY_NAME.size
+            name = data[pos:pos + name_length].decode('utf-8')
+            pos += name_length
+            index[name] = _ENTRY_BLOB.unpack_from(data, pos)
+            pos += _ENTRY_BLOB.size
+
+        self._index = index
+        self._index_length = index_length
+        logger.debug('Opened %s', self)
+
+    @staticmethod
+    def _encode_index(index: Dict[str, Tuple[int, int]]) -> bytes:
+        parts = [_COUNT.pack(len(index))]
+        for name, (offset, length) in index.items():
+            encoded = name.encode('utf-8')
+            parts.append(_ENTRY_NAME.pack(len(encoded)))
+            parts.append(encoded)
+            parts.append(_ENTRY_BLOB.pack(offset, length))
+        return b''.join(parts)
+
+    def _append(self, blobs: Dict[str, bytes], removed: Iterable[str]):
+        # The memory map has the old file size and must be recreated
+        self.close()
+        index = dict(self._index)
+        for name in removed:
+            del index[name]
+
+        with open(self.path, 'r+b') as f:
+            offset = f.seek(0, os.SEEK_END)
+            for name, blob in blobs.items():
+                f.write(blob)
+                index[name] = (offset, len(blob))
+                offset += len(blob)
+
+            index_data = self._encode_index(index)
+            f.write(index_data)
+            f.flush()
+            os.fsync(f.fileno())
+
+            # Patching the header commits the new index
+            f.seek(0)
+            f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, offset,
+                                 len(index_data)))
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._index = index
+        self._index_length = len(index_data)
+        self._file_size = offset + len(index_data)
+
+        unused = self.unused_size()
+        if unused > self.compact_threshold and unused > (
+                self._file_size - unused):
+            logger.debug('Compacting %s, %d unused bytes', self, unused)
+            self.compact()
+
+    def _rewrite(self, blobs: Dict[str, bytes]):
+        index = {}
+        offset = _HEADER.size
+        for name, blob in blobs.items():
+            index[name] = (offset, len(blob))
+            offset += len(blob)
+
+        index_data = self._encode_index(index)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, offset,
+                                 len(index_data)))
+            for blob in blobs.values():
+                f.write(blob)
+            f.write(index_data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.close()
+        os.replace(tmp_path, self.path)
+        self._index = index
+        self._index_length = len(index_data)
+        self._file_size = offset + len(index_data)
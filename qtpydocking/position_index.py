@@ -0,0 +1,162 @@
+from typing import Dict, Iterable, Iterator, List
+
+
+class PositionIndex:
+    _items: List[object]
+    _positions: Dict[object, int]
+
+    def __init__(self, items: Iterable = ()):
+        '''
+        An ordered sequence of unique items with a map from each item to its
+        position.
+
+        Position and membership queries are dictionary lookups. Inserting,
+        removing and moving items updates the positions of the items after
+        the changed position, so the cost is paid when the order changes,
+        which is much less often than it is queried.
+
+        Parameters
+        ----------
+        items : iterable, optional
+            The initial items
+        '''
+        self._items = []
+        self._positions = {}
+        for item in items:
+            self.insert(-1, item)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} items={len(self._items)}>'
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator:
+        return iter(self._items)
+
+    def __contains__(self, item) -> bool:
+        return item in self._positions
+
+    def __getitem__(self, index: int):
+        return self._items[index]
+
+    def _update_positions(self, start: int, stop: int):
+        positions = self._positions
+        items = self._items
+        for i in range(start, stop):
+            positions[items[i]] = i
+
+    def index_of(self, item) -> int:
+        '''
+        Returns the position of the item, or -1 if it is not in the index
+
+        Parameters
+        ----------
+        item : object
+
+        Returns
+        -------
+        value : int
+        '''
+        return self._positions.get(item, -1)
+
+    def insert(self, index: int, item) -> int:
+        '''
+        Inserts the item at the given position. A negative position or a
+        position after the last item appends the item.
+
+        Parameters
+        ----------
+        index : int
+        item : object
+
+        Returns
+        -------
+        value : int
+            The position of the inserted item
+        '''
+        if item in self._positions:
+            raise ValueError(f'{item!r} is already in the index')
+
+        if index < 0 or index > len(self._items):
+            index = len(self._items)
+
+        self._items.insert(index, item)
+        self._update_positions(index, len(self._items))
+        return index
+
+    def remove(self, item) -> int:
+        '''
+        Removes the item
+
+        Parameters
+        ----------
+        item : object
+
+        Returns
+        -------
+        value : int
+            The position the item had
+        '''
+        try:
+            index = self._positions.pop(item)
+        except KeyError:
+            raise ValueError(f'{item!r} is not in the index') from None
+
+        del self._items[index]
+        self._update_positions(index, len(self._items))
+        return index
+
+    def move(self, from_index: int, to_index: int):
+        '''
+        Moves the item at from_index to to_index
+
+        Parameters
+        ----------
+        from_index : int
+        to_index : int
+        '''
+        item = self._items.pop(from_index)
+        self._items.insert(to_index, item)
+        self._update_positions(min(from_index, to_index),
+                               max(from_index, to_index) + 1)
+
+    def clear(self):
+        '''
+        Removes all items
+        '''
+        self._items.clear()
+        self._positions.clear()
+
+    def check_consistency(self, expected: Iterable = None):
+        '''
+        Checks that the position map matches the order of the items. Meant
+        for tests.
+
+        Parameters
+        ----------
+        expected : iterable, optional
+            The items in the order they are expected to be in, e.g. the
+            widgets of the layout the index mirrors
+
+        Raises
+        ------
+        RuntimeError
+            If the index is inconsistent
+        '''
+        if len(self._positions) != len(self._items):
+            raise RuntimeError(
+                f'{len(self._positions)} positions for '
+                f'{len(self._items)} items')
+
+        for index, item in enumerate(self._items):
+            if self._positions.get(item) != index:
+                raise RuntimeError(
+                    f'{item!r} at {index} has the position '
+                    f'{self._positions.get(item)}')
+
+        if expected is not None:
+            expected = list(expected)
+            if expected != self._items:
+                raise RuntimeError(
+                    f'Items {self._items} do not match {expected}')
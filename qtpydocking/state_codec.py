@@ -0,0 +1,205 @@
+import abc
+import logging
+import lzma
+import zlib
+from typing import Dict, Optional
+
+from qtpy.QtCore import QByteArray
+
+
+logger = logging.getLogger(__name__)
+
+# Magic header of an encoded state. It is followed by the length of the codec
+# name, the codec name and the encoded data.
+CODEC_MAGIC = b'QADC'
+
+
+class StateCodec(abc.ABC):
+    '''
+    Base class of the codecs used to compress saved dock manager states.
+
+    Subclasses define a unique name, which is stored in the header of the
+    encoded state, and implement encode() and decode(). Codecs must be
+    registered with register_codec() to be found when a state is restored.
+    '''
+    name = ''
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} name={self.name!r}>'
+
+    @abc.abstractmethod
+    def encode(self, data: bytes) -> bytes:
+        '''
+        Encodes the given state
+
+        Parameters
+        ----------
+        data : bytes
+
+        Returns
+        -------
+        value : bytes
+        '''
+
+    @abc.abstractmethod
+    def decode(self, data: bytes) -> bytes:
+        '''
+        Decodes the given encoded state
+
+        Parameters
+        ----------
+        data : bytes
+
+        Returns
+        -------
+        value : bytes
+        '''
+
+
+class NullCodec(StateCodec):
+    '''
+    Stores the state without compression
+    '''
+    name = 'none'
+
+    def encode(self, data: bytes) -> bytes:
+        return data
+
+    def decode(self, data: bytes) -> bytes:
+        return data
+
+
+class ZlibCodec(StateCodec):
+    '''
+    Compresses the state with zlib at the given level (1 to 9)
+    '''
+    name = 'zlib'
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} level={self.level}>'
+
+    def encode(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decode(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class LzmaCodec(StateCodec):
+    '''
+    Compresses the state with lzma at the given preset (0 to 9)
+    '''
+    name = 'lzma'
+
+    def __init__(self, preset: int = 6):
+        self.preset = preset
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} preset={self.preset}>'
+
+    def encode(self, data: bytes) -> bytes:
+        return lzma.compress(data, preset=self.preset)
+
+    def decode(self, data: bytes) -> bytes:
+        return lzma.decompress(data)
+
+
+_codecs: Dict[str, StateCodec] = {}
+
+
+def register_codec(codec: StateCodec):
+    '''
+    Registers the given codec to decode states that were encoded with a codec
+    of the same name
+
+    Parameters
+    ----------
+    codec : StateCodec
+
+    Raises
+    ------
+    TypeError
+        If the codec is not a StateCodec
+    '''
+    if not isinstance(codec, StateCodec):
+        raise TypeError(f'{codec!r} is not a StateCodec')
+    _codecs[codec.name] = codec
+
+
+def find_codec(name: str) -> Optional[StateCodec]:
+    '''
+    Returns the registered codec with the given name
+
+    Parameters
+    ----------
+    name : str
+
+    Returns
+    -------
+    value : StateCodec
+    '''
+    return _codecs.get(name, None)
+
+
+for _codec in (NullCodec(), ZlibCodec(), LzmaCodec()):
+    register_codec(_codec)
+
+del _codec
+
+
+def encode(state: QByteArray, codec: StateCodec) -> QByteArray:
+    '''
+    Encodes the given state with the codec and prepends the codec header
+
+    Parameters
+    ----------
+    state : QByteArray
+    codec : StateCodec
+
+    Returns
+    -------
+    value : QByteArray
+    '''
+    name = codec.name.encode('ascii')
+    return QByteArray(CODEC_MAGIC + bytes([len(name)]) + name +
+                      codec.encode(bytes(state)))
+
+
+def decode(state: QByteArray) -> Optional[QByteArray]:
+    '''
+    Decodes a state that was encoded with encode(). States without a codec
+    header are returned unchanged.
+
+    Parameters
+    ----------
+    state : QByteArray
+
+    Returns
+    -------
+    value : QByteArray
+        None if the codec is unknown or the data is corrupt
+    '''
+    data = bytes(state)
+    if not data.startswith(CODEC_MAGIC):
+        return state
+
+    start = len(CODEC_MAGIC) + 1
+    try:
+        name = data[start:start + data[start - 1]].decode('ascii')
+    except (IndexError, UnicodeDecodeError):
+        logger.debug('Invalid codec header')
+        return None
+
+    codec = find_codec(name)
+    if codec is None:
+        logger.debug('Unknown state codec %r', name)
+        return None
+
+    try:
+        return QByteArray(codec.decode(data[start + len(name):]))
+    except Exception as ex:
+        logger.debug('Decoding the state with %s failed: %s', codec, ex)
+        return None
@@ -0,0 +1,340 @@
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+import logging
+
+from qtpy.QtGui import QHideEvent, QShowEvent
+from qtpy.QtWidgets import QAction, QLineEdit, QMenu, QWidget, QWidgetAction
+
+from .position_index import PositionIndex
+
+if TYPE_CHECKING:
+    from . import DockWidgetTab
+
+
+logger = logging.getLogger(__name__)
+
+
+class _TabsMenuEntry:
+    __slots__ = ('action', 'key', 'open')
+
+    def __init__(self, action: QAction):
+        self.action = action
+        self.key = ''
+        self.open = False
+
+
+class TabsMenuPrivate:
+    public: 'TabsMenu'
+    filter_edit: QLineEdit
+    filter_action: QWidgetAction
+    tabs: PositionIndex
+    entries: Dict['DockWidgetTab', _TabsMenuEntry]
+    filter_text: str
+
+    def __init__(self, public: 'TabsMenu'):
+        '''
+        Private data constructor
+
+        Parameters
+        ----------
+        public : TabsMenu
+        '''
+        self.public = public
+        self.filter_edit = None
+        self.filter_action = None
+        self.tabs = PositionIndex()
+        self.entries = {}
+        self.filter_text = ''
+
+    def create_filter(self):
+        '''
+        Creates the filter line edit at the top of the menu
+        '''
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setObjectName("tabsMenuFilter")
+        self.filter_edit.setPlaceholderText("Filter tabs")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.textChanged.connect(self.public.set_filter_text)
+        self.filter_edit.returnPressed.connect(
+            self.public.trigger_first_visible)
+
+        self.filter_action = QWidgetAction(self.public)
+        self.filter_action.setDefaultWidget(self.filter_edit)
+        self.public.addAction(self.filter_action)
+        self.public.addSeparator()
+
+    def update_entry(self, tab: 'DockWidgetTab', entry: _TabsMenuEntry):
+        '''
+        Updates the text, tooltip, lowercase filter key and visibility of the
+        action of the tab
+
+        Parameters
+        ----------
+        tab : DockWidgetTab
+        entry : _TabsMenuEntry
+        '''
+        text = tab.text()
+        action = entry.action
+        if action.text() != text:
+            action.setText(text)
+        if action.toolTip() != tab.toolTip():
+            action.setToolTip(tab.toolTip())
+
+        entry.key = text.lower()
+        entry.open = not tab.isHidden()
+        self.update_visibility(entry)
+
+    def update_visibility(self, entry: _TabsMenuEntry):
+        '''
+        Shows the action of an open tab that matches the filter
+
+        Parameters
+        ----------
+        entry : _TabsMenuEntry
+        '''
+        visible = entry.open and self.filter_text in entry.key
+        if entry.action.isVisible() != visible:
+            entry.action.setVisible(visible)
+
+    def action_before(self, index: int) -> Optional[QAction]:
+        '''
+        Returns the action of the tab at the given index, None if there is
+        no tab at the index
+
+        Parameters
+        ----------
+        index : int
+
+        Returns
+        -------
+        value : QAction
+        '''
+        if index >= len(self.tabs):
+            return None
+        return self.entries[self.tabs[index]].action
+
+
+class TabsMenu(QMenu):
+    def __init__(self, parent: QWidget = None):
+        '''
+        The menu of the tabs of a dock area, with a line edit at the top that
+        filters the tabs by title.
+
+        The menu holds one action per tab, including closed tabs whose
+        actions are hidden. It is updated incrementally when tabs are
+        inserted, removed, moved, renamed, opened or closed. The lowercase
+        titles are kept with the actions, so filtering only compares strings
+        and changes the visibility of the actions that change.
+
+        Parameters
+        ----------
+        parent : QWidget, optional
+        '''
+        super().__init__(parent)
+        self.d = TabsMenuPrivate(self)
+        self.setToolTipsVisible(True)
+        self.d.create_filter()
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} tabs={len(self.d.tabs)}>'
+
+    def insert_tab(self, index: int, tab: 'DockWidgetTab'):
+        '''
+        Inserts the action of the tab at the given index
+
+        Parameters
+        ----------
+        index : int
+        tab : DockWidgetTab
+        '''
+        if tab in self.d.entries:
+            self.remove_tab(self.d.tabs.index_of(tab))
+
+        action = QAction(self)
+        action.setData(tab)
+        entry = _TabsMenuEntry(action)
+        self.insertAction(self.d.action_before(index), action)
+        self.d.tabs.insert(index, tab)
+        self.d.entries[tab] = entry
+        self.d.update_entry(tab, entry)
+
+    def remove_tab(self, index: int):
+        '''
+        Removes the action of the tab at the given index
+
+        Parameters
+        ----------
+        index : int
+        '''
+        if index < 0 or index >= len(self.d.tabs):
+            return
+
+        tab = self.d.tabs[index]
+        self.d.tabs.remove(tab)
+        entry = self.d.entries.pop(tab)
+        self.removeAction(entry.action)
+        entry.action.deleteLater()
+
+    def move_tab(self, from_index: int, to_index: int):
+        '''
+        Moves the action of the tab at from_index to to_index
+
+        Parameters
+        ----------
+        from_index : int
+        to_index : int
+        '''
+        count = len(self.d.tabs)
+        if (from_index == to_index or not 0 <= from_index < count or
+                not 0 <= to_index < count):
+            return
+
+        action = self.d.entries[self.d.tabs[from_index]].action
+        self.removeAction(action)
+        self.d.tabs.move(from_index, to_index)
+        self.insertAction(self.d.action_before(to_index + 1), action)
+
+    def update_tab(self, tab: 'DockWidgetTab'):
+        '''
+        Updates the action after the title, the tooltip or the open state of
+        the tab changed
+
+        Parameters
+        ----------
+        tab : DockWidgetTab
+        '''
+        entry = self.d.entries.get(tab)
+        if entry is not None:
+            self.d.update_entry(tab, entry)
+
+    def set_tabs(self, tabs: Iterable['DockWidgetTab']):
+        '''
+        Replaces all actions with those of the given tabs
+
+        Parameters
+        ----------
+        tabs : iterable of DockWidgetTab
+        '''
+        for entry in self.d.entries.values():
+            self.removeAction(entry.action)
+            entry.action.deleteLater()
+
+        self.d.tabs.clear()
+        self.d.entries.clear()
+        for index, tab in enumerate(tabs):
+            self.insert_tab(index, tab)
+
+    def tabs(self) -> List['DockWidgetTab']:
+        '''
+        Returns the tabs of the menu in the order of their actions
+
+        Returns
+        -------
+        value : list of DockWidgetTab
+        '''
+        return list(self.d.tabs)
+
+    def tab_actions(self) -> List[QAction]:
+        '''
+        Returns the actions of the tabs that are shown with the current
+        filter
+
+        Returns
+        -------
+        value : list of QAction
+        '''
+        return [action for action in self.actions()
+                if action.isVisible() and action.data() in self.d.entries]
+
+    def filter_text(self) -> str:
+        '''
+        Returns the text the tabs are filtered by
+
+        Returns
+        -------
+        value : str
+        '''
+        return self.d.filter_edit.text()
+
+    def set_filter_text(self, text: str):
+        '''
+        Shows only the open tabs with a title that contains the given text,
+        ignoring case
+
+        Parameters
+        ----------
+        text : str
+        '''
+        if self.d.filter_edit.text() != text:
+            # Calls this function again through textChanged
+            self.d.filter_edit.setText(text)
+            return
+
+        self.d.filter_text = text.lower()
+        self.setUpdatesEnabled(False)
+        try:
+            for entry in self.d.entries.values():
+                self.d.update_visibility(entry)
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def trigger_first_visible(self):
+        '''
+        Triggers the first tab action that matches the filter and closes the
+        menu
+        '''
+        actions = self.tab_actions()
+        if not actions:
+            return
+
+        # The menu emits triggered() for the action, as if it was clicked
+        actions[0].trigger()
+        self.hide()
+
+    def check_consistency(self, tabs: Iterable['DockWidgetTab']):
+        '''
+        Checks that the actions match the given tabs, see
+        PositionIndex.check_consistency(). Meant for tests.
+
+        Parameters
+        ----------
+        tabs : iterable of DockWidgetTab
+
+        Raises
+        ------
+        RuntimeError
+            If the menu is inconsistent
+        '''
+        self.d.tabs.check_consistency(tabs)
+        actions = [action for action in self.actions()
+                   if action.data() in self.d.entries]
+        if actions != [self.d.entries[tab].action for tab in self.d.tabs]:
+            raise RuntimeError('The actions are not in the order of the tabs')
+
+        for tab, entry in self.d.entries.items():
+            if entry.action.text() != tab.text() or (
+                    entry.open == tab.isHidden()):
+                raise RuntimeError(f'The action of {tab!r} is outdated')
+
+    def showEvent(self, event: QShowEvent):
+        '''
+        Gives the filter the keyboard focus
+
+        Parameters
+        ----------
+        event : QShowEvent
+        '''
+        super().showEvent(event)
+        self.setActiveAction(self.d.filter_action)
+        self.d.filter_edit.setFocus()
+
+    def hideEvent(self, event: QHideEvent):
+        '''
+        Clears the filter
+
+        Parameters
+        ----------
+        event : QHideEvent
+        '''
+        super().hideEvent(event)
+        if self.d.filter_edit.text():
+            self.set_filter_text('')
@@ -1,8 +1,41 @@
+import functools
 import logging
 
 import pytest   # noqa
 from pytestqt.qt_compat import qt_api   # noqa
 
+from qtpydocking import examples
+from qtpydocking.benchmarks import tab_switching
+
 
 logger = logging.getLogger('qtpydocking')
 logger.setLevel('DEBUG')
+
+
+@pytest.fixture(scope='function',
+                params=['simple', 'demo']
+                )
+def example(qtbot, qapp, request):
+    example_module = getattr(examples, request.param)
+    main = example_module.main(qapp)
+    qtbot.addWidget(main)
+    yield main
+
+
+@pytest.fixture(scope='function')
+def manager(example):
+    return example.dock_manager
+
+
+@pytest.fixture(scope='function')
+def containers(manager):
+    return manager.dock_containers()
+
+
+@pytest.fixture(scope='function')
+def add_tabs(manager):
+    '''
+    Returns a function that adds the given number of dock widgets as the tabs
+    of a new center dock area of the manager, and returns the dock area
+    '''
+    return functools.partial(tab_switching.add_tabs, manager)
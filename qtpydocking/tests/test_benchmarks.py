@@ -0,0 +1,15 @@
+from qtpydocking.benchmarks import state_codecs, tab_switching
+
+
+def test_state_codecs_benchmark(qapp):
+    results = state_codecs.run(number=1)
+    layouts = {result.layout for result in results}
+    assert layouts == {'simple-xml', 'simple-binary', 'demo-xml',
+                       'demo-binary'}
+    assert all(result.size > 0 for result in results)
+
+
+def test_tab_switching_benchmark(qapp):
+    results = tab_switching.run(number=5, tabs=10)
+    assert [result.mode for result in results] == ['repolish', 'style state']
+    assert all(result.switch_us > 0 for result in results)
@@ -0,0 +1,88 @@
+import json
+
+from qtpy import QtCore, QtWidgets
+
+import qtpydocking
+from qtpydocking import DragInstrumentation
+from qtpydocking.drop_target_index import global_rect
+
+
+def test_drag_instrumentation(tmp_path):
+    instrumentation = DragInstrumentation(window=3)
+    for duration in (0.0001, 0.002, 0.003, 0.2):
+        instrumentation.record('move', duration)
+    with instrumentation.measure('hit_test'):
+        ...
+
+    assert instrumentation.stages() == ['move', 'hit_test']
+    assert instrumentation.samples('move') == [2., 3., 200.]
+    assert instrumentation.total_count('move') == 4
+    histogram = dict(instrumentation.histogram('move'))
+    assert histogram[2.5] == 1
+    assert histogram[5.] == 1
+    assert histogram[float('inf')] == 1
+    assert sum(histogram.values()) == 3
+
+    statistics = instrumentation.statistics('move')
+    assert statistics.count == 3
+    assert statistics.p50 == 3.
+    assert statistics.max == 200.
+    assert instrumentation.statistics('missing').count == 0
+
+    path = tmp_path / 'drag.json'
+    instrumentation.export(path)
+    data = json.loads(path.read_text())
+    assert data['move']['total_count'] == 4
+    assert data['move']['samples_ms'] == [2., 3., 200.]
+
+    instrumentation.reset()
+    assert instrumentation.stages() == []
+
+
+def test_dock_manager_instrumentation(qtbot, manager: qtpydocking.DockManager):
+    assert manager.drag_instrumentation() is None
+    with manager.measure('move'):
+        ...
+
+    instrumentation = manager.enable_drag_instrumentation()
+    assert manager.drag_instrumentation() is instrumentation
+
+    widget = qtpydocking.DockWidget('test')
+    qtbot.addWidget(widget)
+    widget.set_widget(QtWidgets.QLabel('test'))
+    floating = qtpydocking.FloatingDockContainer(
+        dock_widget=widget, dock_manager=manager)
+    floating.show()
+    manager.window().show()
+    floating.d.update_drop_overlays(
+        global_rect(manager.opened_dock_areas()[0]).center())
+    for stage in ('move', 'hit_test', 'show_overlay'):
+        assert instrumentation.total_count(stage) == 1
+
+    floating.d.set_state(qtpydocking.DragState.inactive)
+    manager.container_overlay().hide_overlay()
+    manager.dock_area_overlay().hide_overlay()
+    manager.disable_drag_instrumentation()
+    assert manager.drag_instrumentation() is None
+
+
+def test_overlay_paint_with_other_parent(qtbot,
+                                         manager: qtpydocking.DockManager):
+    instrumentation = manager.enable_drag_instrumentation()
+    parent = QtWidgets.QWidget()
+    qtbot.addWidget(parent)
+
+    overlay = manager.dock_area_overlay()
+    overlay.setParent(parent)
+    overlay.d.drop_area_rect = QtCore.QRect(0, 0, 10, 10)
+    overlay.resize(20, 20)
+    overlay.grab()
+    assert instrumentation.total_count('paint_overlay') == 1
+
+    # Overlays without a dock manager are not measured
+    standalone = qtpydocking.DockOverlay(parent,
+                                         qtpydocking.OverlayMode.container)
+    standalone.d.drop_area_rect = QtCore.QRect(0, 0, 10, 10)
+    standalone.resize(20, 20)
+    standalone.grab()
+    assert instrumentation.total_count('paint_overlay') == 1
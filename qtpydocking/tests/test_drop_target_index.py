@@ -0,0 +1,89 @@
+from qtpy import QtCore, QtWidgets
+
+import qtpydocking
+from qtpydocking import DragState, DropTargetIndex
+from qtpydocking.drop_target_index import global_rect
+
+
+def test_drop_target_index():
+    index = DropTargetIndex(cell_size=10)
+    index.add(QtCore.QRect(0, 0, 100, 100), 'container')
+    index.add(QtCore.QRect(0, 0, 50, 100), 'left', 'container')
+    index.add(QtCore.QRect(50, 0, 50, 100), 'right', 'container')
+    index.add(QtCore.QRect(0, 0, 0, 0), 'empty')
+    assert len(index) == 3
+
+    assert index.targets_at(QtCore.QPoint(5, 5)) == ['container']
+    assert index.targets_at(QtCore.QPoint(5, 5), 'container') == ['left']
+    assert index.targets_at(QtCore.QPoint(75, 99), 'container') == ['right']
+    assert index.targets_at(QtCore.QPoint(100, 5)) == []
+    assert index.targets_at(QtCore.QPoint(-5, -5)) == []
+
+    index.clear()
+    assert len(index) == 0
+    assert index.targets_at(QtCore.QPoint(5, 5)) == []
+
+
+def test_dock_area_at(qtbot, manager: qtpydocking.DockManager):
+    manager.window().show()
+    qtbot.waitExposed(manager.window())
+    areas = [manager.dock_area(i) for i in range(manager.dock_area_count())
+             if manager.dock_area(i).isVisible()]
+    assert areas
+
+    expected = [manager.dock_area_at(global_rect(area).center())
+                for area in areas]
+    assert expected == areas
+
+    assert manager.drop_target_index() is None
+    manager.build_drop_target_index()
+    index = manager.drop_target_index()
+    assert index is not None
+    assert [manager.dock_area_at(global_rect(area).center())
+            for area in areas] == expected
+
+    manager.notify_layout_changed()
+    assert manager.drop_target_index() is not index
+
+    manager.release_drop_target_index()
+    assert manager.drop_target_index() is None
+
+
+def test_moved_container_invalidates_index(qtbot,
+                                           manager: qtpydocking.DockManager):
+    window = manager.window()
+    window.show()
+    qtbot.waitExposed(window)
+    widget = qtpydocking.DockWidget('dragged')
+    widget.set_widget(QtWidgets.QLabel('dragged'))
+    dragged = qtpydocking.FloatingDockContainer(dock_widget=widget,
+                                                dock_manager=manager)
+    dragged.setGeometry(3000, 3000, 200, 200)
+    dragged.show()
+    qtbot.waitExposed(dragged)
+
+    dock_area = next(manager.dock_area(i)
+                     for i in range(manager.dock_area_count())
+                     if manager.dock_area(i).isVisible())
+    pos = global_rect(dock_area).center()
+    dragged.d.set_state(DragState.floating_widget)
+    try:
+        index = manager.drop_target_index()
+        assert dragged.d.top_container_at(pos) is manager
+        assert manager.dock_area_at(pos) is dock_area
+
+        # Moving the dragged widget keeps the index
+        dragged.move(dragged.pos() + QtCore.QPoint(10, 0))
+        qtbot.waitUntil(lambda: dragged.x() == 3010)
+        assert manager.drop_target_index() is index
+
+        # Moving the main window in the middle of the drag rebuilds it
+        window.move(window.pos() + QtCore.QPoint(window.width() * 2, 0))
+        qtbot.waitUntil(lambda: global_rect(dock_area).center() != pos)
+        assert manager.drop_target_index() is not index
+        assert dragged.d.top_container_at(pos) is None
+        assert manager.dock_area_at(pos) is None
+        assert manager.dock_area_at(
+            global_rect(dock_area).center()) is dock_area
+    finally:
+        dragged.d.set_state(DragState.inactive)
@@ -5,26 +5,6 @@ import qtpydocking
 from qtpydocking import examples, DockWidgetArea
 
 
-@pytest.fixture(scope='function',
-                params=['simple', 'demo']
-                )
-def example(qtbot, qapp, request):
-    example_module = getattr(examples, request.param)
-    main = example_module.main(qapp)
-    qtbot.addWidget(main)
-    yield main
-
-
-@pytest.fixture(scope='function')
-def manager(example):
-    return example.dock_manager
-
-
-@pytest.fixture(scope='function')
-def containers(manager):
-    return manager.dock_containers()
-
-
 def test_smoke_example(qtbot, manager: qtpydocking.DockManager):
     # DockManager
     manager.container_overlay()
@@ -205,3 +185,436 @@ def test_smoke_xml_settings(qtbot, manager: qtpydocking.DockManager):
 
     manager.set_config_flags(qtpydocking.DockFlags.xml_auto_formatting)
     manager.restore_state(manager.save_state())
+
+
+def test_visible_dock_area_count(qtbot, monkeypatch,
+                                 manager: qtpydocking.DockManager):
+    # Cross-check the counter against a full recount on every access
+    monkeypatch.setattr(qtpydocking.dock_container_widget, 'DEBUG_LEVEL', 1)
+
+    def check():
+        for container in manager.dock_containers():
+            areas = [container.dock_area(i)
+                     for i in range(container.dock_area_count())]
+            opened = [area for area in areas if not area.isHidden()]
+            assert container.visible_dock_area_count() == len(opened)
+            assert container.opened_dock_areas() == opened
+
+    check()
+    state = manager.save_state()
+    for dock_widget in manager.dock_widgets_map().values():
+        dock_widget.toggle_view(False)
+        check()
+
+    assert manager.restore_state(state)
+    check()
+
+    widget = qtpydocking.DockWidget('test')
+    qtbot.addWidget(widget)
+    widget.set_widget(QtWidgets.QLabel('test'))
+    manager.add_dock_widget(DockWidgetArea.left, widget)
+    check()
+    qtpydocking.FloatingDockContainer(dock_widget=widget)
+    check()
+
+    manager.remove_dock_area(manager.opened_dock_areas()[0])
+    check()
+
+
+def test_drop_indicator_pixmap_cache(qtbot, manager: qtpydocking.DockManager):
+    from qtpydocking import dock_overlay
+    dock_overlay.clear_drop_indicator_pixmap_cache()
+
+    def setup_crosses(dock_manager):
+        crosses = []
+        for overlay, mode in (
+                (dock_manager.dock_area_overlay(),
+                 qtpydocking.OverlayMode.dock_area),
+                (dock_manager.container_overlay(),
+                 qtpydocking.OverlayMode.container)):
+            overlay.d.cross.setup_overlay_cross(mode)
+            crosses.append(overlay.d.cross)
+        return crosses
+
+    crosses = setup_crosses(manager)
+    rendered = len(dock_overlay._drop_indicator_pixmaps)
+    assert rendered == 10
+
+    # A second dock manager reuses the pixmaps
+    main_window = QtWidgets.QMainWindow()
+    qtbot.addWidget(main_window)
+    other_crosses = setup_crosses(qtpydocking.DockManager(main_window))
+    assert len(dock_overlay._drop_indicator_pixmaps) == rendered
+    for cross, other_cross in zip(crosses, other_crosses):
+        for area, label in cross.d.drop_indicator_widgets.items():
+            other_label = other_cross.d.drop_indicator_widgets[area]
+            assert label.pixmap().cacheKey() == other_label.pixmap().cacheKey()
+
+    # Changed icon colors require new pixmaps
+    crosses[0].set_icon_colors('Arrow=#ff00ff00')
+    crosses[0].setup_overlay_cross(qtpydocking.OverlayMode.dock_area)
+    assert len(dock_overlay._drop_indicator_pixmaps) == rendered + 5
+
+
+def test_drag_pacing(qtbot, monkeypatch, manager: qtpydocking.DockManager):
+    manager.set_config_flags(manager.config_flags() |
+                             qtpydocking.DockFlags.drag_pacing)
+    widget = qtpydocking.DockWidget('test')
+    qtbot.addWidget(widget)
+    widget.set_widget(QtWidgets.QLabel('test'))
+    floating = qtpydocking.FloatingDockContainer(
+        dock_widget=widget, dock_manager=manager)
+
+    positions = []
+    monkeypatch.setattr(floating.d, 'update_drop_overlays', positions.append)
+    floating.d.set_state(qtpydocking.DragState.floating_widget)
+    for x in range(10):
+        floating.d.request_drop_overlay_update(QtCore.QPoint(x, 0))
+    assert positions == []
+
+    # Only the latest position is processed
+    qtbot.waitUntil(lambda: positions == [QtCore.QPoint(9, 0)])
+
+    # Releasing the mouse processes a pending update immediately
+    floating.d.request_drop_overlay_update(QtCore.QPoint(20, 0))
+    floating.d.title_mouse_release_event()
+    assert positions[-1] == QtCore.QPoint(20, 0)
+    assert floating.d.pending_drop_overlay_pos is None
+
+
+def test_overlay_partial_repaint(qtbot, monkeypatch,
+                                 manager: qtpydocking.DockManager):
+    overlay = manager.dock_area_overlay()
+    target = manager.opened_dock_areas()[0]
+    location = [DockWidgetArea.invalid]
+    monkeypatch.setattr(overlay, 'drop_area_under_cursor',
+                        lambda: location[0])
+    assert overlay.show_overlay(target) == DockWidgetArea.invalid
+    assert overlay.drop_overlay_rect().isEmpty()
+
+    updates = []
+    monkeypatch.setattr(overlay, 'update', lambda *args: updates.append(args))
+    rect = overlay.rect()
+    left = QtCore.QRect(0, 0, rect.width() // 2, rect.height())
+    location[0] = DockWidgetArea.left
+    assert overlay.show_overlay(target) == DockWidgetArea.left
+    assert overlay.drop_overlay_rect() == left
+    assert updates == [(left, )]
+
+    # Unchanged area and preview state do not repaint
+    overlay.show_overlay(target)
+    overlay.enable_drop_preview(True)
+    assert len(updates) == 1
+
+    top = QtCore.QRect(0, 0, rect.width(), rect.height() // 2)
+    location[0] = DockWidgetArea.top
+    overlay.show_overlay(target)
+    assert updates[-1] == (left.united(top), )
+
+    overlay.enable_drop_preview(False)
+    assert overlay.drop_overlay_rect().isEmpty()
+    assert updates[-1] == (top, )
+    overlay.hide_overlay()
+
+
+def test_z_order(qtbot, manager: qtpydocking.DockManager):
+    def make_floating(dock_manager):
+        widget = qtpydocking.DockWidget('test')
+        widget.set_widget(QtWidgets.QLabel('test'))
+        floating = qtpydocking.FloatingDockContainer(
+            dock_widget=widget, dock_manager=dock_manager)
+        floating.setGeometry(100, 100, 200, 200)
+        floating.show()
+        return floating
+
+    first, second, dragged = [make_floating(manager) for _ in range(3)]
+    containers = [floating.dock_container() for floating in (first, second)]
+    assert manager.z_order_index() == 0
+    assert containers[1].is_in_front_of(containers[0])
+    assert containers[0].is_in_front_of(manager)
+    assert dragged.d.top_container_at(QtCore.QPoint(150, 150)) is containers[1]
+
+    manager.raise_dock_container(containers[0])
+    assert containers[0].is_in_front_of(containers[1])
+    assert dragged.d.top_container_at(QtCore.QPoint(150, 150)) is containers[0]
+    manager.build_drop_target_index()
+    assert dragged.d.top_container_at(QtCore.QPoint(150, 150)) is containers[0]
+    manager.release_drop_target_index()
+
+    # The z-order of another manager is independent
+    main_window = QtWidgets.QMainWindow()
+    qtbot.addWidget(main_window)
+    other_manager = qtpydocking.DockManager(main_window)
+    other = make_floating(other_manager).dock_container()
+    assert other.z_order_index() == 1
+    assert list(other_manager.z_ordered_containers()) == [other,
+                                                          other_manager]
+
+    manager.remove_dock_container(containers[0])
+    assert containers[0] not in list(manager.z_ordered_containers())
+    assert containers[0].z_order_index() == 0
+
+
+def test_drag_preview(qtbot, manager: qtpydocking.DockManager):
+    manager.set_config_flags(manager.config_flags() |
+                             qtpydocking.DockFlags.drag_preview)
+    dock_area = manager.opened_dock_areas()[0]
+    dock_widget = dock_area.current_dock_widget()
+    tab_bar = dock_area.d.tab_bar()
+    tab_bar.start_floating(QtCore.QPoint(5, 5))
+    preview = tab_bar.d.floating_widget
+    assert isinstance(preview, qtpydocking.FloatingDragPreview)
+    assert preview.content() is dock_area
+    assert not manager.floating_widgets()
+
+    # Moving the preview does not move the content
+    preview.move_floating()
+    assert dock_widget.dock_area_widget() is dock_area
+    assert not dock_widget.dock_container().is_floating()
+
+    # Cancelling leaves the content where it is
+    preview.cancel_dragging()
+    assert dock_widget.dock_container() is manager
+    assert not manager.floating_widgets()
+
+    # Releasing without a drop target moves the content into a floating
+    # widget at the position of the preview
+    preview = qtpydocking.FloatingDragPreview(dock_widget=dock_widget)
+    preview.start_dragging(QtCore.QPoint(5, 5), QtCore.QSize(200, 100))
+    preview.d.drop_container = None
+    preview.finish_dragging()
+    assert dock_widget.dock_container().is_floating()
+    floating = dock_widget.dock_container().floating_widget()
+    assert floating.geometry() == preview.geometry()
+    assert floating.isVisible()
+
+
+def test_deleted_containers_unregistered(qtbot,
+                                         manager: qtpydocking.DockManager):
+    parent = QtWidgets.QWidget()
+    container = qtpydocking.DockContainerWidget(manager, parent)
+    assert container in manager.dock_containers()
+    assert container in list(manager.z_ordered_containers())
+
+    # Deleting the container without the dock manager's knowledge
+    parent.deleteLater()
+    qtbot.waitUntil(lambda: container not in manager.dock_containers())
+    assert container not in list(manager.z_ordered_containers())
+    assert all(c.isVisible() in (True, False)
+               for c in manager.dock_containers())
+
+
+def test_event_filter_only_while_dragging(qtbot,
+                                          manager: qtpydocking.DockManager):
+    class FloatingWidget(qtpydocking.FloatingDockContainer):
+        filtered = 0
+
+        def eventFilter(self, watched, event):
+            FloatingWidget.filtered += 1
+            return super().eventFilter(watched, event)
+
+    widget = qtpydocking.DockWidget('test')
+    widget.set_widget(QtWidgets.QLabel('test'))
+    floating = FloatingWidget(dock_widget=widget, dock_manager=manager)
+
+    def post_event():
+        QtWidgets.QApplication.sendEvent(manager, QtCore.QEvent(
+            QtCore.QEvent.User))
+
+    post_event()
+    assert FloatingWidget.filtered == 0
+
+    floating.d.set_state(qtpydocking.DragState.floating_widget)
+    post_event()
+    assert FloatingWidget.filtered > 0
+
+    floating.d.set_state(qtpydocking.DragState.inactive)
+    FloatingWidget.filtered = 0
+    post_event()
+    assert FloatingWidget.filtered == 0
+
+
+def test_tab_switching_updates_two_tabs(qtbot, monkeypatch, add_tabs,
+                                        manager: qtpydocking.DockManager):
+    dock_area = add_tabs(10)
+
+    tab_bar = dock_area.d.tab_bar()
+    tab_bar.set_current_index(0)
+    updated = []
+    set_active_tab = qtpydocking.DockWidgetTab.set_active_tab
+    monkeypatch.setattr(
+        qtpydocking.DockWidgetTab, 'set_active_tab',
+        lambda tab, active: (updated.append((tab, active)),
+                             set_active_tab(tab, active)))
+    tab_bar.set_current_index(7)
+    assert updated == [(tab_bar.tab(0), False), (tab_bar.tab(7), True)]
+    assert [i for i in range(tab_bar.count())
+            if tab_bar.tab(i).is_active_tab()] == [7]
+
+    # The close button follows the features and the config flags
+    close_button = tab_bar.tab(7).d.close_button
+    assert not close_button.isHidden()
+    dock_widget = tab_bar.tab(7).dock_widget()
+    dock_widget.set_feature(qtpydocking.DockWidgetFeature.closable, False)
+    assert close_button.isHidden()
+    dock_widget.set_feature(qtpydocking.DockWidgetFeature.closable, True)
+    assert not close_button.isHidden()
+    manager.set_config_flags(
+        manager.config_flags() &
+        ~qtpydocking.DockFlags.active_tab_has_close_button)
+    assert close_button.isHidden()
+
+
+def test_tab_activation_without_polish(qtbot, monkeypatch, add_tabs,
+                                       manager: qtpydocking.DockManager):
+    from qtpydocking import dock_widget_tab
+    dock_area = add_tabs(3)
+
+    tab_bar = dock_area.d.tab_bar()
+    tab_bar.set_current_index(0)
+    style = tab_bar.tab(1).style()
+    polished = []
+    monkeypatch.setattr(style, 'polish', polished.append)
+    monkeypatch.setattr(style, 'unpolish', polished.append)
+    tab_bar.set_current_index(1)
+    assert polished == []
+
+    label = tab_bar.tab(1).d.title_label
+    assert label.foregroundRole() == QtGui.QPalette.WindowText
+    assert tab_bar.tab(0).d.title_label.foregroundRole() == QtGui.QPalette.Dark
+    brush = dock_widget_tab.active_tab_brush(tab_bar.palette())
+    assert dock_widget_tab.active_tab_brush(tab_bar.palette()) is brush
+
+    # Only the brush of the most recent palette is cached
+    palette = QtGui.QPalette(tab_bar.palette())
+    palette.setColor(QtGui.QPalette.Light, QtGui.QColor('red'))
+    assert dock_widget_tab.active_tab_brush(palette) is not brush
+    assert dock_widget_tab._active_tab_brush[0] == palette.cacheKey()
+
+
+def test_virtual_tabs(qtbot, add_tabs, manager: qtpydocking.DockManager):
+    manager.set_config_flags(manager.config_flags() |
+                             qtpydocking.DockFlags.virtual_tabs)
+    dock_area = add_tabs(100)
+
+    tab_bar = dock_area.d.tab_bar()
+    tab_bar.set_current_index(0)
+
+    def with_content():
+        return [i for i in range(tab_bar.count())
+                if tab_bar.tab(i).has_content()]
+
+    # Tabs are created without content
+    assert with_content() == []
+    for i in range(1, 20):
+        tab_bar.tab(i).setToolTip(f'tooltip {i}')
+
+    qtbot.waitUntil(lambda: 0 < len(with_content()) < 50)
+    assert 0 in with_content()
+    labels = tab_bar.findChildren(qtpydocking.ElidingLabel,
+                                  'dockWidgetTabLabel')
+    assert len(labels) < 50
+    assert tab_bar.tab(99).text() == 'Tab 99'
+    assert tab_bar.tab(99).sizeHint().width() > 0
+
+    # Scrolling recycles the content
+    scroll_bar = tab_bar.horizontalScrollBar()
+    scroll_bar.setValue(scroll_bar.maximum())
+    qtbot.waitUntil(lambda: 99 in with_content())
+    assert 50 not in with_content()
+    assert 0 in with_content()
+    assert tab_bar.tab(99).d.title_label.text() == 'Tab 99'
+
+    # Recycled labels do not keep the tooltip of their previous tab
+    for i in with_content():
+        tab = tab_bar.tab(i)
+        assert tab.d.title_label.toolTip() == tab.toolTip()
+    assert tab_bar.tab(99).d.title_label.toolTip() == ''
+
+    # Indices and signals are unchanged
+    with qtbot.waitSignal(tab_bar.current_changed) as blocker:
+        tab_bar.set_current_index(50)
+    assert blocker.args == [50]
+    qtbot.waitUntil(lambda: 50 in with_content())
+
+    with qtbot.waitSignal(tab_bar.tab_closed) as blocker:
+        tab_bar.close_tab(98)
+    assert blocker.args == [98]
+
+    tab = tab_bar.tab(10)
+    tab_bar.remove_tab(tab)
+    assert tab.has_content()
+    assert tab_bar.tab(10).text() == 'Tab 11'
+
+
+def test_dock_area_index_consistency(qtbot, add_tabs):
+    dock_area = add_tabs(8)
+    widgets = dock_area.dock_widgets()
+    dock_area.check_consistency()
+
+    tab_bar = dock_area.d.tab_bar()
+    dock_area.set_current_index(5)
+    dock_area.move_dock_widget(widgets[7], 0)
+    dock_area.check_consistency()
+    assert dock_area.index(widgets[7]) == 0
+    assert tab_bar.index_of(widgets[7].tab_widget()) == 0
+    assert dock_area.current_dock_widget() is widgets[5]
+
+    dock_area.reorder_dock_widget(0, 4)
+    tab_bar.move_tab(0, 4)
+    dock_area.check_consistency()
+
+    dock_area.remove_dock_widget(widgets[2])
+    dock_area.check_consistency()
+    assert dock_area.index(widgets[2]) == -1
+    assert tab_bar.index_of(widgets[2].tab_widget()) == -1
+    assert tab_bar.current_tab() is dock_area.current_dock_widget().tab_widget()
+
+
+def test_tabs_menu(qtbot, monkeypatch, add_tabs):
+    dock_area = add_tabs(200)
+    widgets = dock_area.dock_widgets()
+
+    title_bar = dock_area.d.title_bar
+    tab_bar = title_bar.tab_bar()
+    menu = title_bar.tabs_menu()
+
+    def check():
+        menu.check_consistency(tab_bar.tab(i) for i in range(tab_bar.count()))
+
+    # The menu is kept up to date instead of being rebuilt when it is shown
+    monkeypatch.setattr(menu, 'set_tabs', None)
+    title_bar.on_tabs_menu_about_to_show()
+    check()
+    assert len(menu.tab_actions()) == 200
+
+    widgets[3].toggle_view(False)
+    widgets[4].setWindowTitle('Renamed')
+    widgets[5].set_tab_tool_tip('Tooltip')
+    dock_area.move_dock_widget(widgets[0], 10)
+    dock_area.remove_dock_widget(widgets[1])
+    check()
+    actions = menu.tab_actions()
+    assert len(actions) == 198
+    assert actions[0].data() is widgets[2].tab_widget()
+    assert actions[1].text() == 'Renamed'
+    assert actions[2].toolTip() == 'Tooltip'
+
+    menu.set_filter_text('TAB 1')
+    assert [action.text() for action in menu.tab_actions()][:3] == [
+        'Tab 10', 'Tab 11', 'Tab 12']
+    assert len(menu.tab_actions()) == 110
+    menu.set_filter_text('renamed')
+    assert [action.data() for action in menu.tab_actions()] == [
+        widgets[4].tab_widget()]
+
+    with qtbot.waitSignal(title_bar.tab_bar_clicked) as blocker:
+        menu.trigger_first_visible()
+    assert blocker.args == [dock_area.index(widgets[4])]
+    assert dock_area.current_dock_widget() is widgets[4]
+
+    menu.set_filter_text('')
+    assert len(menu.tab_actions()) == 198
+    widgets[3].toggle_view(True)
+    check()
+    assert len(menu.tab_actions()) == 199
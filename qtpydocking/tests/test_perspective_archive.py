@@ -0,0 +1,63 @@
+import pytest
+from qtpy import QtCore
+
+import qtpydocking
+from qtpydocking import PerspectiveArchive
+
+
+def test_archive_round_trip(tmp_path):
+    path = tmp_path / 'perspectives.bin'
+    archive = PerspectiveArchive(path)
+    assert archive.names() == []
+
+    archive.write('a', QtCore.QByteArray(b'state a'))
+    archive.write('b', QtCore.QByteArray(b'state b'))
+    archive.write('a', QtCore.QByteArray(b'new state a'))
+    assert archive.read('a') == b'new state a'
+    assert archive.remove('b', 'missing') == 1
+    assert archive.read('b') is None
+    # Replaced states and old indices are unused
+    assert archive.unused_size() > len(b'state a') + len(b'state b')
+    archive.close()
+
+    reopened = PerspectiveArchive(path)
+    assert reopened.names() == ['a']
+    assert reopened.read('a') == b'new state a'
+
+    size = path.stat().st_size
+    reopened.compact()
+    assert reopened.unused_size() == 0
+    assert path.stat().st_size < size
+    assert PerspectiveArchive(path).read('a') == b'new state a'
+
+
+def test_archive_auto_compaction(tmp_path):
+    archive = PerspectiveArchive(tmp_path / 'perspectives.bin',
+                                 compact_threshold=100)
+    for i in range(20):
+        archive.write('a', QtCore.QByteArray(b'x' * 50))
+    assert archive.unused_size() <= 100 + 50
+
+
+def test_archive_invalid(tmp_path):
+    path = tmp_path / 'invalid.bin'
+    path.write_bytes(b'not an archive at all, really')
+    with pytest.raises(ValueError):
+        PerspectiveArchive(path)
+
+
+def test_manager_archive(tmp_path, qtbot, manager: qtpydocking.DockManager):
+    path = tmp_path / 'perspectives.bin'
+    manager.set_perspective_archive(PerspectiveArchive(path))
+    manager.add_perspective('one')
+    manager.add_perspective('two')
+    manager.remove_perspectives('two')
+    assert manager.perspective_names() == ['one']
+
+    manager.set_perspective_archive(None)
+    assert manager.perspective_names() == []
+
+    manager.set_perspective_archive(PerspectiveArchive(path))
+    assert manager.perspective_names() == ['one']
+    with qtbot.waitSignal(manager.state_restored, timeout=1000):
+        manager.open_perspective('one')
@@ -0,0 +1,44 @@
+import pytest
+
+from qtpydocking import PositionIndex
+
+
+def test_position_index():
+    index = PositionIndex('abc')
+    assert list(index) == ['a', 'b', 'c']
+    assert index.index_of('c') == 2
+    assert index.index_of('x') == -1
+    assert 'b' in index
+    assert index[1] == 'b'
+
+    assert index.insert(0, 'x') == 0
+    assert index.insert(-1, 'y') == 4
+    assert index.insert(99, 'z') == 5
+    assert list(index) == ['x', 'a', 'b', 'c', 'y', 'z']
+    index.check_consistency('xabcyz')
+
+    assert index.remove('b') == 2
+    assert index.index_of('c') == 2
+    assert 'b' not in index
+
+    index.move(0, 3)
+    assert list(index) == ['a', 'c', 'y', 'x', 'z']
+    index.move(4, 1)
+    assert list(index) == ['a', 'z', 'c', 'y', 'x']
+    index.check_consistency('azcyx')
+    assert [index.index_of(item) for item in 'azcyx'] == list(range(5))
+
+    with pytest.raises(ValueError):
+        index.insert(0, 'a')
+    with pytest.raises(ValueError):
+        index.remove('b')
+    with pytest.raises(RuntimeError):
+        index.check_consistency('azcxy')
+
+    index._positions['a'] = 3
+    with pytest.raises(RuntimeError):
+        index.check_consistency()
+
+    index.clear()
+    assert len(index) == 0
+    index.check_consistency(())
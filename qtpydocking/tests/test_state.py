@@ -0,0 +1,362 @@
+import pytest
+from qtpy import QtCore, QtWidgets
+
+import qtpydocking
+from qtpydocking import LayoutSnapshot
+from qtpydocking.layout_snapshot import DockAreaSnapshot, SplitterSnapshot
+
+
+def test_snapshot_from_saved_state(manager: qtpydocking.DockManager):
+    snapshot = LayoutSnapshot.from_xml(manager.save_state())
+    assert snapshot is not None
+    assert snapshot.version == 0
+    assert len(snapshot.containers) == len(manager.dock_containers())
+
+    main = snapshot.containers[0]
+    assert not main.floating
+    assert isinstance(main.root, (SplitterSnapshot, DockAreaSnapshot))
+
+
+@pytest.mark.parametrize(
+    'state',
+    [b'',
+     b'<?xml version="1.0"?><NotDocking Version="0"/>',
+     b'<?xml version="1.0"?><QtAdvancedDockingSystem Version="0">'
+     b'<Container Floating="0"><Splitter Orientation="x" Count="1">'
+     b'</Splitter></Container></QtAdvancedDockingSystem>',
+     b'<?xml version="1.0"?><QtAdvancedDockingSystem Version="0">'
+     b'<Container Floating="0"><Splitter Orientation="-" Count="2">'
+     b'<Sizes>1 </Sizes></Splitter></Container></QtAdvancedDockingSystem>',
+     ]
+)
+def test_snapshot_invalid(state):
+    assert LayoutSnapshot.from_xml(QtCore.QByteArray(state)) is None
+
+
+def test_restore_invalid_state_keeps_layout(manager: qtpydocking.DockManager):
+    before = manager.save_state()
+    assert not manager.restore_state(QtCore.QByteArray(b'<?xml version="1.0"?><x/>'))
+    assert not manager.restore_state(before, version=1)
+    assert manager.save_state() == before
+
+
+def _areas(node):
+    if isinstance(node, DockAreaSnapshot):
+        return [node]
+    return [area for child in node.children for area in _areas(child)]
+
+
+def test_restore_round_trip(manager: qtpydocking.DockManager):
+    state = manager.save_state()
+    assert manager.restore_state(state)
+
+    before = LayoutSnapshot.from_xml(state)
+    after = LayoutSnapshot.from_xml(manager.save_state())
+    for container_before, container_after in zip(before.containers,
+                                                 after.containers):
+        assert (_areas(container_before.root) ==
+                _areas(container_after.root))
+
+
+def _dock_areas(manager):
+    return [container.dock_area(i)
+            for container in manager.dock_containers()
+            for i in range(container.dock_area_count())]
+
+
+def test_incremental_restore(manager: qtpydocking.DockManager):
+    manager.set_config_flags(manager.config_flags() |
+                             qtpydocking.DockFlags.incremental_restore)
+    manager.add_perspective('original')
+    areas = _dock_areas(manager)
+
+    # Close one dock widget, move another between areas and reorder a tab
+    multi = [area for area in areas if area.dock_widgets_count() > 1]
+    source = multi[0] if multi else areas[0]
+    source.dock_widgets()[0].toggle_view(False)
+    if len(areas) > 1 and source.dock_widgets_count() > 1:
+        target = next(area for area in areas if area is not source)
+        moved = source.dock_widgets()[-1]
+        source.remove_dock_widget(moved)
+        target.insert_dock_widget(0, moved, False)
+    if source.dock_widgets_count() > 1:
+        source.move_dock_widget(source.dock_widgets()[0], 1)
+
+    assert manager.save_state() != manager._mgr.perspectives['original']
+
+    manager.open_perspective('original')
+    assert _dock_areas(manager) == areas
+
+    expected = LayoutSnapshot.from_xml(manager._mgr.perspectives['original'])
+    restored = LayoutSnapshot.from_xml(manager.save_state())
+    for container_before, container_after in zip(expected.containers,
+                                                 restored.containers):
+        assert (_areas(container_before.root) ==
+                _areas(container_after.root))
+
+
+def test_incremental_restore_falls_back(manager: qtpydocking.DockManager):
+    manager.set_config_flags(manager.config_flags() |
+                             qtpydocking.DockFlags.incremental_restore)
+    state = manager.save_state()
+    area = _dock_areas(manager)[0]
+    for dock_widget in area.dock_widgets():
+        area.remove_dock_widget(dock_widget)
+        dock_widget.flag_as_unassigned()
+
+    # An emptied dock area is deleted if it is not the last one, which
+    # changes the splitter structure
+    assert manager.restore_state(state)
+    expected = LayoutSnapshot.from_xml(state)
+    restored = LayoutSnapshot.from_xml(manager.save_state())
+    assert (_areas(expected.containers[0].root) ==
+            _areas(restored.containers[0].root))
+
+
+def test_binary_round_trip(manager: qtpydocking.DockManager):
+    snapshot = manager.save_snapshot(version=-3)
+    assert snapshot == LayoutSnapshot.from_xml(manager.save_state(-3))
+
+    data = snapshot.to_binary()
+    assert LayoutSnapshot.from_binary(data) == snapshot
+    assert len(data) < len(manager.save_state(-3))
+
+    # Truncated data is rejected
+    assert LayoutSnapshot.from_binary(data.left(data.size() - 1)) is None
+    assert LayoutSnapshot.from_binary(QtCore.QByteArray(b'QADS\x7f')) is None
+
+
+def test_restore_binary_state(manager: qtpydocking.DockManager):
+    manager.set_config_flags(manager.config_flags() |
+                             qtpydocking.DockFlags.binary_state)
+    state = manager.save_state()
+    assert state.startsWith(b'QADS')
+    assert manager.restore_state(state)
+    assert not manager.restore_state(state, version=1)
+    assert LayoutSnapshot.from_binary(manager.save_state()).containers
+
+
+def test_perspective_cache(manager: qtpydocking.DockManager):
+    manager.set_perspective_cache_size(2)
+    for name in ('a', 'b', 'c'):
+        manager.add_perspective(name)
+
+    manager.open_perspective('a')
+    manager.open_perspective('a')
+    assert manager.perspective_cache_info() == (1, 1, 2, 1)
+
+    manager.open_perspective('b')
+    manager.open_perspective('c')
+    # 'a' was evicted as the least recently used perspective
+    manager.open_perspective('a')
+    info = manager.perspective_cache_info()
+    assert (info.hits, info.misses, info.size) == (1, 4, 2)
+
+    manager.add_perspective('a')
+    manager.remove_perspectives('c')
+    assert manager.perspective_cache_info().size == 0
+
+    manager.open_perspective('missing')
+    assert manager.perspective_cache_info().misses == 4
+
+
+def test_dock_widget_factories(manager: qtpydocking.DockManager):
+    for name in ('lazy_open', 'lazy_closed'):
+        dock_widget = qtpydocking.DockWidget(name)
+        dock_widget.set_widget(QtWidgets.QLabel(name))
+        manager.add_dock_widget(qtpydocking.DockWidgetArea.right, dock_widget)
+    manager.find_dock_widget('lazy_closed').toggle_view(False)
+    state = manager.save_state()
+
+    for name in ('lazy_open', 'lazy_closed'):
+        manager.remove_dock_widget(manager.find_dock_widget(name))
+
+    created = []
+
+    def factory(dock_widget):
+        created.append(dock_widget.objectName())
+        dock_widget.set_widget(QtWidgets.QLabel(dock_widget.objectName()))
+
+    manager.register_dock_widget_factory('lazy_open', factory)
+    manager.register_dock_widget_factory('lazy_closed', factory,
+                                         title='Lazy')
+    assert manager.restore_state(state)
+    assert created == ['lazy_open']
+
+    placeholder = manager.find_dock_widget('lazy_closed')
+    assert placeholder.windowTitle() == 'Lazy'
+    assert placeholder.is_closed()
+    assert not placeholder.is_materialized()
+    assert placeholder.widget() is None
+
+    placeholder.toggle_view(True)
+    assert created == ['lazy_open', 'lazy_closed']
+    assert placeholder.is_materialized()
+    assert isinstance(placeholder.widget(), QtWidgets.QLabel)
+
+
+def test_restore_state_async(qtbot, manager: qtpydocking.DockManager):
+    state = manager.save_state()
+    # Change the layout, restoring the current layout does nothing
+    next(dock_widget for dock_widget in manager.dock_widgets_map().values()
+         if not dock_widget.is_closed()).toggle_view(False)
+    progress = []
+    manager.restore_progress.connect(
+        lambda done, total: progress.append((done, total)))
+
+    assert not manager.restore_state_async(state, version=1)
+    with qtbot.waitSignal(manager.state_restored):
+        assert manager.restore_state_async(state, time_slice=0)
+        assert manager.is_restoring_state()
+        assert not manager.restore_state(state)
+        assert not manager.restore_state_async(state)
+
+    assert not manager.is_restoring_state()
+    area_count = sum(1 for _ in LayoutSnapshot.from_xml(state).dock_areas())
+    assert progress[-1] == (area_count, area_count)
+    assert len(progress) == area_count + 1
+
+    expected = LayoutSnapshot.from_xml(state)
+    restored = LayoutSnapshot.from_xml(manager.save_state())
+    for container_before, container_after in zip(expected.containers,
+                                                 restored.containers):
+        assert (_areas(container_before.root) ==
+                _areas(container_after.root))
+
+
+@pytest.mark.parametrize(
+    'codec',
+    [qtpydocking.NullCodec(), qtpydocking.ZlibCodec(1),
+     qtpydocking.LzmaCodec(0)]
+)
+def test_state_codec(manager: qtpydocking.DockManager, codec):
+    plain = manager.save_state()
+    manager.set_state_codec(codec)
+    state = manager.save_state()
+    assert state.startsWith(qtpydocking.state_codec.CODEC_MAGIC)
+    assert qtpydocking.state_codec.decode(state) == plain
+    assert manager.restore_state(state)
+
+    manager.set_state_codec(None)
+    assert manager.save_state().startsWith(b'<?xml')
+
+
+def test_state_codec_invalid():
+    decode = qtpydocking.state_codec.decode
+    assert decode(QtCore.QByteArray(b'QADC\x07unknownxyz')) is None
+    assert decode(QtCore.QByteArray(b'QADC\x04zlibxyz')) is None
+    state = QtCore.QByteArray(b'<?xml version="1.0"?>')
+    assert decode(state) == state
+
+
+def test_incomplete_state_codec():
+    class IncompleteCodec(qtpydocking.StateCodec):
+        name = 'incomplete'
+
+        def encode(self, data: bytes) -> bytes:
+            return data
+
+    with pytest.raises(TypeError):
+        IncompleteCodec()
+    with pytest.raises(TypeError):
+        qtpydocking.state_codec.register_codec(object())
+
+
+def test_custom_state_codec(manager: qtpydocking.DockManager, monkeypatch):
+    class ReversedCodec(qtpydocking.StateCodec):
+        name = 'reversed'
+
+        def encode(self, data: bytes) -> bytes:
+            return data[::-1]
+
+        def decode(self, data: bytes) -> bytes:
+            return data[::-1]
+
+    monkeypatch.setattr(qtpydocking.state_codec, '_codecs',
+                        dict(qtpydocking.state_codec._codecs))
+    plain = manager.save_state()
+    manager.set_state_codec(ReversedCodec())
+    state = manager.save_state()
+    assert state.startsWith(qtpydocking.state_codec.CODEC_MAGIC)
+    assert qtpydocking.state_codec.decode(state) == plain
+    assert manager.restore_state(state)
+
+    with pytest.raises(TypeError):
+        manager.set_state_codec(object())
+
+
+def test_autosave(qtbot, manager: qtpydocking.DockManager, tmp_path):
+    path = tmp_path / 'layout.dat'
+    manager.set_state_codec(qtpydocking.ZlibCodec(1))
+    manager.enable_autosave(path, delay=50)
+    assert manager.autosave_path() == path
+
+    dock_widget = next(dock_widget
+                       for dock_widget in manager.dock_widgets_map().values()
+                       if not dock_widget.is_closed())
+    with qtbot.waitSignal(manager.layout_changed):
+        dock_widget.toggle_view(False)
+    assert manager.is_layout_dirty()
+
+    qtbot.waitUntil(path.exists)
+    qtbot.waitUntil(lambda: not manager.is_layout_dirty())
+    manager.autosave_now().result()
+    state = QtCore.QByteArray(path.read_bytes())
+    assert state.startsWith(qtpydocking.state_codec.CODEC_MAGIC)
+    assert not (tmp_path / 'layout.dat.tmp').exists()
+
+    dock_widget.toggle_view(True)
+    assert manager.restore_state(state)
+    assert dock_widget.is_closed()
+
+    manager.disable_autosave()
+    assert manager.autosave_path() is None
+    assert manager.autosave_now() is None
+
+
+def test_layout_fingerprint(manager: qtpydocking.DockManager):
+    state = manager.save_state()
+    fingerprint = manager.layout_fingerprint()
+    assert manager.state_fingerprint(state) == fingerprint
+    assert manager.state_fingerprint(QtCore.QByteArray(b'invalid')) is None
+
+    # Restoring the current layout keeps all dock areas
+    areas = _dock_areas(manager)
+    assert manager.restore_state(state)
+    assert _dock_areas(manager) == areas
+
+    dock_widget = next(dock_widget
+                       for dock_widget in manager.dock_widgets_map().values()
+                       if not dock_widget.is_closed())
+    dock_widget.toggle_view(False)
+    assert manager.layout_fingerprint() != fingerprint
+    assert manager.restore_state(state)
+    assert not dock_widget.is_closed()
+
+
+def test_readded_dock_widget_notifies_once(qtbot,
+                                           manager: qtpydocking.DockManager):
+    dock_widget = qtpydocking.DockWidget('readded')
+    dock_widget.set_widget(QtWidgets.QLabel('readded'))
+
+    def toggle_notifications():
+        notifications = []
+
+        def notified():
+            notifications.append(None)
+
+        manager.layout_changed.connect(notified)
+        try:
+            dock_widget.toggle_view(False)
+            dock_widget.toggle_view(True)
+        finally:
+            manager.layout_changed.disconnect(notified)
+        return len(notifications)
+
+    manager.add_dock_widget(qtpydocking.DockWidgetArea.left, dock_widget)
+    expected = toggle_notifications()
+    for _ in range(3):
+        manager.remove_dock_widget(dock_widget)
+        manager.add_dock_widget(qtpydocking.DockWidgetArea.left, dock_widget)
+    manager.add_dock_widget(qtpydocking.DockWidgetArea.right, dock_widget)
+    assert toggle_notifications() == expected
@@ -1,7 +1,7 @@
 import sys
 import functools
 
-from typing import Optional, Any, Union, Type
+from typing import Optional, Any, Generator, Union, Type
 
 from qtpy.QtCore import Qt, QEvent, QObject, QRegExp
 from qtpy.QtGui import QPainter, QPixmap, QIcon
@@ -40,6 +40,26 @@ def emit_top_level_event_for_widget(widget: Optional['DockWidget'],
     widget.emit_top_level_changed(floating)
 
 
+def run_to_completion(generator: Generator) -> Any:
+    '''
+    Runs the given generator until it is exhausted
+
+    Parameters
+    ----------
+    generator : generator
+
+    Returns
+    -------
+    value : object
+        The return value of the generator
+    '''
+    while True:
+        try:
+            next(generator)
+        except StopIteration as ex:
+            return ex.value
+
+
 def start_drag_distance() -> int:
     '''
     The distance the user needs to move the mouse with the left button hold